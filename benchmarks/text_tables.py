@@ -0,0 +1,65 @@
+"""
+Compares reading m23 Log Files Combined and Color Normalized text tables with
+the regex delimited python parser to `trout.files.text_table.read_titled_table`
+
+Run from the root of the repo with
+
+    python -m benchmarks.text_tables
+"""
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from trout.files.text_table import read_titled_table
+from trout.test.data_drive import write_color_normalized, write_logfile_combined
+
+N_STARS = 3745
+N_FILES = 20
+
+
+def _time(fn, paths):
+    start = time.perf_counter()
+    for path in paths:
+        fn(path)
+    return (time.perf_counter() - start) / len(paths)
+
+
+def _report(name, slow, fast):
+    print(f"{name:<22s}{slow * 1000:>12.1f}{fast * 1000:>12.1f}{slow / fast:>10.1f}x")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        logfiles = [folder / f"07-14-11_m23_7.0-{i:03}.txt" for i in range(N_FILES)]
+        normalized = [folder / f"normalized_{i}.txt" for i in range(N_FILES)]
+        for i, (logfile, norm) in enumerate(zip(logfiles, normalized)):
+            write_logfile_combined(logfile, n_stars=N_STARS, radii=range(1, 13), seed=i)
+            write_color_normalized(norm, n_stars=N_STARS, seed=i)
+
+        print(f"{N_FILES} files of {N_STARS} stars, mean time per file")
+        print(f"{'File':<22s}{'python (ms)':>12s}{'fast (ms)':>12s}{'speedup':>10s}")
+        _report(
+            "Log Files Combined",
+            _time(
+                lambda p: pd.read_csv(p, skiprows=8, delimiter=r"\s{2,}", engine="python"),
+                logfiles,
+            ),
+            _time(lambda p: read_titled_table(p, titles_row=8), logfiles),
+        )
+        _report(
+            "Color Normalized",
+            _time(
+                lambda p: pd.read_csv(
+                    p, skiprows=2, delimiter=r"\s{2,}", engine="python", index_col=0
+                ),
+                normalized,
+            ),
+            _time(lambda p: read_titled_table(p, titles_row=2, index_col=0), normalized),
+        )
+
+
+if __name__ == "__main__":
+    main()
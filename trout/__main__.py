@@ -0,0 +1,50 @@
+"""
+Command line interface of trout, run `python -m trout --help` for usage
+"""
+import click
+
+from trout import cache
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.group(name="cache")
+def cache_group():
+    """
+    Manage the folder where trout caches data derived from DATA_DRIVE
+    """
+
+
+@cache_group.command()
+@click.argument("years", nargs=-1, type=int, required=True)
+@click.option("--workers", default=8, show_default=True, help="Files read in parallel")
+@click.option("--flux-logs", is_flag=True, help="Also cache the flux log combined files")
+def warm(years, workers, flux_logs):
+    """
+    Prebuild the cache for the nights of YEARS
+    """
+    from trout.intra.year import Year
+
+    for year in years:
+        click.echo(f"Caching {year} in {cache.get_cache_dir()}")
+        failures = Year(year).warm_cache(max_workers=workers, flux_logs=flux_logs)
+        click.echo(f"Done {year}, {len(failures)} files couldn't be cached")
+
+
+@cache_group.command()
+def info():
+    """
+    Show the cache folder and the size of the cached files
+    """
+    stats = cache.stats()
+    click.echo(f"Cache folder: {cache.get_cache_dir()}")
+    click.echo(
+        f"Cached files: {stats.disk_size / 1024**3:.2f} GB of {stats.disk_limit / 1024**3:.2f} GB"
+    )
+
+
+if __name__ == "__main__":
+    cli()
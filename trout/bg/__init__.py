@@ -6,6 +6,8 @@ from typing import Union
 import ephem
 import pandas as pd
 
+from trout.bg.twilight import next_astronomical_twilight
+
 
 class SKY:
     """
@@ -95,18 +97,8 @@ def get_ephem_decorah_observer():
 
 
 def get_next_astonomical_sunrise(date_of_observation: Union[datetime, date]) -> datetime:
-    decorah_observer = get_ephem_decorah_observer()
-    decorah_observer.date = date_of_observation.strftime("%Y-%m-%d %H:%M:%S")
-    decorah_observer.horizon = "-18"  # Astronomical twilight
-
-    to_return = decorah_observer.next_rising(ephem.Sun(), use_center=True)
-    return datetime.strptime(str(to_return), "%Y/%m/%d %H:%M:%S")
+    return next_astronomical_twilight(date_of_observation, rising=True)
 
 
 def get_next_astonomical_sunset(date_of_observation: Union[datetime, date]) -> datetime:
-    decorah_observer = get_ephem_decorah_observer()
-    decorah_observer.date = date_of_observation.strftime("%Y-%m-%d %H:%M:%S")
-    decorah_observer.horizon = "-18"  # Astronomical twilight
-
-    to_return = decorah_observer.next_setting(ephem.Sun(), use_center=True)
-    return datetime.strptime(str(to_return), "%Y/%m/%d %H:%M:%S")
+    return next_astronomical_twilight(date_of_observation, rising=False)
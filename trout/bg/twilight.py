@@ -0,0 +1,148 @@
+import os
+import threading
+from datetime import date, datetime, timedelta
+from functools import cache
+from typing import Tuple, Union
+
+import ephem
+import numpy as np
+import numpy.typing as npt
+
+from trout.cache import get_cache_dir, temporary_path
+
+# Nights from the first data season up to a few years in the future are
+# covered by the twilight table
+TWILIGHT_TABLE_START = date(2003, 1, 1)
+TWILIGHT_TABLE_END = date(date.today().year + 5, 1, 1)
+
+# Bump when the way the table is computed changes
+_TABLE_VERSION = 1
+
+# Epoch of ephem dates (Dublin Julian Date)
+_EPHEM_EPOCH = np.datetime64("1899-12-31T12:00:00", "s")
+
+_table_lock = threading.Lock()
+
+
+def _make_decorah_observer() -> ephem.Observer:
+    """
+    Returns a new observer at Decorah with the horizon set for astronomical
+    twilight. A new observer is made on every call since ephem observers are
+    mutated when computing events and can't be shared across threads.
+    """
+    decorah = ephem.Observer()
+
+    decorah.lat = "43.3017"
+    decorah.lon = "-91.79"
+
+    decorah.elevation = 268
+    decorah.horizon = "-18"  # Astronomical twilight
+    return decorah
+
+
+def _to_datetime64(ephem_date: float) -> np.datetime64:
+    # Rounded to the second like `str(ephem.Date)` is
+    return _EPHEM_EPOCH + np.timedelta64(round(ephem_date * 86400), "s")
+
+
+def _ephem_next_twilight(
+    date_of_observation: Union[datetime, date], rising: bool
+) -> datetime:
+    """
+    Returns the next astronomical twilight rising (or setting) after
+    `date_of_observation` (in UTC) computed with ephem
+    """
+    if not isinstance(date_of_observation, datetime):
+        date_of_observation = datetime(
+            date_of_observation.year, date_of_observation.month, date_of_observation.day
+        )
+    observer = _make_decorah_observer()
+    observer.date = ephem.Date(date_of_observation.replace(microsecond=0))
+    if rising:
+        event = observer.next_rising(ephem.Sun(), use_center=True)
+    else:
+        event = observer.next_setting(ephem.Sun(), use_center=True)
+    return _to_datetime64(float(event)).astype(datetime)
+
+
+def _build_twilight_table(start: date, end: date) -> Tuple[npt.NDArray, npt.NDArray]:
+    """
+    Returns the arrays (risings, settings) where the i'th item is the first
+    astronomical twilight rising (setting) after midnight UTC of the i'th day
+    from `start` (inclusive) to `end` (exclusive)
+    """
+    observer = _make_decorah_observer()
+    sun = ephem.Sun()
+    n_days = (end - start).days
+    risings = np.empty(n_days, dtype="datetime64[s]")
+    settings = np.empty(n_days, dtype="datetime64[s]")
+    for i in range(n_days):
+        midnight = ephem.Date(start + timedelta(days=i))
+        observer.date = midnight
+        risings[i] = _to_datetime64(float(observer.next_rising(sun, use_center=True)))
+        observer.date = midnight
+        settings[i] = _to_datetime64(float(observer.next_setting(sun, use_center=True)))
+    return risings, settings
+
+
+@cache
+def twilight_table() -> Tuple[npt.NDArray, npt.NDArray]:
+    """
+    Returns the twilight table for Decorah (see `_build_twilight_table`) from
+    `TWILIGHT_TABLE_START` to `TWILIGHT_TABLE_END`. The table is computed the
+    first time it's needed and stored in the cache folder.
+    """
+    start, end = TWILIGHT_TABLE_START, TWILIGHT_TABLE_END
+    path = get_cache_dir() / (
+        f"twilight_decorah_v{_TABLE_VERSION}_{start:%Y%m%d}_{end:%Y%m%d}.npz"
+    )
+    with _table_lock:
+        if not path.exists():
+            risings, settings = _build_twilight_table(start, end)
+            tmp_path = temporary_path(path)
+            with tmp_path.open("wb") as fd:
+                np.savez(fd, risings=risings, settings=settings)
+            os.replace(tmp_path, path)
+        with np.load(path) as table:
+            return table["risings"], table["settings"]
+
+
+def _lookup(
+    events: npt.NDArray, start: date, date_of_observation: Union[datetime, date]
+) -> Union[datetime, None]:
+    """
+    Returns the first event in `events` (a twilight table column starting at
+    `start`) after `date_of_observation`, None if it's outside of the table
+    """
+    if not isinstance(date_of_observation, datetime):
+        date_of_observation = datetime(
+            date_of_observation.year, date_of_observation.month, date_of_observation.day
+        )
+    day = (date_of_observation.date() - start).days
+    if day < 0 or day + 2 >= len(events):
+        return None
+    moment = np.datetime64(date_of_observation.replace(microsecond=0), "s")
+    # The first event after midnight can fall on the next day, so the event
+    # after `date_of_observation` is always among the next three rows
+    for event in events[day:day + 3]:
+        if event > moment:
+            return event.astype(datetime)
+    return None
+
+
+def next_astronomical_twilight(
+    date_of_observation: Union[datetime, date], rising: bool
+) -> datetime:
+    """
+    Returns the next astronomical twilight rising (sunrise side) or setting
+    (sunset side) at Decorah after `date_of_observation` (in UTC). Dates
+    covered by the twilight table are looked up in constant time, ephem is used
+    for other dates.
+    """
+    risings, settings = twilight_table()
+    event = _lookup(
+        risings if rising else settings, TWILIGHT_TABLE_START, date_of_observation
+    )
+    if event is None:
+        return _ephem_next_twilight(date_of_observation, rising)
+    return event
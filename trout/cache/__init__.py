@@ -0,0 +1,345 @@
+import hashlib
+import os
+import threading
+from collections import namedtuple
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Iterable, Sequence, Union
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+from dotenv import load_dotenv
+from platformdirs import user_cache_dir
+
+from trout import __version__
+from trout.cache.memory import memory_cache
+
+load_dotenv()
+CACHE_DIR = os.getenv("TROUT_CACHE_DIR") or user_cache_dir("trout")
+# Maximum size of the sidecar files kept in the cache folder, least recently
+# used sidecars are deleted once it's exceeded
+CACHE_SIZE_LIMIT = int(float(os.getenv("TROUT_CACHE_SIZE_LIMIT_GB") or 10) * 1024**3)
+
+_SIDECARS_FOLDER = "sidecars"
+
+# Format version of each kind of sidecar, part of the sidecars' keys. Bump the
+# version of a kind whenever the data derived for it changes (e.g. a column
+# added to the sky background) so that sidecars stored before are not used.
+# Kinds not listed have version 0
+SIDECAR_VERSIONS = {
+    "sky_bg": 2,  # Moon distance recomputed, twilight and angle status columns
+    "alignment_stats": 1,
+    "color_normalized": 1,
+    "logfile_combined": 1,
+    "flux_log_combined": 1,
+    "flux_cube": 2,  # Columns taken from the FluxLogCombined layout
+    "aligned_combined_stack": 1,
+    "star_stamps": 1,
+    "logfile_cube": 1,
+    "image_quality": 1,
+    "manifest": 1,
+}
+
+_sidecars_lock = threading.Lock()
+# Approximate bytes held in the sidecars folder of each cache folder, counted
+# once and then updated as sidecars are stored
+_sidecars_size: Dict[str, int] = {}
+
+
+def get_cache_dir() -> Path:
+    """
+    Returns the folder where trout stores files derived from our data (e.g.
+    precomputed tables) so that they don't have to be recomputed. The folder
+    can be configured with the `TROUT_CACHE_DIR` environment variable or
+    `set_cache_dir`.
+    """
+    path = Path(CACHE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def set_cache_dir(path: Union[str, Path]) -> None:
+    """
+    Sets the folder where trout stores its cached files
+    """
+    global CACHE_DIR
+    CACHE_DIR = str(path)
+
+
+def set_cache_size_limit(size_bytes: int) -> None:
+    """
+    Sets the maximum size of the sidecar files kept in the cache folder and
+    evicts sidecars if they're over the new limit
+    """
+    global CACHE_SIZE_LIMIT
+    CACHE_SIZE_LIMIT = size_bytes
+    evict()
+
+
+def cached_payload(key: Hashable, load: Callable[[], object]):
+    """
+    Returns the parsed data identified by `key` (e.g. ("sky_bg", night path))
+    kept in memory, calling `load()` to get it when it isn't kept.
+
+    Data is kept within the memory budget, `TROUT_MEMORY_BUDGET_GB`
+    gigabytes (4 by default) or as set with `set_memory_budget`, and the
+    least recently used data is dropped first. Objects such as `Night` should
+    hold the key rather than the data so that dropped data can be freed.
+    """
+    return memory_cache.get(key, load)
+
+
+def set_memory_budget(size_bytes: int) -> None:
+    """
+    Sets the approximate bytes of parsed data kept in memory, see
+    `cached_payload`
+    """
+    memory_cache.set_budget(size_bytes)
+
+
+def clear_memory() -> None:
+    """
+    Drops all parsed data kept in memory
+    """
+    memory_cache.clear()
+
+
+CacheStats = namedtuple("CacheStats", ["memory", "disk_size", "disk_limit"])
+
+
+def stats() -> CacheStats:
+    """
+    Returns the usage of the caches: `memory` (a `MemoryStats` of the
+    budget and bytes of parsed data kept in memory, number of payloads, hits,
+    misses and evictions) and the bytes of sidecar files in the cache folder
+    with their limit
+    """
+    folder = str(get_cache_dir() / _SIDECARS_FOLDER)
+    with _sidecars_lock:
+        disk_size = _sidecars_size.get(folder)
+    if disk_size is None:
+        disk_size = evict()
+    return CacheStats(memory_cache.stats(), disk_size, CACHE_SIZE_LIMIT)
+
+
+def temporary_path(path: Path) -> Path:
+    """
+    Returns a unique temporary path next to `path`. Write to it and then
+    `os.replace` it onto `path` so that readers never see a partially written
+    file.
+    """
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def file_key(source: Path) -> tuple:
+    """
+    Returns the (absolute path, modification time, size) of the `source` file
+    (or folder), which changes whenever the file is rewritten
+    """
+    stat = os.stat(source)
+    return os.path.abspath(source), stat.st_mtime_ns, stat.st_size
+
+
+def sidecar_path(source: Path, kind: str, suffix: str) -> Path:
+    """
+    Returns the path in the cache folder where data of `kind` derived from the
+    `source` file (or folder) is stored. The path depends on the source's
+    location, modification time and size as well as the trout version and
+    the format version of `kind`, so a changed source file or derivation never
+    reads stale data.
+    """
+    return keyed_sidecar_path(file_key(source), kind, suffix)
+
+
+def keyed_sidecar_path(key: Iterable, kind: str, suffix: str) -> Path:
+    """
+    Returns the path in the cache folder where data of `kind` identified by
+    the values in `key` is stored, for data derived from several files. The
+    key should include whatever changes when the data needs to be recomputed
+    (e.g. modification times of the files), the trout version and the format
+    version of `kind` (see `SIDECAR_VERSIONS`) are added to it.
+    """
+    key = "|".join(map(str, (*key, __version__, SIDECAR_VERSIONS.get(kind, 0))))
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    return get_cache_dir() / _SIDECARS_FOLDER / kind / f"{digest}{suffix}"
+
+
+def _sidecar_files(folder: Path):
+    """
+    Yields (path, size, mtime) of every sidecar file under `folder`
+    """
+    try:
+        entries = list(os.scandir(folder))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from _sidecar_files(Path(entry.path))
+        elif not entry.name.startswith("."):
+            stat = entry.stat()
+            yield Path(entry.path), stat.st_size, stat.st_mtime_ns
+
+
+def evict() -> int:
+    """
+    Deletes the least recently used sidecars until they take at most 90% of
+    `CACHE_SIZE_LIMIT` if they're over the limit.
+    Returns the bytes held by the remaining sidecars
+    """
+    folder = get_cache_dir() / _SIDECARS_FOLDER
+    with _sidecars_lock:
+        files = sorted(_sidecar_files(folder), key=lambda f: f[2])
+        total = sum(size for _, size, _ in files)
+        if total > CACHE_SIZE_LIMIT:
+            for path, size, _ in files:
+                if total <= 0.9 * CACHE_SIZE_LIMIT:
+                    break
+                try:
+                    path.unlink()
+                    total -= size
+                except FileNotFoundError:
+                    pass
+        _sidecars_size[str(folder)] = total
+        return total
+
+
+def _record_stored(size: int) -> None:
+    folder = str(get_cache_dir() / _SIDECARS_FOLDER)
+    with _sidecars_lock:
+        known = _sidecars_size.get(folder)
+        if known is not None:
+            _sidecars_size[folder] = known + size
+    if known is None or known + size > CACHE_SIZE_LIMIT:
+        evict()
+
+
+def store_sidecar(path: Path, write: Callable[[Path], None]) -> None:
+    """
+    Stores a sidecar file at `path` (see `sidecar_path`) by calling
+    `write(tmp_path)` and then moving the written file into place, evicting
+    least recently used sidecars if the cache grows over its size limit
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = temporary_path(path)
+    write(tmp_path)
+    os.replace(tmp_path, path)
+    _record_stored(path.stat().st_size)
+
+
+def touch_sidecar(path: Path) -> None:
+    """
+    Marks the sidecar at `path` as recently used so it's evicted last
+    """
+    # The modification time of a sidecar records when it was last used
+    os.utime(path)
+
+
+def cached_sidecars(
+    key: Iterable,
+    kind: str,
+    suffixes: Sequence[str],
+    load: Callable[..., object],
+    build: Callable[[], object],
+    write: Sequence[Callable[[object, Path], None]],
+    reload: bool = False,
+    keep: Union[Callable[[object], bool], None] = None,
+):
+    """
+    Returns the data of `kind` identified by `key` (see `keyed_sidecar_path`)
+    stored in the cache folder as one sidecar file per suffix in `suffixes`,
+    read with `load(*paths)`. When a sidecar is missing or can't be read, the
+    data is built with `build()` and the ith sidecar stored with
+    `write[i](data, tmp_path)`.
+
+    param: reload: whether to return built data as `load` reads it from the
+        stored sidecars (e.g. memory mapped) rather than as built
+    param: keep: whether built data is stored, by default it always is
+    """
+    paths = [keyed_sidecar_path(key, kind, suffix) for suffix in suffixes]
+    if all(path.exists() for path in paths):
+        try:
+            data = load(*paths)
+            for path in paths:
+                touch_sidecar(path)
+            return data
+        except Exception:
+            # Partly evicted or unreadable sidecars are built again below
+            pass
+    data = build()
+    if keep is not None and not keep(data):
+        return data
+    for path, write_sidecar in zip(paths, write):
+        store_sidecar(path, lambda tmp_path: write_sidecar(data, tmp_path))
+    return load(*paths) if reload else data
+
+
+def _cached(
+    source: Path,
+    kind: str,
+    suffix: str,
+    read: Callable[[Path], object],
+    load: Callable[[Path], object],
+    save: Callable[[object, Path], None],
+    key: Union[tuple, None] = None,
+):
+    """
+    Returns `read(source)`, reusing the copy kept in memory (see
+    `cached_payload`) or saved in a binary sidecar file when the source file
+    hasn't changed since it was read. `key` is the source's `file_key` when
+    already known
+    """
+    key = key or file_key(source)
+    return cached_payload(
+        (kind, *key),
+        lambda: cached_sidecars(key, kind, (suffix,), load, lambda: read(source), (save,)),
+    )
+
+
+def cached_frame(
+    source: Path, kind: str, read: Callable[[Path], pd.DataFrame]
+) -> pd.DataFrame:
+    """
+    Returns the dataframe `read(source)`, reusing the copy kept in memory or
+    stored in a binary (pickle) sidecar file when the source file hasn't
+    changed since it was read. Don't modify the returned dataframe, copy it.
+    """
+    return _cached(
+        source, kind, ".pkl", read, pd.read_pickle, lambda df, p: df.to_pickle(p)
+    )
+
+
+def _load_arrays(path: Path) -> Dict[str, npt.NDArray]:
+    with np.load(path) as arrays:
+        return {name: arrays[name] for name in arrays.files}
+
+
+def save_array(array: npt.NDArray, path: Path) -> None:
+    """
+    Saves `array` in the .npy format at `path`, which unlike `numpy.save`
+    doesn't need to end in .npy (e.g. a temporary sidecar path)
+    """
+    with path.open("wb") as fd:
+        np.save(fd, array)
+
+
+def save_arrays(arrays: Dict[str, npt.NDArray], path: Path) -> None:
+    """
+    Saves the named `arrays` in the .npz format at `path`, see `save_array`
+    """
+    with path.open("wb") as fd:
+        np.savez(fd, **arrays)
+
+
+def cached_arrays(
+    source: Path,
+    kind: str,
+    read: Callable[[Path], Dict[str, npt.NDArray]],
+    key: Union[tuple, None] = None,
+) -> Dict[str, npt.NDArray]:
+    """
+    Returns the dictionary of named numpy arrays `read(source)`, reusing the
+    copy kept in memory or stored in a binary (npz) sidecar file when the
+    source file hasn't changed since it was read. `key` is the source's
+    `file_key` when already known, so that the file isn't stat'ed again
+    """
+    return _cached(source, kind, ".npz", read, _load_arrays, save_arrays, key)
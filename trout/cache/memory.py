@@ -0,0 +1,119 @@
+import mmap
+import os
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Callable, Hashable
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+# Approximate bytes of parsed data (dataframes, arrays) kept in memory by the
+# Night, Year and file objects, least recently used data is dropped (and read
+# again when needed) once it's exceeded
+MEMORY_BUDGET = int(float(os.getenv("TROUT_MEMORY_BUDGET_GB") or 4) * 1024**3)
+
+MemoryStats = namedtuple(
+    "MemoryStats", ["budget", "size", "payloads", "hits", "misses", "evictions"]
+)
+
+
+def _is_memory_mapped(arr: np.ndarray) -> bool:
+    base = arr
+    while base is not None:
+        if isinstance(base, (np.memmap, mmap.mmap)):
+            return True
+        base = getattr(base, "base", None)
+    return False
+
+
+def payload_size(value) -> int:
+    """
+    Returns the approximate bytes of memory held by `value`. Memory mapped
+    arrays count as empty since the operating system pages them in and out
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, np.ndarray):
+        return 0 if _is_memory_mapped(value) else value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(payload_size(v) for v in value)
+    if isinstance(value, dict):
+        return sum(payload_size(v) for v in value.values())
+    if hasattr(value, "__dict__"):
+        return sum(payload_size(v) for v in vars(value).values())
+    return sys.getsizeof(value)
+
+
+class MemoryCache:
+    """
+    Keeps payloads (parsed data) by key within a budget of bytes, dropping the
+    least recently used payloads first
+    """
+
+    def __init__(self, budget: int) -> None:
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._payloads = OrderedDict()  # key to (value, size)
+        self._size = 0
+        self._hits = self._misses = self._evictions = 0
+
+    def get(self, key: Hashable, load: Callable[[], object]):
+        """
+        Returns the payload of `key`, calling `load()` to get it if it isn't
+        kept
+        """
+        with self._lock:
+            if key in self._payloads:
+                self._payloads.move_to_end(key)
+                self._hits += 1
+                return self._payloads[key][0]
+            self._misses += 1
+        value = load()
+        size = payload_size(value)
+        with self._lock:
+            if key in self._payloads:
+                self._size -= self._payloads.pop(key)[1]
+            self._payloads[key] = (value, size)
+            self._size += size
+            self._evict(self.budget)
+        return value
+
+    def _evict(self, budget: int) -> None:
+        # Keeps the most recent payload even if it's over the budget on its own
+        while self._size > budget and len(self._payloads) > 1:
+            _, (_, size) = self._payloads.popitem(last=False)
+            self._size -= size
+            self._evictions += 1
+
+    def set_budget(self, budget: int) -> None:
+        with self._lock:
+            self.budget = budget
+            self._evict(budget)
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._payloads:
+                self._size -= self._payloads.pop(key)[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._payloads.clear()
+            self._size = 0
+
+    def stats(self) -> MemoryStats:
+        with self._lock:
+            return MemoryStats(
+                self.budget,
+                self._size,
+                len(self._payloads),
+                self._hits,
+                self._misses,
+                self._evictions,
+            )
+
+
+memory_cache = MemoryCache(MEMORY_BUDGET)
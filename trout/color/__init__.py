@@ -1,9 +1,38 @@
+from functools import cache
+
+import numpy as np
+import numpy.typing as npt
+
 from trout.database import query
 
 
+@cache
+def get_colors() -> npt.NDArray:
+    """
+    Returns the (read only) array of star colors indexed by star number, i.e.
+    `get_colors()[200]` is the color of star 200. Stars without color data have
+    NaN as their color.
+
+    Note that the color table is queried only once and the result is cached.
+    """
+    result = query("SELECT star, color FROM color")
+    stars = np.array([star for star, _ in result], dtype=int)
+    values = np.array(
+        [np.nan if color is None else float(color) for _, color in result]
+    )
+    size = stars.max() + 1 if len(stars) else 0
+    colors = np.full(size, np.nan)
+    colors[stars] = values
+    # Stars with multiple rows in the color table are treated as having no
+    # color data
+    colors[np.bincount(stars, minlength=size) > 1] = np.nan
+    colors.flags.writeable = False
+    return colors
+
+
 def get_color(star_number: int):
-    result = query(f"SELECT color FROM color WHERE star={star_number}")
-    if len(result) == 1 and len(result[0]) == 1:
-        return result[0][0]
+    colors = get_colors()
+    if 0 <= star_number < len(colors) and not np.isnan(colors[star_number]):
+        return float(colors[star_number])
     else:
         return None
@@ -1,11 +1,61 @@
-import math
+import numpy as np
+
+# Zero point and slope of the 4px flux to magnitude relation
+# mag = _ZERO_POINT_4PX - _SLOPE_4PX * log10(flux)
+_ZERO_POINT_4PX = 24.176
+_SLOPE_4PX = 2.6148
+
+
+def _scalar_or_array(result, *inputs):
+    """
+    Returns `result` as a python float if all `inputs` were scalars
+    """
+    if all(np.ndim(i) == 0 for i in inputs):
+        return float(result)
+    return result
 
 
 def flux_to_magnitude_4px(flux):
-    """Converts 4px star flux data to magnitude"""
-    return 24.176 - (2.6148 * math.log10(flux))
+    """
+    Converts 4px star flux data to magnitude.
+    Accepts a scalar or an array, zero or negative flux converts to NaN
+    """
+    flux = np.asarray(flux, dtype="float")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mag = np.where(flux > 0, _ZERO_POINT_4PX - _SLOPE_4PX * np.log10(flux), np.nan)
+    return _scalar_or_array(mag, flux)
 
 
 def mag_4px_to_flux(mag):
-    """Converts 4px magnitude to flux value"""
-    return 10 ** ((-(-24.176 + mag)) / 2.6148)
+    """
+    Converts 4px magnitude to flux value.
+    Accepts a scalar or an array
+    """
+    mag = np.asarray(mag, dtype="float")
+    flux = 10 ** ((-(-_ZERO_POINT_4PX + mag)) / _SLOPE_4PX)
+    return _scalar_or_array(flux, mag)
+
+
+def flux_error_to_magnitude_error_4px(flux, flux_error):
+    """
+    Propagates the error in 4px flux to the error in magnitude.
+    Accepts scalars or arrays, zero or negative flux converts to NaN
+    """
+    flux = np.asarray(flux, dtype="float")
+    flux_error = np.asarray(flux_error, dtype="float")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mag_error = np.where(
+            flux > 0, _SLOPE_4PX / np.log(10) * np.abs(flux_error / flux), np.nan
+        )
+    return _scalar_or_array(mag_error, flux, flux_error)
+
+
+def mag_error_to_flux_error_4px(mag, mag_error):
+    """
+    Propagates the error in 4px magnitude to the error in flux.
+    Accepts scalars or arrays
+    """
+    mag = np.asarray(mag, dtype="float")
+    mag_error = np.asarray(mag_error, dtype="float")
+    flux_error = mag_4px_to_flux(mag) * np.log(10) / _SLOPE_4PX * np.abs(mag_error)
+    return _scalar_or_array(flux_error, mag, mag_error)
@@ -12,3 +12,15 @@ class UnknownStarBandException(Exception):
 
 class StarNotPresentInReferenceException(Exception):
     pass
+
+
+class NightLoadError(Exception):
+    """
+    Raised when data of a night couldn't be loaded, `errors` maps the name of
+    each item that failed to the exception raised
+    """
+
+    def __init__(self, night, errors):
+        super().__init__(f"Couldn't load {', '.join(errors)} of {night}")
+        self.night = night
+        self.errors = errors
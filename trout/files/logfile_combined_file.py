@@ -2,10 +2,103 @@ import re
 from collections import namedtuple
 from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, Union
+from typing import Dict, List, Union
 
 import numpy as np
 import numpy.typing as npt
+import pandas as pd
+
+from trout.cache import cached_arrays, cached_payload, file_key
+from trout.files.text_table import read_numeric_rows, read_titles
+
+
+class LogFileCombinedColumns:
+    """
+    Columnar contents of a Log File Combined file, parsed once.
+
+    `values` holds every number in the file as a 2 dimensional float array
+    whose row i is star i + 1, `titles` the column titles and
+    `radius_columns` maps each extraction radius to the index of its
+    `Star ADU <radius>` column. All accessors return views into `values`.
+    """
+
+    titles_row = 8  # Zero based line number of the column titles
+    x_column = 0
+    y_column = 1
+    avg_fwhm_column = 4
+    sky_adu_column = 5
+    first_radii_adu_column = 6
+    star_adu_radius_re = re.compile(r"Star ADU (\d+)")
+
+    @classmethod
+    def read(cls, path: Path) -> "LogFileCombinedColumns":
+        """
+        Parses the Log File Combined at `path`
+        """
+        titles = read_titles(path, cls.titles_row)
+        values = read_numeric_rows(path, skiprows=cls.titles_row + 1)
+        return cls(titles, values)
+
+    @classmethod
+    def read_cached(cls, path: Path, key: Union[tuple, None] = None) -> "LogFileCombinedColumns":
+        """
+        Parses the Log File Combined at `path`, reusing the arrays stored in
+        the cache folder when the file hasn't changed since it was last parsed.
+        `key` is the file's `trout.cache.file_key` when already known
+        """
+        arrays = cached_arrays(path, "logfile_combined", cls._read_arrays, key)
+        return cls(list(arrays["titles"]), arrays["values"])
+
+    @classmethod
+    def _read_arrays(cls, path: Path) -> Dict[str, npt.NDArray]:
+        columns = cls.read(path)
+        return {"titles": np.array(columns.titles), "values": columns.values}
+
+    def __init__(self, titles: List[str], values: npt.NDArray) -> None:
+        self.titles = tuple(titles)
+        self.values = values
+        self.radius_columns = {}
+        for index, title in enumerate(self.titles):
+            if match := self.star_adu_radius_re.match(title):
+                self.radius_columns[int(match[1])] = index
+
+    def adu(self, radius: int) -> npt.NDArray:
+        """
+        Returns the ADU of all stars for the extraction `radius`
+        """
+        if radius not in self.radius_columns:
+            raise ValueError(f"No Star ADU column for radius {radius}")
+        return self.values[:, self.radius_columns[radius]]
+
+    def sky_adu(self) -> npt.NDArray:
+        return self.values[:, self.sky_adu_column]
+
+    def avg_fwhm(self) -> npt.NDArray:
+        return self.values[:, self.avg_fwhm_column]
+
+    def x(self) -> npt.NDArray:
+        return self.values[:, self.x_column]
+
+    def y(self) -> npt.NDArray:
+        return self.values[:, self.y_column]
+
+    def star_row(self, star_no: int) -> npt.NDArray:
+        """
+        Returns all values of `star_no`
+        """
+        return self.values[star_no - 1]
+
+    def frame(self) -> pd.DataFrame:
+        """
+        Returns the values as a dataframe indexed by star number, without
+        copying them
+        """
+        df = pd.DataFrame(self.values, columns=list(self.titles), copy=False)
+        df.index = pd.RangeIndex(1, len(self.values) + 1, name="Star_no")
+        return df
+
+    def __len__(self):
+        return len(self.values)
 
 
 # Note that LogFileCombined is the one that that has the data for aligned combined
@@ -40,38 +133,41 @@ class LogFileCombinedFile:
             f"{night_date.strftime(cls.date_format)}_m23_{img_duration}-{img_no:03}.txt"
         )
 
-    def __init__(self, file_path: str) -> None:
+    def __init__(self, file_path: str, use_cache=False) -> None:
+        """
+        param: file_path: path of the Log File Combined
+        param: use_cache: whether to reuse the parsed data stored in the cache
+            folder (see `trout.cache`) instead of parsing the text file
+        """
         self.__path = Path(file_path)
-        self.__is_read = False
-        self.__data = None
-        self.__title_row = None
-
-    def _read(self):
-        with self.__path.open() as fd:
-            lines = [line.strip() for line in fd.readlines()]
-            # Save the title row
-            # We split the title row by gap of more than two spaces
-            self.__title_row = re.split(
-                r"\s{2,}", lines[self.data_titles_row_zero_index]
-            )
-            lines = lines[self.header_rows:]  # Skip headers - 1
-            # Create a 2d list
-            lines = [line.split() for line in lines]
-            # Convert to 2d numpy array
-            self.__data = np.array(lines, dtype="float")
-        self.__is_read = True
+        self.__use_cache = use_cache
+        self.__key = None
+
+    def _read(self) -> LogFileCombinedColumns:
+        return LogFileCombinedColumns.read(self.__path)
+
+    def columns(self) -> LogFileCombinedColumns:
+        """
+        Returns the parsed columnar contents of the file, kept in memory
+        within the memory budget of `trout.cache`. The file is stat'ed the
+        first time only, so accessors used star by star don't stat it again
+        """
+        if self.__key is None:
+            self.__key = file_key(self.__path)
+        if self.__use_cache:
+            return LogFileCombinedColumns.read_cached(self.__path, self.__key)
+        return cached_payload(("logfile_combined_columns", *self.__key), self._read)
 
     def _title_row(self):
-        if not self.__is_read:
-            self._read()
-        return self.__title_row
+        return list(self.columns().titles)
 
     def _adu_radius_header_name(self, radius: int):
         return f"Star ADU {radius}"
 
     def _get_column_number_for_adu_radius(self, radius: int):
-        titles = self._title_row()
-        return titles.index(self._adu_radius_header_name(radius))
+        if radius not in self.columns().radius_columns:
+            raise ValueError(f"{self._adu_radius_header_name(radius)} not in {self}")
+        return self.columns().radius_columns[radius]
 
     def is_valid_file_name(self) -> bool:
         """
@@ -96,8 +192,7 @@ class LogFileCombinedFile:
         The first row of the array is the adu of star 1, 200th row for star 200,
         and the like
         """
-        radius_col = self._get_column_number_for_adu_radius(radius)
-        return self.data()[:, radius_col]
+        return self.data()[:, self._get_column_number_for_adu_radius(radius)]
 
     def get_sky_adu_column(self):
         """
@@ -105,7 +200,7 @@ class LogFileCombinedFile:
         The first row of the array is the sky adu of star 1, 200th row for star 200,
         and the like
         """
-        return self.data()[:, self.sky_adu_column]
+        return self.columns().sky_adu()
 
     def get_x_position_column(self):
         """
@@ -113,7 +208,7 @@ class LogFileCombinedFile:
         The first row of the array is the x position of star 1, 200th row for star 200,
         and the like
         """
-        return self.data()[:, self.x_column]
+        return self.columns().x()
 
     def get_y_position_column(self) -> npt.NDArray:
         """
@@ -121,22 +216,20 @@ class LogFileCombinedFile:
         The first row of the array is the y position of star 1, 200th row for star 200,
         and the like
         """
-        return self.data()[:, self.y_column]
+        return self.columns().y()
 
     def get_star_data(self, star_no: int) -> StarLogfileCombinedData:
         """
         Returns the details related to a particular `star_no`
         Returns a named tuple `StarLogfileCombinedData`
         """
-        star_data = self.data()[star_no - 1]
-        titles = self._title_row()
-        first_radii_adu_column = 6
-        radii_adu = {}
-        for index, col_name in enumerate(titles[first_radii_adu_column:]):
-            radius = int(self.star_adu_radius_re.match(col_name)[1])
-            radii_adu[radius] = star_data[first_radii_adu_column + index]
+        columns = self.columns()
+        star_data = columns.star_row(star_no)
+        radii_adu = {
+            radius: star_data[index] for radius, index in columns.radius_columns.items()
+        }
         return self.StarLogfileCombinedData(
-            *star_data[:first_radii_adu_column], radii_adu
+            *star_data[: columns.first_radii_adu_column], radii_adu
         )
 
     def img_duration(self) -> Union[float, None]:
@@ -165,9 +258,7 @@ class LogFileCombinedFile:
         return self.__path
 
     def data(self):
-        if not self.__is_read:
-            self._read()
-        return self.__data
+        return self.columns().values
 
     def __len__(self):
         """Returns the number of stars present in the dataset"""
@@ -7,6 +7,7 @@ import numpy.typing as npt
 import pkg_resources
 
 from trout.files import line_str_contains_numbers_and_non_alphabets
+from trout.files.spatial_index import StarSpatialIndex
 
 
 class ReferenceLogFile:
@@ -22,6 +23,7 @@ class ReferenceLogFile:
     }
 
     ref_revised_71 = None
+    ref_with_new_stars = None
 
     @classmethod
     def get_ref_revised_71(cls):
@@ -42,17 +44,18 @@ class ReferenceLogFile:
         Returns the ReferenceLogFile with new stars
         file
         """
-        if not cls.ref_revised_71:
+        if not cls.ref_with_new_stars:
             file_path = pkg_resources.resource_filename(
                 "trout", "data/ref_with_new_stars.txt"
             )
-            cls.ref_revised_71 = ReferenceLogFile(file_path)
-        return cls.ref_revised_71
+            cls.ref_with_new_stars = ReferenceLogFile(file_path)
+        return cls.ref_with_new_stars
 
     def __init__(self, file_path: str) -> None:
         self.__path = Path(file_path)
         self.__is_read = False
         self.__data = None
+        self.__spatial_index = None
 
     def _read(self):
         with self.__path.open() as fd:
@@ -103,6 +106,17 @@ class ReferenceLogFile:
         """
         return self._get_col_value(star_no, "x"), self._get_col_value(star_no, "y")
 
+    def spatial_index(self) -> StarSpatialIndex:
+        """
+        Returns the spatial index over the star positions of this file. The
+        index is built once and reused for all neighbor queries.
+        """
+        if self.__spatial_index is None:
+            self.__spatial_index = StarSpatialIndex(
+                self.get_x_position_column(), self.get_y_position_column()
+            )
+        return self.__spatial_index
+
     def get_star_fwhm(self, star_no: int) -> float:
         """
         Returns the fwhm for a given star
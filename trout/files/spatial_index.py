@@ -0,0 +1,130 @@
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+
+class StarSpatialIndex:
+    """
+    Uniform grid index over star positions of a reference file.
+
+    Stars are bucketed into square cells of `cell_size` pixels so that radius
+    and k-nearest queries only look at the stars in the cells around the
+    query point instead of the entire field. Indices returned by the queries
+    are zero based, i.e. index 0 is star 1.
+    """
+
+    def __init__(self, x: npt.NDArray, y: npt.NDArray, cell_size: float = 16.0):
+        self._xy = np.column_stack([x, y]).astype("float")
+        self._cell_size = float(cell_size)
+        self._origin = self._xy.min(axis=0)
+        cells = np.floor((self._xy - self._origin) / self._cell_size).astype(int)
+        self._shape = cells.max(axis=0) + 1
+        cell_ids = cells[:, 0] * self._shape[1] + cells[:, 1]
+        # Star indices sorted by cell, `_cell_start[c]` is the position in
+        # `_order` at which the stars of cell `c` start
+        self._order = np.argsort(cell_ids, kind="stable")
+        self._cell_start = np.searchsorted(
+            cell_ids[self._order], np.arange(self._shape[0] * self._shape[1] + 1)
+        )
+        self._corner = self._xy.max(axis=0)
+
+    @property
+    def xy(self) -> npt.NDArray:
+        """
+        Returns the (n, 2) array of star positions the index was built from
+        """
+        return self._xy
+
+    def __len__(self):
+        return len(self._xy)
+
+    def _candidates(self, point: Tuple[float, float], radius: float) -> npt.NDArray:
+        """
+        Returns indices of the stars in the cells overlapping the square of
+        side 2 * `radius` around `point`
+        """
+        low = np.floor((np.asarray(point) - radius - self._origin) / self._cell_size)
+        high = np.floor((np.asarray(point) + radius - self._origin) / self._cell_size)
+        # Points outside of the grid are clamped to the border cells, the
+        # exact distance check done by the callers discards the extra stars
+        low = np.clip(low, 0, self._shape - 1).astype(int)
+        high = np.clip(high, 0, self._shape - 1).astype(int)
+        # Cells of one grid column are contiguous in `_order`
+        runs = []
+        for cx in range(low[0], high[0] + 1):
+            first = cx * self._shape[1]
+            start = self._cell_start[first + low[1]]
+            end = self._cell_start[first + high[1] + 1]
+            runs.append(self._order[start:end])
+        return np.concatenate(runs)
+
+    def distances(self, point: Tuple[float, float]) -> npt.NDArray:
+        """
+        Returns the distance from `point` to every star in the index
+        """
+        dx, dy = (self._xy - np.asarray(point, dtype="float")).T
+        return np.sqrt(dx * dx + dy * dy)
+
+    def query_radius(
+        self, point: Tuple[float, float], radius: float
+    ) -> Tuple[npt.NDArray, npt.NDArray]:
+        """
+        Returns the tuple of (indices, distances) of the stars within `radius`
+        (inclusive) of `point`, ordered by distance and then by index
+        """
+        candidates = self._candidates(point, radius)
+        dx, dy = (self._xy[candidates] - np.asarray(point, dtype="float")).T
+        distances = np.sqrt(dx * dx + dy * dy)
+        within = distances <= radius
+        candidates, distances = candidates[within], distances[within]
+        order = np.lexsort((candidates, distances))
+        return candidates[order], distances[order]
+
+    def query_nearest(
+        self, point: Tuple[float, float], k: int
+    ) -> Tuple[npt.NDArray, npt.NDArray]:
+        """
+        Returns the tuple of (indices, distances) of the `k` stars closest to
+        `point`, ordered by distance and then by index
+        """
+        k = min(k, len(self))
+        point = np.asarray(point, dtype="float")
+        # Distance from `point` to the farthest corner of the stars' bounding
+        # box, which the radius covers all stars at
+        farthest = float(
+            np.hypot(*np.maximum(np.abs(point - self._origin), np.abs(point - self._corner)))
+        )
+        radius = self._cell_size
+        while True:
+            indices, distances = self.query_radius(point, radius)
+            # Once at least k stars are within the radius, the k nearest
+            # stars overall are guaranteed to be among them
+            if len(indices) >= k or radius >= farthest:
+                return indices[:k], distances[:k]
+            radius *= 2
+
+    def pairs_within(self, radius: float) -> Tuple[npt.NDArray, npt.NDArray, npt.NDArray]:
+        """
+        Returns the tuple of (first, second, distances) for every pair of
+        stars within `radius` (inclusive) of each other, with `first < second`
+
+        All pairs are found in one vectorized sweep over the stars sorted by
+        their x position.
+        """
+        by_x = np.argsort(self._xy[:, 0], kind="stable")
+        xs = self._xy[by_x, 0]
+        # For the star at sorted position i, the stars at sorted positions
+        # i + 1 .. end[i] - 1 are within `radius` along x
+        start = np.arange(len(xs)) + 1
+        end = np.searchsorted(xs, xs + radius, side="right")
+        counts = np.maximum(end - start, 0)
+        left = np.repeat(np.arange(len(xs)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        right = left + 1 + offsets
+        first, second = by_x[left], by_x[right]
+        dx, dy = (self._xy[first] - self._xy[second]).T
+        distances = np.sqrt(dx * dx + dy * dy)
+        within = distances <= radius
+        first, second, distances = first[within], second[within], distances[within]
+        return np.minimum(first, second), np.maximum(first, second), distances
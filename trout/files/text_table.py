@@ -0,0 +1,64 @@
+import re
+from itertools import islice
+from pathlib import Path
+from typing import List, Union
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+# Column titles of m23 text tables are separated by two or more spaces since
+# the titles themselves contain single spaces (e.g. "Star ADU 4")
+_TITLE_SEPARATOR = re.compile(r"\s{2,}")
+
+
+def read_titles(path: Path, titles_row: int) -> List[str]:
+    """
+    Returns the column titles on the (zero based) line `titles_row` of the file
+    """
+    with Path(path).open() as fd:
+        line = next(islice(fd, titles_row, None))
+    return _TITLE_SEPARATOR.split(line.strip())
+
+
+def read_titled_table(
+    path: Path, titles_row: int, index_col: Union[int, None] = None
+) -> pd.DataFrame:
+    """
+    Reads an m23 text table (e.g. Log Files Combined, Color Normalized) whose
+    column titles are on the (zero based) line `titles_row` followed by rows
+    of whitespace separated values.
+
+    The titles are parsed first and the rows are then read with pandas' C
+    parser splitting on any whitespace, which is much faster than splitting on
+    a regular expression with the python parser. Files whose rows don't split
+    into one value per title are read with the python parser like before.
+    """
+    titles = read_titles(path, titles_row)
+    try:
+        df = pd.read_csv(path, skiprows=titles_row + 1, header=None, sep=r"\s+")
+    except (pd.errors.ParserError, pd.errors.EmptyDataError):
+        df = None
+    if df is None or len(df.columns) != len(titles):
+        return pd.read_csv(
+            path,
+            skiprows=titles_row,
+            delimiter=_TITLE_SEPARATOR.pattern,
+            engine="python",
+            index_col=index_col,
+        )
+    df.columns = titles
+    if index_col is not None:
+        df = df.set_index(titles[index_col])
+    return df
+
+
+def read_numeric_rows(path: Path, skiprows: int) -> npt.NDArray:
+    """
+    Returns the rows of whitespace separated numbers after the first `skiprows`
+    lines of the file as a 2 dimensional float array, read with pandas' C
+    parser
+    """
+    return pd.read_csv(
+        path, skiprows=skiprows, header=None, sep=r"\s+", dtype=np.float64
+    ).to_numpy()
@@ -1,6 +1,9 @@
 from functools import cache
 
-from trout.color import get_color
+import numpy as np
+import numpy.typing as npt
+
+from trout.color import get_color, get_colors
 from trout.exceptions import UnknownStarBandException
 from trout.stars.utils import STAR_END, STAR_START
 
@@ -13,6 +16,22 @@ class InternightBands:
     BRIGHTNESS_BAND = "BRIGHTNESS_BAND"
 
 
+# Order of the bands used for the band codes returned by `star_band_codes`
+BAND_NAMES = (
+    InternightBands.COLOR_BAND_1,
+    InternightBands.COLOR_BAND_2,
+    InternightBands.COLOR_BAND_3,
+    InternightBands.SPECIAL_STARS,
+    InternightBands.BRIGHTNESS_BAND,
+)
+
+# Color bands as (band, color lower bound (exclusive), color upper bound (inclusive))
+_COLOR_BANDS = (
+    (InternightBands.COLOR_BAND_1, 0.135, 0.455),
+    (InternightBands.COLOR_BAND_2, 0.455, 1.063),
+    (InternightBands.COLOR_BAND_3, 1.063, 7),
+)
+
 _SPECIAL_STARS = [
     814,
     1223,
@@ -30,16 +49,21 @@ def _is_special_band_star(star: int) -> bool:
     return star in _SPECIAL_STARS
 
 
+def _is_in_color_band(band_index: int, star: int, c: float) -> bool:
+    _, lower, upper = _COLOR_BANDS[band_index]
+    return c > lower and c <= upper and not _is_special_band_star(star)
+
+
 def _is_color_band_1(star: int, c: float) -> bool:
-    return c > 0.135 and c <= 0.455 and not _is_special_band_star(star)
+    return _is_in_color_band(0, star, c)
 
 
 def _is_color_band_2(star: int, c: float) -> bool:
-    return c > 0.455 and c <= 1.063 and not _is_special_band_star(star)
+    return _is_in_color_band(1, star, c)
 
 
 def _is_color_band_3(star: int, c: float) -> bool:
-    return c > 1.063 and c <= 7 and not _is_special_band_star(star)
+    return _is_in_color_band(2, star, c)
 
 
 def _is_brightness_band(star: int, c: float) -> bool:
@@ -51,30 +75,47 @@ def _is_brightness_band(star: int, c: float) -> bool:
     )
 
 
+@cache
+def star_band_codes() -> npt.NDArray:
+    """
+    Returns the (read only) array of internight normalization band codes
+    indexed by star number, i.e. `BAND_NAMES[star_band_codes()[200]]` is the
+    band of star 200. Index 0 doesn't correspond to any star.
+
+    The bands are computed for all stars at once from the bulk loaded colors.
+    """
+    stars = np.arange(STAR_END + 1)
+    colors = np.full(len(stars), np.nan)
+    known_colors = get_colors()[: len(stars)]
+    colors[: len(known_colors)] = known_colors
+    # Like `get_band`, a color of 0 is treated as missing color data. Note
+    # that comparisons with NaN are always False.
+    has_color = colors != 0
+
+    codes = np.full(
+        len(stars), BAND_NAMES.index(InternightBands.BRIGHTNESS_BAND), dtype=np.int8
+    )
+    for band, lower, upper in _COLOR_BANDS:
+        codes[has_color & (colors > lower) & (colors <= upper)] = BAND_NAMES.index(band)
+    codes[_SPECIAL_STARS] = BAND_NAMES.index(InternightBands.SPECIAL_STARS)
+    codes.flags.writeable = False
+    return codes
+
+
 @cache
 def bands():
     """
     Returns the list of stars in respective bands as used in internight
     normalization
     """
-    all_stars = range(STAR_START, STAR_END + 1)
-    non_special_stars = list(set(all_stars) - set(_SPECIAL_STARS))
-
-    color_band_1 = []
-    color_band_2 = []
-    color_band_3 = []
-    brightness_band = []
-
-    to_return = {
-        InternightBands.COLOR_BAND_1: color_band_1,
-        InternightBands.COLOR_BAND_2: color_band_2,
-        InternightBands.COLOR_BAND_3: color_band_3,
-        InternightBands.SPECIAL_STARS: _SPECIAL_STARS,
-        InternightBands.BRIGHTNESS_BAND: brightness_band,
-    }
-    for s in non_special_stars:
-        to_return[get_band(s)].append(s)
-
+    codes = star_band_codes()
+    stars = np.arange(len(codes))
+    valid = stars >= STAR_START
+
+    to_return = {}
+    for code, band in enumerate(BAND_NAMES):
+        to_return[band] = stars[valid & (codes == code)].tolist()
+    to_return[InternightBands.SPECIAL_STARS] = _SPECIAL_STARS
     return to_return
 
 
@@ -83,8 +124,15 @@ def get_band(star_no):
     """
     Return the internight normalization band for the star
     """
-    c = get_color(star_no)
+    if STAR_START <= star_no <= STAR_END:
+        return BAND_NAMES[star_band_codes()[star_no]]
+    return _get_band_for_color(star_no, get_color(star_no))
+
 
+def _get_band_for_color(star_no, c):
+    """
+    Return the internight normalization band for the star with color `c`
+    """
     # If color data is present
     if c:
         if _is_special_band_star(star_no):
@@ -0,0 +1,96 @@
+import warnings
+from collections import namedtuple
+from typing import Dict, Iterable, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from trout.internight import bands as get_bands
+
+# `factors` is the (n_bands, n_nights) array of normalization factors, row i
+# corresponding to `band_names[i]`. `normalized` is the (n_stars, n_nights)
+# array of normalized flux and `band_of_star` holds, for every row of the flux
+# matrix, the index in `band_names` of the band used to normalize it (-1 if the
+# star isn't in any band).
+InternightNormalization = namedtuple(
+    "InternightNormalization", ["factors", "normalized", "band_names", "band_of_star"]
+)
+
+
+def normalize(
+    flux: npt.ArrayLike,
+    stars: Union[Iterable[int], None] = None,
+    bands: Union[Dict[str, Iterable[int]], None] = None,
+    reference_flux: Union[npt.ArrayLike, None] = None,
+    reference_stars: Union[Iterable[int], None] = None,
+) -> InternightNormalization:
+    """
+    Internight normalizes the `flux` matrix of stars (rows) by nights (columns).
+
+    For every band and night, the normalization factor is the median over the
+    band's reference stars of `reference_flux / flux`, and each star's flux is
+    multiplied by its band's factor for the night. Zero, negative and NaN
+    fluxes are ignored when computing the factors; zero fluxes (nights where
+    the star is absent) stay zero after normalization.
+
+    param: flux: (n_stars, n_nights) array of flux values
+    param: stars (optional): star numbers of the rows of `flux`, defaults to
+        1, 2, ... n_stars
+    param: bands (optional): dictionary of band name to the star numbers in
+        that band, defaults to `trout.internight.bands()`. Pass a different
+        dictionary to try alternative band definitions.
+    param: reference_flux (optional): reference signal of each row of `flux`,
+        defaults to the median positive flux of the star over all nights
+    param: reference_stars (optional): star numbers used for computing the
+        normalization factors, defaults to all stars
+    return: InternightNormalization named tuple
+
+    Example:
+
+        result = normalize(flux_matrix, stars=range(1, 1001))
+        result.normalized  # Normalized fluxes, same shape as `flux_matrix`
+        result.factors[result.band_names.index(InternightBands.COLOR_BAND_1)]
+    """
+    flux = np.asarray(flux, dtype="float")
+    if flux.ndim != 2:
+        raise ValueError(f"Expected a (stars, nights) matrix, got shape {flux.shape}")
+    n_stars, n_nights = flux.shape
+
+    stars = np.arange(1, n_stars + 1) if stars is None else np.asarray(stars, dtype=int)
+    if len(stars) != n_stars:
+        raise ValueError(f"Got {len(stars)} star numbers for {n_stars} rows of flux")
+
+    if bands is None:
+        bands = get_bands()
+    band_names = tuple(bands.keys())
+    band_of_star = np.full(n_stars, -1)
+    for index, band in enumerate(band_names):
+        band_of_star[np.isin(stars, list(bands[band]))] = index
+
+    positive_flux = np.where(flux > 0, flux, np.nan)
+    with warnings.catch_warnings():
+        # All-NaN rows and columns (stars absent on all nights, bands without
+        # reference stars on a night) are expected and produce NaN
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        if reference_flux is None:
+            reference_flux = np.nanmedian(positive_flux, axis=1)
+        reference_flux = np.asarray(reference_flux, dtype="float")
+        if reference_flux.shape != (n_stars,):
+            raise ValueError(f"Expected {n_stars} reference flux values")
+
+        is_reference = np.ones(n_stars, dtype=bool)
+        if reference_stars is not None:
+            is_reference = np.isin(stars, list(reference_stars))
+
+        ratios = reference_flux[:, np.newaxis] / positive_flux
+        factors = np.full((len(band_names), n_nights), np.nan)
+        for index in range(len(band_names)):
+            rows = is_reference & (band_of_star == index)
+            if rows.any():
+                factors[index] = np.nanmedian(ratios[rows], axis=0)
+
+    normalized = np.full_like(flux, np.nan)
+    in_band = band_of_star >= 0
+    normalized[in_band] = flux[in_band] * factors[band_of_star[in_band]]
+    normalized[in_band[:, np.newaxis] & (flux == 0)] = 0
+    return InternightNormalization(factors, normalized, band_names, band_of_star)
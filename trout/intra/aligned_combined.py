@@ -1,36 +1,133 @@
 import re
+from collections import namedtuple
 from datetime import date
 from functools import total_ordering
+from pathlib import Path
+from typing import Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
-from astropy.io.fits import getdata
+import numpy.typing as npt
+from astropy.io import fits
 from matplotlib.colors import LogNorm
 
+from trout.cache import cached_payload, cached_sidecars, file_key
+from trout.intra.manifest import listing
+from trout.intra.registry import Registry
 from trout.vis import show_box_around
 
+# `data` is the part of the image in rows y_start... and columns x_start...
+ImageCutout = namedtuple("ImageCutout", ["data", "x_start", "y_start"])
+
+# `data` is the read only (n_images, rows, columns) array of images, the ith
+# image being image number `images[i]`
+ImageStack = namedtuple("ImageStack", ["data", "images"])
+
+
+def read_cutout(
+    hdu: fits.PrimaryHDU, center: Tuple[float, float], radius: float
+) -> ImageCutout:
+    """
+    Returns the part of the image in `hdu` within `radius` pixels of `center`
+    (x, y), reading only those pixels. See `AlignedCombined.cutout`
+    """
+    rows, cols = hdu.shape
+    center_x, center_y = center
+    x_start = min(max(int(np.floor(center_x - radius)), 0), cols)
+    x_end = min(max(int(np.floor(center_x + radius)), 0), cols)
+    y_start = min(max(int(np.floor(center_y - radius)), 0), rows)
+    y_end = min(max(int(np.floor(center_y + radius)), 0), rows)
+    return ImageCutout(hdu.section[y_start:y_end, x_start:x_end], x_start, y_start)
+
+
+def scan_aligned_combined(folder: Path) -> Tuple[npt.NDArray, Tuple[Path, ...]]:
+    """
+    Returns the image numbers and paths of the aligned combined images in
+    `folder`, ordered by image number, from the folder's manifest listing.
+    """
+    numbered = listing(folder).numbered(AlignedCombined.file_name_re, 2)
+    images = np.array(sorted(numbered), dtype=int)
+    return images, tuple(numbered[image][0] for image in images)
+
+
+def aligned_combined_key(folder: Path) -> tuple:
+    """
+    Returns the key of the aligned combined images in `folder`, which changes
+    whenever images are added, removed or rewritten, see
+    `DirectoryListing.files_key`
+    """
+    return listing(folder).files_key(scan_aligned_combined(folder)[1])
+
+
+def read_aligned_combined_stack(folder: Path) -> ImageStack:
+    """
+    Returns the aligned combined images in `folder` stacked into one memory
+    mapped array.
+
+    The stack is written to the cache folder (see `trout.cache`) one image at
+    a time, so building it never holds more than one image in memory, and is
+    reused until images are added, removed or rewritten.
+    """
+    folder = Path(folder)
+    images, paths = scan_aligned_combined(folder)
+
+    def load(path):
+        data = np.load(path, mmap_mode="r")
+        if len(data) != len(images):
+            raise ValueError(f"{path} has {len(data)} images, expected {len(images)}")
+        return ImageStack(data, images)
+
+    def build():
+        if len(paths) == 0:
+            raise ValueError(f"No aligned combined images in {folder}")
+        # Only the paths, the images are read one at a time by write
+        return paths
+
+    def write(paths, tmp_path):
+        with fits.open(paths[0], memmap=True) as hdul:
+            first = hdul[0].data
+            stack = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=first.dtype, shape=(len(paths), *first.shape)
+            )
+        for index, image_path in enumerate(paths):
+            with fits.open(image_path, memmap=True) as hdul:
+                if hdul[0].data.shape != stack.shape[1:]:
+                    raise ValueError(
+                        f"{image_path} has shape {hdul[0].data.shape}, "
+                        f"expected {stack.shape[1:]}"
+                    )
+                stack[index] = hdul[0].data
+        stack.flush()
+        del stack
+
+    return cached_sidecars(
+        listing(folder).files_key(paths),
+        "aligned_combined_stack",
+        (".npy",),
+        load,
+        build,
+        (write,),
+        reload=True,
+    )
+
 
 @total_ordering
-class AlignedCombined:
+class AlignedCombined(metaclass=Registry):
     file_name_re = re.compile(r"m23_(\d+\.?\d*)[-_](\d+).fit")
 
     @classmethod
     def extract_image_number(cls, name):
         return int(cls.file_name_re.match(name)[2])
 
-    def __new__(cls, night_date: date, number: int):
+    @classmethod
+    def registry_key(cls, night_date: date, number: int):
         """
-        Ensures each aligned combined instance is a singleton.
+        Ensures each aligned combined instance is a singleton, see `Registry`
         """
-        if not hasattr(cls, "files"):
-            cls.files = {}
         year, month, day = night_date.year, night_date.month, night_date.day
         assert (type(year), type(month), type(day)) == (int,) * 3
         assert (type(number)) == int
-        identifier = (year, month, day, number)
-        if not cls.files.get(identifier):
-            cls.files[identifier] = super(AlignedCombined, cls).__new__(cls)
-        return cls.files[identifier]
+        return (year, month, day, number)
 
     def __init__(self, night_date: date, number: int):
         from .night import Night
@@ -38,14 +135,13 @@ class AlignedCombined:
         self._night = Night(night_date.year, night_date.month, night_date.day)
         number_str = f"{number:04}"
         folder = self._night.path / "Aligned Combined"
-        candidates = list(folder.glob(f"*{number_str}.fit"))
+        candidates = listing(folder).numbered(self.file_name_re, 2).get(number, [])
         if len(candidates) == 0:
             raise ValueError(f"AlignedCombined no. {number_str} not found in {folder}")
         elif len(candidates) > 1:
             raise ValueError(f"Multiple candidates for no. {number_str} in {folder}")
         candidate = candidates[0]
         self._path = candidate
-        self._data = None
 
     def plot(
         self, label=(746.58, 459.64), zoom_at_center=None, radius=10, label_center=True
@@ -63,13 +159,17 @@ class AlignedCombined:
         ax.grid(which="major", alpha=0)
 
         if zoom_at_center:
+            # Slightly larger than the box so it's filled when the center
+            # isn't on a whole pixel
+            cutout = self.cutout(zoom_at_center, radius + 1)
             show_box_around(
-                self.data,
+                cutout.data,
                 zoom_at_center,
                 radius,
                 f"{self} - {zoom_at_center}",
                 ax,
                 label_center=label_center,
+                offset=(cutout.x_start, cutout.y_start),
             )
             plt.show()
         else:
@@ -95,9 +195,26 @@ class AlignedCombined:
 
     @property
     def data(self):
-        if self._data is None:
-            self._data = getdata(self.path)
-        return self._data
+        """
+        Returns the image, read into memory and kept there within the memory
+        budget of `trout.cache`. Use `cutout` to read only part of it
+        """
+
+        def read():
+            with fits.open(self.path, memmap=True) as hdul:
+                # Copied so that no memory map keeps the file open
+                return np.array(hdul[0].data)
+
+        return cached_payload(("aligned_combined", *file_key(self.path)), read)
+
+    def cutout(self, center: Tuple[float, float], radius: float) -> ImageCutout:
+        """
+        Returns the part of the image within `radius` pixels of `center`
+        (x, y), reading only those pixels from the file. The cutout is clipped
+        to the image, so near the edges it's smaller than 2 * `radius` pixels
+        """
+        with fits.open(self.path) as hdul:
+            return read_cutout(hdul[0], center, radius)
 
     @property
     def path(self):
@@ -0,0 +1,149 @@
+from collections import namedtuple
+from typing import Iterable, Set
+
+import numpy as np
+import pandas as pd
+
+from trout.database import query
+from trout.intra.year import Year
+from trout.stars.utils import STAR_END, STAR_START, star_table_name
+
+# `values` is the (n_stars, n_nights) array of the `column` of the Color
+# Normalized files for the extraction `radius`, row i corresponding to star
+# `stars[i]` and column j to the night dated `nights[j]`. Stars missing from a
+# night's file are NaN. `failures` maps the date of each night whose file
+# couldn't be read to the exception raised, those nights aren't in `nights`.
+ColorNormalizedCube = namedtuple(
+    "ColorNormalizedCube", ["values", "stars", "nights", "radius", "column", "failures"]
+)
+
+DEFAULT_COLOR_NORMALIZED_COLUMN = "Normalized Median Flux"
+# Extraction radius of the fluxes in the star tables of the database
+DATABASE_RADIUS = 4
+# Number of star tables read by each query of `database_fluxes`
+DATABASE_BATCH_SIZE = 250
+
+
+def color_normalized_cube(
+    years: Iterable[int],
+    radius: int = DATABASE_RADIUS,
+    column: str = DEFAULT_COLOR_NORMALIZED_COLUMN,
+    max_workers: int = 8,
+) -> ColorNormalizedCube:
+    """
+    Returns the `column` of the Color Normalized files of all nights in `years`
+    for the extraction `radius` as a `ColorNormalizedCube` (stars by nights).
+
+    Nights are read in parallel by `max_workers` threads. Nights without a
+    Color Normalized folder (e.g. too few images to renormalize) are left out,
+    as are nights whose file can't be read, whose failures (see
+    `Year.map_nights`) are the cube's `failures`.
+    """
+    columns, failures = Year.map_nights(
+        lambda night: night.get_color_normalized(radius)[column],
+        years,
+        max_workers,
+        "load color normalized",
+        include=lambda night: night.has_color_normalized_folder(),
+    )
+
+    stars = np.unique(
+        np.concatenate([c.index.to_numpy(dtype=int) for c in columns.values()] or [[]])
+    ).astype(int)
+    values = np.full((len(stars), len(columns)), np.nan)
+    for index, night_values in enumerate(columns.values()):
+        rows = np.searchsorted(stars, night_values.index.to_numpy(dtype=int))
+        values[rows, index] = night_values.to_numpy(dtype=float)
+    return ColorNormalizedCube(values, stars, tuple(columns), radius, column, failures)
+
+
+def _database_tables() -> Set[str]:
+    """
+    Returns the names of the tables in the schema of the database star tables
+    """
+    rows = query(
+        "SELECT table_name FROM information_schema.tables"
+        " WHERE table_schema = current_schema()"
+    )
+    return {name for name, in rows}
+
+
+def database_fluxes(
+    stars: Iterable[int], nights: Iterable, is_primary: bool = True
+) -> pd.DataFrame:
+    """
+    Returns the flux of each of `stars` on each of `nights` (dates) in the
+    star tables of the database, as a stars by nights dataframe (NaN where a
+    table has no row for the night or the star has no table), fetched with
+    one query per `DATABASE_BATCH_SIZE` star tables
+    """
+    stars = [int(s) for s in stars if STAR_START <= s <= STAR_END]
+    nights = sorted(nights)
+    result = pd.DataFrame(np.nan, index=pd.Index(stars, name="star"), columns=nights)
+    if not stars or not nights:
+        return result
+    # Stars without a table are left NaN rather than failing the query
+    existing = _database_tables()
+    tables = [(star, star_table_name(star, is_primary)) for star in stars]
+    tables = [(star, table) for star, table in tables if table in existing]
+    # Selecting the range of dates keeps the queries short, other nights in it
+    # are dropped below
+    dates = f"date BETWEEN '{nights[0]:%Y-%m-%d}' AND '{nights[-1]:%Y-%m-%d}'"
+    rows = []
+    for start in range(0, len(tables), DATABASE_BATCH_SIZE):
+        # NUMERIC fluxes would be fetched as Decimal
+        rows += query(
+            " UNION ALL ".join(
+                f"SELECT {star} AS star, date, flux::float AS flux FROM {table}"
+                f" WHERE {dates}"
+                for star, table in tables[start:start + DATABASE_BATCH_SIZE]
+            )
+        )
+    df = pd.DataFrame(rows, columns=["star", "date", "flux"])
+    df = df[df["date"].isin(nights)].astype({"flux": float})
+    if len(df):
+        # Tables may have several rows per night, the last one is used
+        fluxes = df.pivot_table(index="star", columns="date", values="flux", aggfunc="last")
+        result.update(fluxes)
+    return result
+
+
+def check_color_normalized(
+    cube: ColorNormalizedCube, is_primary: bool = True, rtol=1e-5, atol=1e-2
+) -> pd.DataFrame:
+    """
+    Compares the values of `cube` (see `color_normalized_cube`) with the fluxes
+    of the star tables of the database for all stars and nights at once.
+
+    Returns a dataframe of the mismatches with the star, night, value in the
+    files and in the database (NaN when missing) and whether the value is
+    missing from the database, from the files or different. Values are equal
+    when within `rtol` and `atol` like `numpy.isclose`.
+
+    param: is_primary: whether to compare against the primary (`star_N_4px`)
+        or secondary (`star_N_4px_exp`) tables
+    """
+    if cube.radius != DATABASE_RADIUS:
+        raise ValueError(f"The database only has radius {DATABASE_RADIUS} fluxes")
+    in_database = database_fluxes(cube.stars, cube.nights, is_primary)
+    in_files = pd.DataFrame(cube.values, index=cube.stars, columns=list(cube.nights))
+    in_files = in_files.reindex(index=in_database.index, columns=in_database.columns)
+
+    files, database = in_files.to_numpy(), in_database.to_numpy()
+    files_missing, database_missing = np.isnan(files), np.isnan(database)
+    different = ~np.isclose(files, database, rtol=rtol, atol=atol, equal_nan=True)
+    rows, columns = np.nonzero(different)
+    kind = np.where(
+        database_missing[rows, columns],
+        "missing in database",
+        np.where(files_missing[rows, columns], "missing in files", "different"),
+    )
+    return pd.DataFrame(
+        {
+            "star": in_database.index.to_numpy()[rows],
+            "night": in_database.columns.to_numpy()[columns],
+            "file": files[rows, columns],
+            "database": database[rows, columns],
+            "mismatch": kind,
+        }
+    )
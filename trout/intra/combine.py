@@ -0,0 +1,165 @@
+"""
+Combining many images (e.g. a night's aligned frames into a deep stack) into
+one, tile by tile so that memory stays within a budget however many images
+there are. Each tile is a band of rows of all images, read from the memory
+mapped files, combined and written into the result before the next tile is
+read.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, List, Tuple, Union
+
+import numpy as np
+import numpy.typing as npt
+from astropy.io import fits
+from astropy.stats import sigma_clip
+from dotenv import load_dotenv
+
+from trout.intra.aligned_combined import scan_aligned_combined
+
+load_dotenv()
+# Approximate bytes of image data read at once when combining images, shared
+# by all worker processes
+COMBINE_MEMORY_BUDGET = int(
+    float(os.getenv("TROUT_COMBINE_MEMORY_BUDGET_GB") or 1) * 1024**3
+)
+
+COMBINE_METHODS = ("mean", "median", "sigma_clip")
+# Peak memory of combining a tile as a multiple of the tile's size, measured
+# with tracemalloc (rounded up): nanmean holds the tile and a zero filled
+# copy, nanmedian a copy partitioned in place plus its NaN mask and indexes,
+# and sigma clipping (without copying the tile) its mask and deviations
+_METHOD_COPIES = {"mean": 3, "median": 5, "sigma_clip": 3}
+
+
+def _image_shape(path: Path) -> Tuple[int, int]:
+    header = fits.getheader(path)
+    return header["NAXIS2"], header["NAXIS1"]
+
+
+def tile_rows(
+    n_images: int, shape: Tuple[int, int], method: str, memory_budget: int, workers: int
+) -> int:
+    """
+    Returns the number of image rows per tile so that the tiles combined at
+    once by `workers` processes, and the arrays `method` needs to combine
+    them, fit in `memory_budget` bytes
+    """
+    rows, cols = shape
+    row_bytes = n_images * cols * np.dtype(np.float64).itemsize * _METHOD_COPIES[method]
+    return int(min(max(memory_budget // (workers * row_bytes), 1), rows))
+
+
+def combine_tile(
+    paths: List[Path], y_start: int, y_end: int, method: str, sigma: float, maxiters: int
+) -> Tuple[int, npt.NDArray]:
+    """
+    Returns `y_start` and the combination of rows `y_start` to `y_end` of the
+    images at `paths`, reading only those rows
+    """
+    tile = np.empty((len(paths), y_end - y_start, _image_shape(paths[0])[1]))
+    for index, path in enumerate(paths):
+        with fits.open(path, memmap=True) as hdul:
+            tile[index] = hdul[0].section[y_start:y_end, :]
+    if method == "mean":
+        combined = np.nanmean(tile, axis=0)
+    elif method == "median":
+        combined = np.nanmedian(tile, axis=0)
+    else:
+        clipped = sigma_clip(
+            tile, sigma=sigma, maxiters=maxiters, axis=0, masked=True, copy=False
+        )
+        combined = clipped.mean(axis=0).filled(np.nan)
+    return y_start, combined.astype(np.float32)
+
+
+def combine_images(
+    paths: Iterable[Union[str, Path]],
+    output: Union[str, Path, None] = None,
+    method: str = "median",
+    sigma: float = 3.0,
+    maxiters: int = 5,
+    memory_budget: Union[int, None] = None,
+    workers: int = 1,
+    overwrite: bool = False,
+) -> npt.NDArray:
+    """
+    Combines the images at `paths` pixel by pixel and returns the combined
+    (float32) image, writing it to the FITS file `output` if given with the
+    header of the first image.
+
+    param: method: "mean", "median" or "sigma_clip" (mean of the values within
+        `sigma` standard deviations of the median, clipped up to `maxiters`
+        times, see `astropy.stats.sigma_clip`). NaN pixels are ignored
+    param: memory_budget: approximate bytes of image data read at once, by
+        default `COMBINE_MEMORY_BUDGET`
+    param: workers: number of processes combining tiles in parallel, with 1
+        tiles are combined in this process
+    """
+    if method not in COMBINE_METHODS:
+        raise ValueError(f"Unknown method {method}, use one of {COMBINE_METHODS}")
+    paths = [Path(p) for p in paths]
+    if len(paths) == 0:
+        raise ValueError("No images to combine")
+    shape = _image_shape(paths[0])
+    for path in paths[1:]:
+        if _image_shape(path) != shape:
+            raise ValueError(f"{path} has shape {_image_shape(path)}, expected {shape}")
+
+    workers = max(workers, 1)
+    memory_budget = memory_budget or COMBINE_MEMORY_BUDGET
+    rows_per_tile = tile_rows(len(paths), shape, method, memory_budget, workers)
+    tiles = [(y, min(y + rows_per_tile, shape[0])) for y in range(0, shape[0], rows_per_tile)]
+    combined = np.empty(shape, dtype=np.float32)
+    if workers == 1:
+        for y_start, y_end in tiles:
+            _, tile = combine_tile(paths, y_start, y_end, method, sigma, maxiters)
+            combined[y_start:y_end] = tile
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(combine_tile, paths, y_start, y_end, method, sigma, maxiters)
+                for y_start, y_end in tiles
+            ]
+            for future in as_completed(futures):
+                y_start, tile = future.result()
+                combined[y_start:y_start + len(tile)] = tile
+
+    if output is not None:
+        header = fits.getheader(paths[0])
+        for key in ("BZERO", "BSCALE", "BITPIX"):
+            header.remove(key, ignore_missing=True)
+        header["NCOMBINE"] = (len(paths), "Number of images combined")
+        header["COMBMETH"] = (method, "Method used to combine the images")
+        fits.PrimaryHDU(combined, header=header).writeto(output, overwrite=overwrite)
+    return combined
+
+
+def combine_night(
+    night,
+    source: str = "aligned",
+    numbers: Union[Iterable[int], None] = None,
+    output: Union[str, Path, None] = None,
+    **kwargs,
+) -> npt.NDArray:
+    """
+    Combines the images of `night` into one, see `combine_images` for the
+    other parameters.
+
+    param: source: "aligned" for the frames in the Aligned folder (e.g. to
+        regenerate combined images) or "aligned_combined" for the aligned
+        combined images (e.g. for a deep stack of the night)
+    param: numbers: numbers of the frames or images to combine, all by default
+    """
+    if source == "aligned":
+        files = night.aligned_frames.files()
+    elif source == "aligned_combined":
+        images, paths = scan_aligned_combined(night.path / "Aligned Combined")
+        files = list(zip(images, paths))
+    else:
+        raise ValueError(f"Unknown source {source}, use aligned or aligned_combined")
+    if numbers is not None:
+        numbers = set(numbers)
+        files = [(number, path) for number, path in files if number in numbers]
+    return combine_images([path for _, path in files], output=output, **kwargs)
@@ -0,0 +1,96 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from trout.cache import cached_sidecars, save_array, save_arrays
+from trout.files.text_table import read_numeric_rows
+from trout.intra.flux_log_combined import FluxLogCombined
+from trout.intra.manifest import listing
+
+# `flux` is the read only (n_stars, n_images) array of flux values, row i
+# corresponding to star `stars[i]` and column j to image `images[j]`. Images
+# missing from a star's flux log are NaN. `times` holds the time each image
+# was taken (NaT when unknown).
+FluxCube = namedtuple("FluxCube", ["flux", "stars", "images", "times"])
+
+
+def read_flux_log(path: Path) -> Tuple[npt.NDArray, npt.NDArray]:
+    """
+    Returns the (image numbers, flux values) of the flux log combined file at
+    `path`, from the columns of the file layout defined by `FluxLogCombined`
+    """
+    try:
+        values = read_numeric_rows(path, skiprows=FluxLogCombined.header_rows + 1)
+    except pd.errors.EmptyDataError:
+        return np.array([], dtype=int), np.array([], dtype="float")
+    return (
+        values[:, FluxLogCombined.image_column].astype(int),
+        values[:, FluxLogCombined.flux_column],
+    )
+
+
+def scan_flux_logs(folder: Path) -> Tuple[npt.NDArray, Tuple[Path, ...]]:
+    """
+    Returns the star numbers and paths of the flux log combined files in
+    `folder`, ordered by star number, from the folder's manifest listing.
+    """
+    numbered = listing(folder).numbered(FluxLogCombined.file_name_re, 3)
+    stars = np.array(sorted(numbered), dtype=int)
+    return stars, tuple(numbered[star][0] for star in stars)
+
+
+def flux_logs_key(folder: Path) -> tuple:
+    """
+    Returns the key of the flux logs in `folder`, which changes whenever flux
+    logs are added, removed or rewritten, see `DirectoryListing.files_key`
+    """
+    return listing(folder).files_key(scan_flux_logs(folder)[1])
+
+
+def read_flux_cube(folder: Path, max_workers: int = 8) -> FluxCube:
+    """
+    Reads all flux log combined files in `folder` (a radius folder of Flux
+    Logs Combined) in parallel into a `FluxCube` without `times`.
+
+    The cube is stored in the cache folder (see `trout.cache`) as an array
+    that is returned memory mapped, and reused until flux logs are added,
+    removed or rewritten.
+    """
+    folder = Path(folder)
+    stars, paths = scan_flux_logs(folder)
+
+    def load(flux_path, axes_path):
+        with np.load(axes_path) as axes:
+            return FluxCube(np.load(flux_path, mmap_mode="r"), axes["stars"], axes["images"], None)
+
+    def build():
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            logs = list(executor.map(read_flux_log, paths))
+        images = np.unique(np.concatenate([log_images for log_images, _ in logs] or [[]]))
+        images = images.astype(int)
+        flux = np.full((len(stars), len(images)), np.nan)
+        for row, (log_images, log_flux) in enumerate(logs):
+            flux[row, np.searchsorted(images, log_images)] = log_flux
+        return FluxCube(flux, stars, images, None)
+
+    # Reloaded memory mapped like a cube read from the cache folder, so that
+    # it isn't counted against the memory budget
+    return cached_sidecars(
+        listing(folder).files_key(paths),
+        "flux_cube",
+        (".npy", ".npz"),
+        load,
+        build,
+        (
+            lambda cube, tmp_path: save_array(cube.flux, tmp_path),
+            lambda cube, tmp_path: save_arrays(
+                {"stars": cube.stars, "images": cube.images}, tmp_path
+            ),
+        ),
+        reload=True,
+    )
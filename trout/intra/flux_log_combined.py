@@ -1,18 +1,36 @@
 import re
 from datetime import date
 from functools import total_ordering
+from pathlib import Path
 
 import pandas as pd
 
+from trout.cache import cached_frame
+from trout.intra.manifest import listing
+from trout.intra.registry import Registry
+
 
 @total_ordering
-class FluxLogCombined:
+class FluxLogCombined(metaclass=Registry):
     file_name_re = re.compile(r"(\d{2}-\d{2}-\d{2})_m23_(\d+\.\d*)-(\d{1,4})_flux\.txt")
+    # Files have `header_rows` lines about the star followed by a row of column
+    # titles and one row per image, with the image number in the (zero based)
+    # column `image_column` and the flux in `flux_column`
+    header_rows = 5
+    image_column = 0
+    flux_column = 1
 
     @classmethod
     def extract_image_number(cls, name):
         return int(cls.file_name_re.match(name)[3])
 
+    @classmethod
+    def read(cls, path: Path) -> pd.DataFrame:
+        """
+        Reads the flux log combined file at `path`
+        """
+        return pd.read_csv(path, skiprows=cls.header_rows, delim_whitespace=True)
+
     @classmethod
     def get_radius_folder_name(cls, radius: int) -> str:
         """
@@ -34,20 +52,16 @@ class FluxLogCombined:
         else:
             return f"{radius} Pixel Radius"
 
-    def __new__(cls, night_date: date, number: int, radius: int, all: bool):
+    @classmethod
+    def registry_key(cls, night_date: date, star_number: int, radius: int, all=False):
         """
-        Ensures each fluxlog combined instance is a singleton.
+        Ensures each fluxlog combined instance is a singleton, see `Registry`
         """
-        if not hasattr(cls, "files"):
-            cls.files = {}
         year, month, day = night_date.year, night_date.month, night_date.day
         assert (type(year), type(month), type(day)) == (int,) * 3
-        assert (type(number)) == int
+        assert (type(star_number)) == int
         assert (type(radius)) == int
-        identifier = (year, month, day, number, radius, all)
-        if not cls.files.get(identifier):
-            cls.files[identifier] = super(FluxLogCombined, cls).__new__(cls)
-        return cls.files[identifier]
+        return (year, month, day, star_number, radius, all)
 
     def __init__(self, night_date: date, star_number: int, radius: int, all=False):
         from .night import Night
@@ -62,14 +76,13 @@ class FluxLogCombined:
             / flux_log_folder_name
             / self.get_radius_folder_name(radius)
         )
-        candidates = list(folder.glob(f"*-{number_str}_flux.txt"))
+        candidates = listing(folder).numbered(self.file_name_re, 3).get(star_number, [])
         if len(candidates) == 0:
             raise ValueError(f"Fluxlog combined no. {number_str} not found in {folder}")
         elif len(candidates) > 1:
             raise ValueError(f"Multiple candidates for no. {number_str} in {folder}")
         candidate = candidates[0]
         self._path = candidate
-        self._data = None
 
     def is_valid_file_name(self):
         return bool(self.file_name_re.match(self.path.name))
@@ -81,9 +94,7 @@ class FluxLogCombined:
 
     @property
     def data(self):
-        if self._data is None:
-            self._data = pd.read_csv(self.path, skiprows=5, delim_whitespace=True)
-        return self._data
+        return cached_frame(self.path, "flux_log_combined", self.read)
 
     @property
     def path(self):
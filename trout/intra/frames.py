@@ -0,0 +1,159 @@
+"""
+Readers of the single frames of a night, in the `Aligned` and `Raw Calibrated
+Images` folders, which are far more numerous than the aligned combined
+images. Frames are read one (or one chunk) at a time so that going over a
+whole night never holds more than that in memory.
+"""
+import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+from astropy.io import fits
+
+from trout.cache import cached_payload, file_key
+from trout.intra.manifest import listing
+
+# `data` is the frame's image, valid until the next frame is read (copy it to
+# keep it), and `header` its FITS header
+Frame = namedtuple("Frame", ["number", "path", "data", "header"])
+
+# `data` is the (n_frames, rows, columns) array of the frames numbered
+# `numbers`
+FrameChunk = namedtuple("FrameChunk", ["numbers", "data"])
+
+# Header cards that aren't metadata values
+_SKIPPED_HEADER_KEYS = {"COMMENT", "HISTORY", ""}
+
+
+class Frames:
+    """
+    The frames in a folder of a night, ordered by frame number (the number at
+    the end of the file name, e.g. 12 for m23_7.0-012.fit)
+    """
+
+    folder_name = None
+    file_name_re = re.compile(r".*[-_](\d+)\.fits?$", re.IGNORECASE)
+
+    def __init__(self, night) -> None:
+        self._night = night
+        self._folder = night.path / self.folder_name
+
+    def files(self) -> List[Tuple[int, Path]]:
+        """
+        Returns the (frame number, path) of the frames, from the folder's
+        manifest listing
+        """
+        numbered = listing(self._folder).numbered(self.file_name_re, 1)
+        return [(number, path) for number in sorted(numbered) for path in numbered[number]]
+
+    @property
+    def numbers(self) -> npt.NDArray:
+        return np.array([number for number, _ in self.files()], dtype=int)
+
+    def __iter__(self) -> Iterator[Frame]:
+        """
+        Yields the frames one at a time, memory mapped so that only the parts
+        of the image used are read. Scaled frames (e.g. with BZERO) can't be
+        memory mapped and are read whole
+        """
+        for number, path in self.files():
+            with fits.open(path, memmap=True) as hdul:
+                yield Frame(number, path, hdul[0].data, hdul[0].header)
+
+    def chunks(self, size: int) -> Iterator[FrameChunk]:
+        """
+        Yields the frames `size` at a time as (size, rows, columns) arrays,
+        the last chunk holding the remaining frames
+        """
+        if size < 1:
+            raise ValueError(f"Invalid chunk size {size}")
+        numbers, data = [], []
+        for frame in self:
+            numbers.append(frame.number)
+            data.append(np.array(frame.data))
+            if len(data) == size:
+                yield FrameChunk(np.array(numbers), np.stack(data))
+                numbers, data = [], []
+        if data:
+            yield FrameChunk(np.array(numbers), np.stack(data))
+
+    def stack_chunks(self, size: int, method: str = "mean") -> Iterator[FrameChunk]:
+        """
+        Yields the mean or median ("mean" or "median" `method`) of each chunk
+        of `size` consecutive frames, as a chunk of one image with the numbers
+        of the frames combined, e.g. to stack every 10 frames of the night
+        """
+        if method not in ("mean", "median"):
+            raise ValueError(f"Unknown method {method}, use mean or median")
+        combine = np.mean if method == "mean" else np.median
+        for chunk in self.chunks(size):
+            yield FrameChunk(chunk.numbers, combine(chunk.data, axis=0))
+
+    def mean(self, chunk_size: int = 16) -> npt.NDArray:
+        """
+        Returns the mean of all frames, accumulated `chunk_size` frames at a
+        time. For the median of all frames see `trout.intra.combine`
+        """
+        total, count = None, 0
+        for chunk in self.chunks(chunk_size):
+            chunk_sum = chunk.data.sum(axis=0, dtype=np.float64)
+            total = chunk_sum if total is None else total + chunk_sum
+            count += len(chunk.numbers)
+        if total is None:
+            raise ValueError(f"No frames in {self._folder}")
+        return total / count
+
+    def headers(self, max_workers: int = 8) -> pd.DataFrame:
+        """
+        Returns the header values of all frames as a dataframe indexed by
+        frame number with the path of each frame, reading only the headers
+        (in parallel by `max_workers` threads) and not the images. Kept in
+        memory until frames are added, removed or renamed
+        """
+        return cached_payload(
+            ("frame_headers", *file_key(self._folder)),
+            lambda: self._read_headers(max_workers),
+        )
+
+    def _read_headers(self, max_workers: int) -> pd.DataFrame:
+        files = self.files()
+
+        def read(path):
+            header = fits.getheader(path)
+            return {k: v for k, v in header.items() if k not in _SKIPPED_HEADER_KEYS}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            rows = list(executor.map(read, [path for _, path in files]))
+        df = pd.DataFrame(rows, index=pd.Index([n for n, _ in files], name="Frame"))
+        df.insert(0, "path", [path for _, path in files])
+        return df
+
+    @property
+    def folder(self) -> Path:
+        return self._folder
+
+    @property
+    def night(self):
+        return self._night
+
+    def __len__(self):
+        return len(self.files())
+
+    def __str__(self):
+        return f"{self._night}. {self.folder_name}"
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._night!r})"
+
+
+class AlignedFrames(Frames):
+    folder_name = "Aligned"
+
+
+class RawCalibratedFrames(Frames):
+    folder_name = "Raw Calibrated Images"
@@ -0,0 +1,157 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Tuple
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from trout.cache import cached_sidecars, save_array, save_arrays
+from trout.files.logfile_combined_file import LogFileCombinedColumns
+from trout.intra.logfile_combined import LogFileCombined
+from trout.intra.manifest import listing
+from trout.intra.year import Year
+
+# `values` is the read only (n_images, n_stars, n_columns) array of the Log
+# Files Combined of a night, values[i, s - 1] holding the row of star s in
+# image `images[i]` with the columns titled `titles`. Stars missing from an
+# image's file and columns missing from its titles are NaN. `times` holds the
+# time each image was taken (NaT when unknown).
+LogFileCube = namedtuple("LogFileCube", ["values", "images", "titles", "times"])
+
+
+def scan_logfiles_combined(folder: Path) -> Tuple[npt.NDArray, Tuple[Path, ...]]:
+    """
+    Returns the image numbers and paths of the log files combined in `folder`,
+    ordered by image number, from the folder's manifest listing. Image numbers
+    with several files are left out like `LogFileCombined` refuses them.
+    """
+    numbered = listing(folder).numbered(LogFileCombined.file_name_re, 3)
+    images = np.array(sorted(i for i, paths in numbered.items() if len(paths) == 1), dtype=int)
+    return images, tuple(numbered[image][0] for image in images)
+
+
+def logfiles_combined_key(folder: Path) -> tuple:
+    """
+    Returns the key of the log files combined in `folder`, which changes
+    whenever log files are added, removed or rewritten, see
+    `DirectoryListing.files_key`
+    """
+    return listing(folder).files_key(scan_logfiles_combined(folder)[1])
+
+
+def read_logfile_cube(folder: Path, max_workers: int = 8) -> LogFileCube:
+    """
+    Reads all log files combined in `folder` (a night's Log Files Combined) in
+    parallel into a `LogFileCube` without `times`, the column titles being
+    the ones of the first file.
+
+    The cube is stored in the cache folder (see `trout.cache`) as a memory
+    mapped array and reused until log files are added, removed or rewritten,
+    so reading any star's rows afterwards doesn't parse text files.
+    """
+    folder = Path(folder)
+    images, paths = scan_logfiles_combined(folder)
+
+    def load(values_path, axes_path):
+        with np.load(axes_path) as axes:
+            return LogFileCube(
+                np.load(values_path, mmap_mode="r"), axes["images"], tuple(axes["titles"]), None
+            )
+
+    def build():
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            files = list(executor.map(LogFileCombinedColumns.read, paths))
+        titles = files[0].titles if files else ()
+        n_stars = max((len(f) for f in files), default=0)
+        values = np.full((len(files), n_stars, len(titles)), np.nan)
+        for image, columns in enumerate(files):
+            if columns.titles == titles:
+                values[image, : len(columns)] = columns.values
+                continue
+            for index, title in enumerate(titles):
+                if title in columns.titles:
+                    values[image, : len(columns), index] = columns.values[
+                        :, columns.titles.index(title)
+                    ]
+        return LogFileCube(values, images, titles, None)
+
+    return cached_sidecars(
+        listing(folder).files_key(paths),
+        "logfile_cube",
+        (".npy", ".npz"),
+        load,
+        build,
+        (
+            lambda cube, tmp_path: save_array(cube.values, tmp_path),
+            lambda cube, tmp_path: save_arrays(
+                {"images": cube.images, "titles": np.array(cube.titles, dtype=str)}, tmp_path
+            ),
+        ),
+        reload=True,
+    )
+
+
+def _star_columns(cube: LogFileCube, radius: int) -> dict:
+    """
+    Returns the light curve column names and their index in `cube`
+    """
+    adu_title = f"Star ADU {radius}"
+    if adu_title not in cube.titles:
+        raise ValueError(f"No {adu_title} column")
+    return {
+        "ADU": cube.titles.index(adu_title),
+        "Sky ADU": LogFileCombinedColumns.sky_adu_column,
+        "Avg FWHM": LogFileCombinedColumns.avg_fwhm_column,
+        "X": LogFileCombinedColumns.x_column,
+        "Y": LogFileCombinedColumns.y_column,
+    }
+
+
+def intra_light_curve(
+    star: int, years: Iterable[int], radius: int, max_workers: int = 8
+) -> pd.DataFrame:
+    """
+    Returns the image by image light curve of `star` for all nights in `years`
+    from the Log Files Combined, as a dataframe indexed by the time each image
+    was taken with the night date, image number and the star's ADU for the
+    extraction `radius`, sky ADU, average FWHM and X/Y position.
+
+    Each night's log files are read once into a cube cached on disk (see
+    `Night.logfile_cube`) so later light curves, for this star or others, only
+    read the star's rows from the cubes. Nights are read in parallel by
+    `max_workers` threads.
+
+    Nights whose log files can't be read are left out, the failures of
+    `Year.map_nights` are in the returned dataframe's `attrs`. Images in which
+    the star wasn't found have zeros like in the files, images of nights
+    without sky background have NaT times.
+    """
+    if star < 1:
+        raise ValueError(f"Invalid star number {star}")
+
+    def load(night):
+        cube = night.logfile_cube(max_workers=1)
+        if len(cube.images) == 0:
+            return pd.DataFrame()
+        columns = _star_columns(cube, radius)
+        if star > cube.values.shape[1]:
+            rows = np.full((len(cube.images), len(columns)), np.nan)
+        else:
+            rows = cube.values[:, star - 1, list(columns.values())]
+        df = pd.DataFrame(rows, columns=list(columns))
+        df.insert(0, "Night", night.night_date)
+        df.insert(1, "Image", cube.images)
+        df.index = pd.DatetimeIndex(cube.times, name="Date")
+        return df
+
+    frames, failures = Year.map_nights(load, years, max_workers, "read log files combined")
+    columns = ["Night", "Image", "ADU", "Sky ADU", "Avg FWHM", "X", "Y"]
+    frames = [frame for frame in frames.values() if len(frame)]
+    if frames:
+        df = pd.concat(frames)
+    else:
+        df = pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name="Date"))
+    df.attrs["failures"] = failures
+    return df
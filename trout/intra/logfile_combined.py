@@ -2,44 +2,42 @@ import re
 from datetime import date
 from functools import total_ordering
 
-import pandas as pd
+from trout.files.logfile_combined_file import LogFileCombinedFile
+from trout.intra.manifest import listing
+from trout.intra.registry import Registry
 
 
 @total_ordering
-class LogFileCombined:
+class LogFileCombined(metaclass=Registry):
     file_name_re = re.compile(r"(\d{2}-\d{2}-\d{2})_m23_(\d+\.\d*)-(\d{3})\.txt")
 
     @classmethod
     def extract_image_number(cls, name):
         return int(cls.file_name_re.match(name)[3])
 
-    def __new__(cls, night_date: date, number: int):
+    @classmethod
+    def registry_key(cls, night_date: date, number: int):
         """
-        Ensures each logfile combined instance is a singleton.
+        Ensures each logfile combined instance is a singleton, see `Registry`
         """
-        if not hasattr(cls, "files"):
-            cls.files = {}
         year, month, day = night_date.year, night_date.month, night_date.day
         assert (type(year), type(month), type(day)) == (int,) * 3
         assert (type(number)) == int
-        identifier = (year, month, day, number)
-        if not cls.files.get(identifier):
-            cls.files[identifier] = super(LogFileCombined, cls).__new__(cls)
-        return cls.files[identifier]
+        return (year, month, day, number)
 
     def __init__(self, night_date: date, number: int):
         from .night import Night
         self._night = Night(night_date.year, night_date.month, night_date.day)
         number_str = f"{number:03}"
         folder = self._night.path / "Log Files Combined"
-        candidates = list(folder.glob(f"*-{number_str}.txt"))
+        candidates = listing(folder).numbered(self.file_name_re, 3).get(number, [])
         if len(candidates) == 0:
             raise ValueError(f"Logfile no. {number_str} not found in {folder}")
         elif len(candidates) > 1:
             raise ValueError(f"Multiple candidates for no. {number_str} in {folder}")
         candidate = candidates[0]
         self._path = candidate
-        self._data = None
+        self._file = LogFileCombinedFile(candidate, use_cache=True)
 
     def is_valid_file_name(self):
         return bool(self.file_name_re.match(self.path.name))
@@ -51,13 +49,15 @@ class LogFileCombined:
 
     @property
     def data(self):
-        if self._data is None:
-            self._data = pd.read_csv(
-                self.path, skiprows=8, delimiter=r"\s{2,}", engine="python"
-            )
-            self._data.index = [i+1 for i in self._data.index]
-            self._data.index.name = "Star_no"
-        return self._data
+        return self._file.columns().frame()
+
+    @property
+    def file(self) -> LogFileCombinedFile:
+        """
+        Returns the file reader with array accessors (ADU by radius, sky ADU,
+        positions, per star rows) sharing the parsed data with `data`
+        """
+        return self._file
 
     @property
     def path(self):
@@ -0,0 +1,247 @@
+"""
+Listings of the folders of DATA_DRIVE, kept in memory and in the cache folder
+so that finding a night's files doesn't mean listing (or globbing) the same
+network folder over and over.
+
+A folder's listing is reused for as long as the folder's modification time is
+unchanged, which is the case until entries are added, removed or renamed in
+it. Checking that costs one `os.stat` of the folder instead of listing it.
+"""
+import os
+import pickle
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+
+import pandas as pd
+
+from trout.cache import cached_sidecars
+
+DirectoryEntry = namedtuple("DirectoryEntry", ["name", "is_dir", "mtime_ns", "size"])
+
+# Folder modification times have a coarse resolution on some file systems, a
+# listing taken this soon after the folder was modified might miss changes
+# made in the same tick and is listed again next time
+_MTIME_RESOLUTION_NS = 2 * 10**9
+
+_listings_lock = threading.Lock()
+_listings: Dict[str, "DirectoryListing"] = {}
+
+
+class DirectoryListing:
+    """
+    The entries of a folder at the time it was listed
+    """
+
+    def __init__(self, path: Path, mtime_ns: int, scanned_ns: int, entries) -> None:
+        self.path = Path(path)
+        self.mtime_ns = mtime_ns
+        self.scanned_ns = scanned_ns
+        self.entries: Tuple[DirectoryEntry, ...] = tuple(entries)
+        self._numbered = {}
+        self._by_name = None
+
+    def is_settled(self) -> bool:
+        """
+        Whether the listing was taken long enough after the folder was last
+        modified to be reused while the folder's modification time is unchanged
+        """
+        return self.scanned_ns - self.mtime_ns >= _MTIME_RESOLUTION_NS
+
+    def files(self) -> List[Path]:
+        return [self.path / e.name for e in self.entries if not e.is_dir]
+
+    def dirs(self) -> List[Path]:
+        return [self.path / e.name for e in self.entries if e.is_dir]
+
+    def glob(self, pattern: str) -> List[Path]:
+        """
+        Returns the paths of the entries whose name matches the shell style
+        `pattern`, like `Path.glob` without recursion
+        """
+        return [self.path / e.name for e in self.entries if fnmatch(e.name, pattern)]
+
+    def numbered(self, name_re: re.Pattern, group: int) -> Dict[int, List[Path]]:
+        """
+        Returns the paths of the files whose name matches `name_re` by the
+        number in the regex's capture `group` (e.g. the image number of log
+        files combined), in name order
+        """
+        key = (name_re.pattern, group)
+        if key not in self._numbered:
+            numbered = {}
+            for entry in sorted(self.entries):
+                if not entry.is_dir and (match := name_re.match(entry.name)):
+                    numbered.setdefault(int(match[group]), []).append(
+                        self.path / entry.name
+                    )
+            self._numbered[key] = numbered
+        return self._numbered[key]
+
+    def files_key(self, paths: Iterable[Path]) -> tuple:
+        """
+        Returns the absolute path of the folder and the (name, modification
+        time, size) of each of `paths` as listed, e.g. the key of data derived
+        from these files (see `trout.cache`). It changes when one of them is
+        added, removed or rewritten and the folder listed again, without
+        stat'ing the files. Files missing from the listing have no time or size
+        """
+        if self._by_name is None:
+            self._by_name = {entry.name: entry for entry in self.entries}
+        key = [os.path.abspath(self.path)]
+        for path in paths:
+            name = Path(path).name
+            entry = self._by_name.get(name)
+            key.append((name, entry.mtime_ns, entry.size) if entry else (name, None, None))
+        return tuple(key)
+
+    def __getstate__(self):
+        skipped = ("_numbered", "_by_name")
+        return {k: v for k, v in self.__dict__.items() if k not in skipped}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, _numbered={}, _by_name=None)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def _scan(path: Path, mtime_ns: int) -> DirectoryListing:
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            stat = entry.stat()
+            entries.append(
+                DirectoryEntry(
+                    entry.name, entry.is_dir(), stat.st_mtime_ns, stat.st_size
+                )
+            )
+    return DirectoryListing(path, mtime_ns, time.time_ns(), entries)
+
+
+def listing(folder: Union[str, Path]) -> DirectoryListing:
+    """
+    Returns the listing of `folder`, reusing the one in memory or in the
+    cache folder when the folder hasn't changed since it was listed. A folder
+    that doesn't exist has an empty listing.
+    """
+    path = os.path.abspath(folder)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return DirectoryListing(Path(folder), 0, 0, ())
+    with _listings_lock:
+        known = _listings.get(path)
+    if known is not None and known.mtime_ns == mtime_ns and known.is_settled():
+        return known
+
+    def load(sidecar):
+        with sidecar.open("rb") as fd:
+            return pickle.load(fd)
+
+    def write(result, tmp_path):
+        with tmp_path.open("wb") as fd:
+            pickle.dump(result, fd)
+
+    # Unsettled listings may miss changes, they're listed again next time
+    result = cached_sidecars(
+        (path, mtime_ns),
+        "manifest",
+        (".pkl",),
+        load,
+        lambda: _scan(Path(path), mtime_ns),
+        (write,),
+        keep=DirectoryListing.is_settled,
+    )
+    with _listings_lock:
+        _listings[path] = result
+    return result
+
+
+def clear() -> None:
+    """
+    Forgets the listings kept in memory, the ones in the cache folder stay
+    """
+    with _listings_lock:
+        _listings.clear()
+
+
+def walk(root: Union[str, Path], max_workers: int = 8) -> int:
+    """
+    Lists `root` and all folders below it, `max_workers` folders at a time,
+    so that later lookups in them are answered from the manifest.
+    Returns the number of folders listed
+    """
+    count = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = [Path(root)]
+        while pending:
+            listings = list(executor.map(listing, pending))
+            count += len(listings)
+            pending = [d for result in listings for d in result.dirs()]
+    return count
+
+
+def night_files(night_path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Returns a dataframe of the files of the night at `night_path` with their
+    kind (the folder they're in, e.g. "Log Files Combined"), image number,
+    star number and extraction radius where they apply, modification time
+    and size
+    """
+    from trout.intra.aligned_combined import AlignedCombined
+    from trout.intra.flux_log_combined import FluxLogCombined
+    from trout.intra.logfile_combined import LogFileCombined
+
+    image_files = {
+        "Aligned Combined": (AlignedCombined.file_name_re, 2),
+        "Log Files Combined": (LogFileCombined.file_name_re, 3),
+    }
+    radius_folders = {
+        FluxLogCombined.get_radius_folder_name(radius): radius for radius in range(1, 21)
+    }
+
+    rows = []
+
+    def add(folder: DirectoryListing, kind: str, image=None, star=None, radius=None):
+        for entry in folder.entries:
+            if not entry.is_dir:
+                row_image, row_star = image, star
+                if kind in image_files:
+                    name_re, group = image_files[kind]
+                    if match := name_re.match(entry.name):
+                        row_image = int(match[group])
+                elif radius is not None and kind.startswith("Flux Logs Combined"):
+                    if match := FluxLogCombined.file_name_re.match(entry.name):
+                        row_star = int(match[3])
+                rows.append(
+                    (
+                        folder.path / entry.name,
+                        kind,
+                        row_image,
+                        row_star,
+                        radius,
+                        entry.mtime_ns,
+                        entry.size,
+                    )
+                )
+
+    night = listing(night_path)
+    add(night, "")
+    for folder in night.dirs():
+        folder_listing = listing(folder)
+        add(folder_listing, folder.name)
+        for sub_folder in folder_listing.dirs():
+            add(listing(sub_folder), folder.name, radius=radius_folders.get(sub_folder.name))
+    df = pd.DataFrame(
+        rows,
+        columns=["path", "kind", "image", "star", "radius", "mtime_ns", "size"],
+    )
+    for column in ("image", "star", "radius"):
+        df[column] = df[column].astype("Int64")
+    return df
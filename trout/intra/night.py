@@ -1,19 +1,88 @@
 from datetime import date, datetime, timedelta
 from functools import total_ordering
-from typing import Iterable, Union
+from pathlib import Path
+from typing import Callable, Iterable, List, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from trout.bg import get_next_astonomical_sunrise, get_next_astonomical_sunset
-from trout.intra.aligned_combined import AlignedCombined
+from trout.cache import cached_frame, cached_payload
+from trout.files.logfile_combined_file import LogFileCombinedColumns
+from trout.files.text_table import read_titled_table
+from trout.intra.aligned_combined import (
+    AlignedCombined,
+    ImageStack,
+    aligned_combined_key,
+    read_aligned_combined_stack,
+)
+from trout.intra.flux_cube import FluxCube, flux_logs_key, read_flux_cube
 from trout.intra.flux_log_combined import FluxLogCombined
+from trout.intra.frames import AlignedFrames, RawCalibratedFrames
+from trout.intra.light_curve import (
+    LogFileCube,
+    logfiles_combined_key,
+    read_logfile_cube,
+)
 from trout.intra.logfile_combined import LogFileCombined
+from trout.intra.manifest import listing
+from trout.intra.registry import Registry
 from trout.moon import moon_distance, phase, position
 from trout.nights import bad_nights
 
 
+def refine_sky_bg(
+    df: pd.DataFrame,
+    all=False,
+    cluster_angles_round: Union[int, Iterable[int]] = None,
+    angle_status=None,
+    group_by=None,
+    twilight_removed=True,
+    columns=None,
+) -> pd.DataFrame:
+    """
+    Return the sky background dataframe `df` filtered by the provided
+    parameters, see `Night.get_sky_bg_refined`. When `df` holds several nights
+    (indexed by night and image), `group_by` aggregates each night separately
+    """
+    if twilight_removed:
+        df = df[(df["Date"] > df["Sunset"]) & (df["Date"] < df["Sunrise"])]
+    if cluster_angles_round:
+        if type(cluster_angles_round) is int:
+            cluster_angles_round = [cluster_angles_round]
+        df = df[df["Cluster_Angle_Round"].isin(cluster_angles_round)]
+    if angle_status:
+        df = df[df["Angle_status"] == angle_status]
+    if group_by in ("median", "mean") and df.index.nlevels > 1:
+        df = getattr(df.groupby(level=0), group_by)(numeric_only=True)
+    elif group_by == "median":
+        df = df.median()
+    elif group_by == "mean":
+        df = df.mean()
+    if not all or columns:
+        if not columns:
+            # Trim out extra cols
+            columns = df.columns[:33]
+        df = df[columns]
+    return df
+
+
+def read_color_normalized(path: Path) -> pd.DataFrame:
+    """
+    Reads the Color Normalized file at `path`, indexed by star number
+    """
+    return read_titled_table(path, titles_row=2, index_col=0)
+
+
+def read_alignment_stats(path: Path) -> pd.DataFrame:
+    """
+    Reads the aligned stats file at `path`
+    """
+    return pd.read_csv(path, delim_whitespace=True)
+
+
 @total_ordering
-class Night:
+class Night(metaclass=Registry):
     NAME_FORMAT = "%B %d, %Y"
 
     @classmethod
@@ -29,17 +98,13 @@ class Night:
         except ValueError:
             return False
 
-    def __new__(cls, year: int, month: int, day: int):
+    @classmethod
+    def registry_key(cls, year: int, month: int, day: int, year_instance=None):
         """
-        Ensures each night instance is a singleton.
+        Ensures each night instance is a singleton, see `Registry`
         """
-        if not hasattr(cls, "years"):
-            cls.nights = {}
         assert (type(year), type(month), type(day)) == (int,) * 3
-        night_name = cls.make_night_name(year, month, day)
-        if not cls.nights.get(night_name):
-            cls.nights[night_name] = super(Night, cls).__new__(cls)
-        return cls.nights[night_name]
+        return cls.make_night_name(year, month, day)
 
     def __init__(self, year, month, day, year_instance=None):
         from .year import Year
@@ -56,11 +121,11 @@ class Night:
                 f"{self._night_name} doesn't exist in {year_instance.path}"
             )
         self._year = year_instance
+        # (folder listing, files) pairs, the files are found again when the
+        # folder's listing changes. Data is kept by `trout.cache` instead so
+        # that it's dropped when over the memory budget
         self._aligned_combined = None
         self._logfiles_combined = None
-        self._sky_bg = None
-        self._alignment_stats = None
-        self._color_normalized = {}
 
     def is_bad(self):
         """
@@ -89,29 +154,81 @@ class Night:
     def get_all_star_fluxlog_for_radius(self, star_no, radius: int):
         return FluxLogCombined(self.night_date, star_no, radius, all=True)
 
+    def flux_cube(self, radius: int, all=False, max_workers: int = 8) -> FluxCube:
+        """
+        Returns the flux of all stars in all images of the night for the
+        extraction `radius` as a `FluxCube` (stars by images array with the
+        star numbers, image numbers and image times).
+
+        The radius folder is listed once and the flux logs are read in
+        parallel by `max_workers` threads, the cube is then cached on disk so
+        later calls only memory map it. Image times come from the night's sky
+        background and are NaT if it can't be read.
+
+        param: all: whether to read from "Flux Logs Combined(All)"
+        """
+        folder = (
+            self.path
+            / ("Flux Logs Combined(All)" if all else "Flux Logs Combined")
+            / FluxLogCombined.get_radius_folder_name(radius)
+        )
+        if not folder.exists():
+            raise ValueError(f"{folder} doesn't exist")
+
+        def load():
+            cube = read_flux_cube(folder, max_workers=max_workers)
+            return cube._replace(times=self._image_times(cube.images))
+
+        return cached_payload(("flux_cube", *flux_logs_key(folder)), load)
+
+    def logfile_cube(self, max_workers: int = 8) -> LogFileCube:
+        """
+        Returns the Log Files Combined of the night as a `LogFileCube` (images
+        by stars by columns array with the image numbers, column titles and
+        image times), e.g. `cube.values[:, star_no - 1]` for a star's rows in
+        all images.
+
+        The log files are read in parallel by `max_workers` threads the first
+        time and the cube is then cached on disk like `flux_cube`. Image times
+        come from the night's sky background and are NaT if it can't be read.
+        """
+        folder = self.path / "Log Files Combined"
+        if not folder.exists():
+            raise ValueError(f"{folder} doesn't exist")
+
+        def load():
+            cube = read_logfile_cube(folder, max_workers=max_workers)
+            return cube._replace(times=self._image_times(cube.images))
+
+        return cached_payload(("logfile_cube", *logfiles_combined_key(folder)), load)
+
+    def _image_times(self, images: np.ndarray) -> np.ndarray:
+        """
+        Returns the time each image in `images` was taken from the sky
+        background, NaT for all images if it can't be read
+        """
+        try:
+            dates = self.sky_bg["Date"]
+            return dates.reindex(images).to_numpy(dtype="datetime64[ns]")
+        except Exception:
+            # Nights without (a single) sky background file have no times
+            return np.full(len(images), np.datetime64("NaT"), dtype="datetime64[ns]")
+
     def get_color_normalized(self, radius: int):
-        if self._color_normalized.get(radius, None) is None:
-            folder = (
-                self.path
-                / "Color Normalized"
-                / FluxLogCombined.get_radius_folder_name(radius)
-            )
-            if not folder.exists():
-                raise Exception(folder, "doesn't exist")
-            candidates = list(folder.glob("*.txt"))
-            if len(candidates) == 0:
-                raise Exception("No matching file found.")
-            elif len(candidates) > 1:
-                raise Exception("Multiple candidates found")
-            candidate = candidates[0]
-            self._color_normalized[radius] = pd.read_csv(
-                candidate,
-                skiprows=2,
-                delimiter=r"\s{2,}",
-                engine="python",
-                index_col=0,
-            )  # C-engine doesn't support regex delimiter
-        return self._color_normalized[radius]
+        folder = (
+            self.path
+            / "Color Normalized"
+            / FluxLogCombined.get_radius_folder_name(radius)
+        )
+        if not folder.exists():
+            raise Exception(folder, "doesn't exist")
+        candidates = listing(folder).glob("*.txt")
+        if len(candidates) == 0:
+            raise Exception("No matching file found.")
+        elif len(candidates) > 1:
+            raise Exception("Multiple candidates found")
+        candidate = candidates[0]
+        return cached_frame(candidate, "color_normalized", read_color_normalized)
 
     def get_sky_bg_refined(
         self,
@@ -126,25 +243,15 @@ class Night:
         Return dataframe filtered by the the provided parameters. When
         parameters are unspecified, the entire dataset is returned
         """
-        df = self.sky_bg
-        if twilight_removed:
-            df = df[(df["Date"] > df["Sunset"]) & (df["Date"] < df["Sunrise"])]
-        if cluster_angles_round:
-            if type(cluster_angles_round) is int:
-                cluster_angles_round = [cluster_angles_round]
-            df = df[df["Cluster_Angle_Round"].isin(cluster_angles_round)]
-        if angle_status:
-            df = df[df["Angle_status"] == angle_status]
-        if group_by == "median":
-            df = df.median()
-        elif group_by == "mean":
-            df = df.mean()
-        if not all or columns:
-            if not columns:
-                # Trim out extra cols
-                columns = df.columns[:33]
-            df = df[columns]
-        return df
+        return refine_sky_bg(
+            self.sky_bg,
+            all=all,
+            cluster_angles_round=cluster_angles_round,
+            angle_status=angle_status,
+            group_by=group_by,
+            twilight_removed=twilight_removed,
+            columns=columns,
+        )
 
     @property
     def stats(self):
@@ -156,92 +263,150 @@ class Night:
 
     @property
     def sky_bg(self):
-        if self._sky_bg is None:
-            folder = self.path / "Sky background"
-            candidates = list(folder.glob("*.txt"))
-            if len(candidates) == 0:
-                raise Exception("No matching file found.")
-            elif len(candidates) > 1:
-                raise Exception("Multiple candidates found")
-            candidate = candidates[0]
-            s = pd.read_csv(candidate, delim_whitespace=True)
-            s.index = s["Image_number"]
-            s.index.name = "Img"
-            # Add columns for twilight
-            # Add column for whether the cluster angle is increasing or decreasing
-            s["Angle_status"] = [
-                ""
-                if index == 0
-                else "INC"
-                if s["Cluster_Angle"][i - 1] < s["Cluster_Angle"][i]
-                else "DEC"
-                for index, i in enumerate(s["Cluster_Angle"].index)
-            ]  # noqa
-            # Add DateOnly column
-            s.Date = pd.to_datetime(s["Date"], format="%Y-%m-%dT%H:%M:%S")
-            # Since we've found a bug in the data processing code for moon distance calculation
-            # we recalculate moon distance. This is temporary until data is reprocessed
-            s["Moon_Distance"] = list(map(moon_distance, s.Date))
-            s["DateOnly"] = s["Date"].apply(lambda x: x.date())
-            # We started taking data on the night of self.night_date,
-            # We want to get the sunrise of the next day since that's what we'll run into
-            s["Sunrise"] = get_next_astonomical_sunrise(
-                self.night_date + timedelta(days=1)
+        folder = self.path / "Sky background"
+        candidates = listing(folder).glob("*.txt")
+        if len(candidates) == 0:
+            raise Exception("No matching file found.")
+        elif len(candidates) > 1:
+            raise Exception("Multiple candidates found")
+        candidate = candidates[0]
+        return cached_frame(candidate, "sky_bg", self._read_sky_bg)
+
+    def _read_sky_bg(self, path: Path) -> pd.DataFrame:
+        """
+        Reads the sky background file at `path` and derives the extra columns
+        """
+        s = pd.read_csv(path, delim_whitespace=True)
+        s.index = s["Image_number"]
+        s.index.name = "Img"
+        # Add columns for twilight
+        # Add column for whether the cluster angle is increasing or decreasing
+        # compared to the previous image
+        angle = s["Cluster_Angle"].to_numpy()
+        s["Angle_status"] = np.concatenate(
+            [[""], np.where(angle[:-1] < angle[1:], "INC", "DEC")]
+        )[: len(s)]
+        # Add DateOnly column
+        s.Date = pd.to_datetime(s["Date"], format="%Y-%m-%dT%H:%M:%S")
+        # Since we've found a bug in the data processing code for moon distance calculation
+        # we recalculate moon distance. This is temporary until data is reprocessed
+        s["Moon_Distance"] = moon_distance(s.Date.to_numpy())
+        s["DateOnly"] = s["Date"].dt.date
+        # We started taking data on the night of self.night_date,
+        # We want to get the sunrise of the next day since that's what we'll run into
+        s["Sunrise"] = get_next_astonomical_sunrise(self.night_date + timedelta(days=1))
+        # We want to get the sunset of the dawn we start taking data
+        s["Sunset"] = get_next_astonomical_sunset(
+            datetime(
+                year=self.night_date.year,
+                month=self.night_date.month,
+                day=self.night_date.day,
+                hour=10,  # By providing hour, to ensure we don't get sunset from previous day
             )
-            # We want to get the sunset of the dawn we start taking data
-            s["Sunset"] = get_next_astonomical_sunset(
-                datetime(
-                    year=self.night_date.year,
-                    month=self.night_date.month,
-                    day=self.night_date.day,
-                    hour=10,  # By providing hour, to ensure we don't get sunset from previous day
+        )
+        columns = (
+            list(s.columns[:1])
+            + list(s.columns[-4:])
+            + list(s.columns[1:32])
+            + list(s.columns[32:-4])
+        )
+        return s[columns]
+
+    def cached_file_readers(self, flux_logs=False) -> List[Tuple[Path, Callable]]:
+        """
+        Returns the (path, read) pairs of the night's text files that are
+        stored in the cache folder once read, `read(path)` reading the file
+        through the cache. Used to prebuild the cache, see `Year.warm_cache`.
+
+        param: flux_logs: whether to include the flux log combined files,
+            which are by far the most numerous
+        """
+
+        def frame_reader(kind, read):
+            return lambda path: cached_frame(path, kind, read)
+
+        readers = []
+        for f in listing(self.path / "Sky background").glob("*.txt"):
+            readers.append((f, frame_reader("sky_bg", self._read_sky_bg)))
+        for f in listing(self.path).glob("*aligned_stats*.txt"):
+            readers.append((f, frame_reader("alignment_stats", read_alignment_stats)))
+        for folder in listing(self.path / "Color Normalized").dirs():
+            for f in listing(folder).glob("*.txt"):
+                readers.append(
+                    (f, frame_reader("color_normalized", read_color_normalized))
                 )
-            )
-            columns = (
-                list(s.columns[:1])
-                + list(s.columns[-4:])
-                + list(s.columns[1:32])
-                + list(s.columns[32:-4])
-            )
-            s = s[columns]
-            self._sky_bg = s
-        return self._sky_bg
+        for f in listing(self.path / "Log Files Combined").glob("*.txt"):
+            readers.append((f, LogFileCombinedColumns.read_cached))
+        if flux_logs:
+            for folder in listing(self.path).glob("Flux Logs Combined*"):
+                for radius_folder in listing(folder).dirs():
+                    for f in listing(radius_folder).glob("*_flux.txt"):
+                        readers.append(
+                            (f, frame_reader("flux_log_combined", FluxLogCombined.read))
+                        )
+        return readers
 
     @property
     def alignment_stats(self):
-        if self._alignment_stats is None:
-            candidates = list(self.path.glob("*aligned_stats*.txt"))
-            if len(candidates) == 0:
-                raise Exception("No matching file found.")
-            elif len(candidates) > 1:
-                raise Exception("Multiple candidates found")
-            candidate = candidates[0]
-            self._alignment_stats = pd.read_csv(candidate, delim_whitespace=True)
-        return self._alignment_stats
+        candidates = listing(self.path).glob("*aligned_stats*.txt")
+        if len(candidates) == 0:
+            raise Exception("No matching file found.")
+        elif len(candidates) > 1:
+            raise Exception("Multiple candidates found")
+        candidate = candidates[0]
+        return cached_frame(candidate, "alignment_stats", read_alignment_stats)
 
     @property
     def aligned_combined(self):
-        if self._aligned_combined is None:
-            folder = self.path / "Aligned Combined"
+        folder = listing(self.path / "Aligned Combined")
+        if self._aligned_combined is None or self._aligned_combined[0] is not folder:
             files = []
-            for f in folder.glob("*.fit"):
-                file_name = f.name
-                img_number = AlignedCombined.extract_image_number(file_name)
+            numbered = folder.numbered(AlignedCombined.file_name_re, 2)
+            for img_number in numbered:
                 files.append(AlignedCombined(self.night_date, img_number))
-            self._aligned_combined = tuple(files)
-        return sorted(self._aligned_combined)
+            self._aligned_combined = (folder, tuple(files))
+        return sorted(self._aligned_combined[1])
+
+    def aligned_combined_stack(self) -> ImageStack:
+        """
+        Returns all aligned combined images of the night as one (images, rows,
+        columns) memory mapped array with the image numbers, see
+        `read_aligned_combined_stack`. Only the parts of the images used are
+        read into memory, e.g. `stack.data[:, 400:420, 700:720]` for a star
+        across the night.
+        """
+        folder = self.path / "Aligned Combined"
+        return cached_payload(
+            ("aligned_combined_stack", *aligned_combined_key(folder)),
+            lambda: read_aligned_combined_stack(folder),
+        )
+
+    @property
+    def aligned_frames(self) -> AlignedFrames:
+        """
+        Returns the frames in the night's Aligned folder, read lazily one or a
+        chunk at a time, see `trout.intra.frames`
+        """
+        return AlignedFrames(self)
+
+    @property
+    def raw_calibrated_frames(self) -> RawCalibratedFrames:
+        """
+        Returns the frames in the night's Raw Calibrated Images folder, read
+        lazily one or a chunk at a time, see `trout.intra.frames`
+        """
+        return RawCalibratedFrames(self)
 
     @property
     def logfile_combined(self):
-        if self._logfiles_combined is None:
-            folder = self.path / "Log Files Combined"
+        folder = listing(self.path / "Log Files Combined")
+        if self._logfiles_combined is None or self._logfiles_combined[0] is not folder:
             files = []
-            for f in folder.glob("*.txt"):
-                file_name = f.name
-                img_number = LogFileCombined.extract_image_number(file_name)
+            numbered = folder.numbered(LogFileCombined.file_name_re, 3)
+            for img_number in numbered:
                 files.append(LogFileCombined(self.night_date, img_number))
-            self._logfiles_combined = tuple(files)
-        return sorted(self._logfiles_combined)
+            self._logfiles_combined = (folder, tuple(files))
+        return sorted(self._logfiles_combined[1])
 
     @property
     def path(self):
@@ -0,0 +1,192 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Tuple, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from trout.files.reference_log_file import ReferenceLogFile
+
+# `adu` is the (n_images, n_radii, n_stars) array of sky subtracted star ADU,
+# `sky_adu` the (n_images, n_stars) median ADU of the pixels in each star's
+# sky annulus and `area` the (n_radii, n_stars) number of pixels in each
+# star's aperture. `radii` are the aperture radii of the second axis of `adu`.
+ApertureADU = namedtuple("ApertureADU", ["adu", "sky_adu", "area", "radii"])
+
+DEFAULT_SKY_ANNULUS = (8, 12)
+
+
+class Apertures:
+    """
+    Circular apertures and sky annuli around a set of star positions,
+    precomputed once so that any number of images can be measured with a few
+    array operations.
+
+    A pixel belongs to an aperture of radius r when its center is within r
+    pixels of the star (no partial pixels) and to the sky annulus (inner,
+    outer) when its center is more than `inner` and at most `outer` pixels
+    away. Pixel (row, column) of an image has its center at x = column,
+    y = row. Pixels outside the image are left out. Stars with a NaN position
+    (not found) have no pixels and NaN ADU.
+    """
+
+    def __init__(
+        self,
+        x: npt.ArrayLike,
+        y: npt.ArrayLike,
+        radii: Iterable[float],
+        image_shape: Tuple[int, int],
+        sky_annulus: Tuple[float, float] = DEFAULT_SKY_ANNULUS,
+    ) -> None:
+        x, y = np.asarray(x, dtype="float"), np.asarray(y, dtype="float")
+        self.radii = tuple(radii)
+        if not self.radii:
+            raise ValueError("No aperture radii")
+        self.sky_annulus = tuple(sky_annulus)
+        inner, outer = self.sky_annulus
+        if not inner < outer:
+            raise ValueError(f"Invalid sky annulus {sky_annulus}")
+        half = int(np.ceil(max(*self.radii, outer)))
+        offsets = np.arange(-half, half + 1)
+
+        # Stars not found get their box at the origin with no pixels inside
+        found = np.isfinite(x) & np.isfinite(y)
+        x, y = np.where(found, x, 0), np.where(found, y, 0)
+
+        # (n_stars, box) rows and columns of the box of pixels around each star
+        rows = np.rint(y)[:, np.newaxis].astype(int) + offsets
+        cols = np.rint(x)[:, np.newaxis].astype(int) + offsets
+        n_rows, n_cols = image_shape
+        inside = ((rows >= 0) & (rows < n_rows))[:, :, np.newaxis] & (
+            (cols >= 0) & (cols < n_cols)
+        )[:, np.newaxis, :]
+        inside &= found[:, np.newaxis, np.newaxis]
+        distance = np.hypot(
+            (rows - y[:, np.newaxis])[:, :, np.newaxis],
+            (cols - x[:, np.newaxis])[:, np.newaxis, :],
+        )
+        self._rows = np.clip(rows, 0, n_rows - 1)
+        self._cols = np.clip(cols, 0, n_cols - 1)
+        self.image_shape = tuple(image_shape)
+
+        # (n_radii, n_stars, box, box) aperture weights
+        self._masks = np.stack(
+            [(distance <= radius) & inside for radius in self.radii]
+        ).astype("float32")
+        self.area = self._masks.sum(axis=(2, 3))
+
+        # Flat (within the box) indices of each star's sky pixels, padded with
+        # the index of an extra NaN pixel so all stars have the same number
+        annulus = (distance > inner) & (distance <= outer) & inside
+        annulus = annulus.reshape(len(x), -1)
+        self._sky_counts = annulus.sum(axis=1)
+        box_size = annulus.shape[1]
+        order = np.argsort(~annulus, axis=1, kind="stable")[:, : self._sky_counts.max(initial=1)]
+        padding = np.arange(order.shape[1]) >= self._sky_counts[:, np.newaxis]
+        self._sky_indices = np.where(padding, box_size, order)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _measure_batch(self, images: npt.NDArray) -> Tuple[npt.NDArray, npt.NDArray]:
+        # (n_images, n_stars, box, box) pixels around each star
+        boxes = np.asarray(
+            images[:, self._rows[:, :, np.newaxis], self._cols[:, np.newaxis, :]],
+            dtype="float32",
+        )
+        n_images, n_stars = boxes.shape[:2]
+        flat = boxes.reshape(n_images, n_stars, -1)
+        flat = np.concatenate([flat, np.full((n_images, n_stars, 1), np.nan, "float32")], 2)
+        sky_pixels = np.take_along_axis(flat, self._sky_indices[np.newaxis], axis=2)
+        # NaN sorts last so the median of star i is in its first counts[i] values
+        sky_pixels.sort(axis=2)
+        counts = np.maximum(self._sky_counts, 1)[np.newaxis, :, np.newaxis]
+        low = np.take_along_axis(sky_pixels, (counts - 1) // 2, axis=2)
+        high = np.take_along_axis(sky_pixels, counts // 2, axis=2)
+        sky_adu = ((low + high) / 2)[:, :, 0].astype("float")
+        # No sky pixels, e.g. stars not found, gives NaN sky and so NaN ADU
+        sky_adu[:, self._sky_counts == 0] = np.nan
+
+        totals = np.einsum("inab,rnab->irn", boxes, self._masks, dtype="float")
+        adu = totals - sky_adu[:, np.newaxis, :] * self.area[np.newaxis]
+        return adu, sky_adu
+
+    def measure(
+        self, images: npt.ArrayLike, batch_size: int = 8, max_workers: int = 1
+    ) -> ApertureADU:
+        """
+        Measures the ADU of all stars in `images`, a single image or an
+        (n_images, rows, columns) array such as a memory mapped
+        `Night.aligned_combined_stack`.
+
+        param: batch_size: number of images measured together, memory use grows
+            with batch_size * n_stars * (2 * outer sky radius + 1) ** 2
+        param: max_workers: number of threads measuring batches in parallel
+        """
+        images = np.asanyarray(images)
+        single = images.ndim == 2
+        if single:
+            images = images[np.newaxis]
+        if images.shape[1:] != self.image_shape:
+            raise ValueError(
+                f"Images of shape {images.shape[1:]} don't match {self.image_shape}"
+            )
+        batches = [
+            images[start:start + batch_size] for start in range(0, len(images), batch_size)
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(self._measure_batch, batches))
+        if results:
+            adu = np.concatenate([a for a, _ in results])
+            sky_adu = np.concatenate([s for _, s in results])
+        else:
+            adu = np.empty((0, len(self.radii), len(self)))
+            sky_adu = np.empty((0, len(self)))
+        if single:
+            adu, sky_adu = adu[0], sky_adu[0]
+        return ApertureADU(adu, sky_adu, self.area, self.radii)
+
+
+def reference_positions() -> Tuple[npt.NDArray, npt.NDArray]:
+    """
+    Returns the x and y positions of all stars in the reference file, the ith
+    values being those of star i + 1
+    """
+    reference = ReferenceLogFile.get_ref_revised_71()
+    return reference.get_x_position_column(), reference.get_y_position_column()
+
+
+def aperture_photometry(
+    images: npt.ArrayLike,
+    radii: Union[float, Iterable[float]],
+    x: Union[npt.ArrayLike, None] = None,
+    y: Union[npt.ArrayLike, None] = None,
+    sky_annulus: Tuple[float, float] = DEFAULT_SKY_ANNULUS,
+    batch_size: int = 8,
+    max_workers: int = 1,
+) -> ApertureADU:
+    """
+    Measures the sky subtracted ADU of stars in `images` for each aperture in
+    `radii`, see `Apertures`.
+
+    param: images: an image or an (n_images, rows, columns) array of aligned
+        images, e.g. `AlignedCombined.data` or `Night.aligned_combined_stack().data`
+    param: radii: aperture radius or radii in pixels
+    param: x, y (optional): star positions, e.g. from
+        `LogFileCombinedFile.get_x_position_column`. Defaults to the positions
+        in the reference file, which the aligned images are aligned to
+    param: sky_annulus: (inner, outer) radii of the sky annulus
+
+    Example:
+
+        stack = night.aligned_combined_stack()
+        result = aperture_photometry(stack.data, radii=[3, 4, 5], max_workers=4)
+        result.adu[:, 1, 0]  # Star 1's 4 pixel ADU in every image of the night
+    """
+    if np.ndim(radii) == 0:
+        radii = [radii]
+    if x is None or y is None:
+        x, y = reference_positions()
+    images = np.asanyarray(images)
+    apertures = Apertures(x, y, radii, images.shape[-2:], sky_annulus=sky_annulus)
+    return apertures.measure(images, batch_size=batch_size, max_workers=max_workers)
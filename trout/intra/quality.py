@@ -0,0 +1,147 @@
+"""
+Quality metrics of every image of a night or season in one table, computed
+from the files the pipeline already writes: the Log Files Combined (through
+the night's log file cube, see `Night.logfile_cube`), the sky background and
+the aligned stats.
+"""
+import re
+import warnings
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from trout.cache import cached_payload, cached_sidecars
+from trout.files.logfile_combined_file import LogFileCombinedColumns
+from trout.intra.light_curve import logfiles_combined_key
+from trout.intra.manifest import listing
+from trout.intra.year import Year
+
+SKY_BG_QUALITY_COLUMNS = ["Date", "Moon_Distance", "Cluster_Angle"]
+_IMAGE_COLUMN_RE = re.compile(r"^(image|img)", re.IGNORECASE)
+
+
+def _source_keys(night) -> tuple:
+    """
+    Returns the keys of the files the night's quality table is computed from,
+    which change whenever one of them does
+    """
+    sky_bg = listing(night.path / "Sky background")
+    night_folder = listing(night.path)
+    return (
+        logfiles_combined_key(night.path / "Log Files Combined"),
+        sky_bg.files_key(sky_bg.glob("*.txt")),
+        night_folder.files_key(night_folder.glob("*aligned_stats*.txt")),
+    )
+
+
+def _alignment_columns(night) -> pd.DataFrame:
+    """
+    Returns the numeric columns of the night's aligned stats indexed by image
+    number (by row order when the file has no image number column), with
+    "Alignment " prefixed to their names
+    """
+    stats = night.alignment_stats
+    image_columns = [c for c in stats.columns if _IMAGE_COLUMN_RE.match(str(c))]
+    if image_columns:
+        stats = stats.set_index(image_columns[0])
+    else:
+        stats = stats.set_index(pd.RangeIndex(1, len(stats) + 1))
+    stats = stats.select_dtypes("number")
+    stats.columns = [f"Alignment {c}" for c in stats.columns]
+    return stats
+
+
+def _compute_image_quality(night, radius: int, max_workers: int) -> pd.DataFrame:
+    cube = night.logfile_cube(max_workers=max_workers)
+    adu_title = f"Star ADU {radius}"
+    if adu_title not in cube.titles:
+        raise ValueError(f"No {adu_title} column in the log files combined of {night}")
+    columns = [
+        cube.titles.index(adu_title),
+        LogFileCombinedColumns.avg_fwhm_column,
+        LogFileCombinedColumns.sky_adu_column,
+    ]
+    adu, fwhm, sky_adu = np.moveaxis(cube.values[:, :, columns], 2, 0)
+    detected = adu > 0
+    with warnings.catch_warnings():
+        # Images without any star found have NaN medians
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median_fwhm = np.nanmedian(np.where(detected, fwhm, np.nan), axis=1)
+        median_sky_adu = np.nanmedian(np.where(detected, sky_adu, np.nan), axis=1)
+
+    df = pd.DataFrame(
+        {
+            "Stars": detected.sum(axis=1),
+            "Median FWHM": median_fwhm,
+            "Median Sky ADU": median_sky_adu,
+        },
+        index=pd.Index(cube.images, name="Img"),
+    )
+    try:
+        sky_bg = night.sky_bg[SKY_BG_QUALITY_COLUMNS].reindex(cube.images)
+    except Exception:
+        # Nights without (a single) sky background file
+        sky_bg = pd.DataFrame(
+            {"Date": pd.NaT, "Moon_Distance": np.nan, "Cluster_Angle": np.nan},
+            index=cube.images,
+        )
+    df = pd.concat([sky_bg.set_axis(df.index), df], axis=1)
+    try:
+        alignment = _alignment_columns(night).reindex(cube.images)
+        for column in alignment.columns:
+            df[column] = alignment[column].to_numpy()
+    except Exception:
+        # Nights without (a single readable) aligned stats file
+        pass
+    return df
+
+
+def image_quality(night, radius: int = 4, max_workers: int = 8) -> pd.DataFrame:
+    """
+    Returns quality metrics of every image of `night` as a dataframe indexed
+    by image number: the time it was taken, moon distance and cluster angle
+    (from the sky background), the number of stars found (nonzero ADU for the
+    extraction `radius`), the median average FWHM and sky ADU of those stars
+    (from the Log Files Combined) and the numeric columns of the aligned stats
+    prefixed with "Alignment ".
+
+    Columns from a missing sky background or aligned stats file are NaN or
+    left out. The table is kept in memory and in the cache folder (see
+    `trout.cache`) until one of the files it's computed from changes.
+    """
+    key = (*_source_keys(night), radius)
+    return cached_payload(
+        ("image_quality", *key),
+        lambda: cached_sidecars(
+            key,
+            "image_quality",
+            (".pkl",),
+            pd.read_pickle,
+            lambda: _compute_image_quality(night, radius, max_workers),
+            (lambda df, tmp_path: df.to_pickle(tmp_path),),
+        ),
+    )
+
+
+def image_quality_for_years(
+    years: Iterable[int], radius: int = 4, max_workers: int = 8
+) -> pd.DataFrame:
+    """
+    Returns the `image_quality` of all nights in `years` as one dataframe
+    indexed by (night, image), nights being computed in parallel by
+    `max_workers` threads.
+
+    Nights whose table can't be computed (e.g. without Log Files Combined) are
+    left out, the failures of `Year.map_nights` are in the returned
+    dataframe's `attrs`.
+    """
+    frames, failures = Year.map_nights(
+        lambda night: image_quality(night, radius=radius, max_workers=1),
+        years,
+        max_workers,
+        "compute image quality",
+    )
+    df = pd.concat(frames, names=["night", "image"]) if frames else pd.DataFrame()
+    df.attrs["failures"] = failures
+    return df
@@ -0,0 +1,78 @@
+import threading
+import weakref
+from typing import Hashable
+
+
+class Registry(type):
+    """
+    Metaclass of classes with one instance per identifier (e.g. one `Night`
+    per night date), so that `Night(2011, 7, 14)` always returns the same
+    object.
+
+    Classes define `registry_key(cls, *args, **kwargs)` returning the
+    identifier of the instance for the constructor arguments. Instances are
+    created and initialized once per identifier, also when several threads
+    ask for the same identifier at the same time: they wait for the first one
+    to finish and get its instance. If `__init__` raises, no instance is
+    registered and the next call tries again.
+    """
+
+    _classes = weakref.WeakSet()
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls._instances = {}
+        # Identifier to [lock, number of callers using it], the lock is
+        # dropped once no caller is waiting for it
+        cls._key_locks = {}
+        cls._registry_lock = threading.Lock()
+        Registry._classes.add(cls)
+
+    def registry_key(cls, *args, **kwargs) -> Hashable:
+        raise NotImplementedError(f"{cls.__name__} must define registry_key")
+
+    def __call__(cls, *args, **kwargs):
+        key = cls.registry_key(*args, **kwargs)
+        instance = cls._instances.get(key)
+        if instance is not None:
+            return instance
+        with cls._registry_lock:
+            key_lock = cls._key_locks.setdefault(key, [threading.RLock(), 0])
+            key_lock[1] += 1
+        try:
+            with key_lock[0]:
+                instance = cls._instances.get(key)
+                if instance is None:
+                    instance = super().__call__(*args, **kwargs)
+                    with cls._registry_lock:
+                        cls._instances[key] = instance
+        finally:
+            with cls._registry_lock:
+                key_lock[1] -= 1
+                if key_lock[1] == 0 and cls._key_locks.get(key) is key_lock:
+                    del cls._key_locks[key]
+        return instance
+
+    def registered(cls) -> dict:
+        """
+        Returns a copy of the identifier to instance map of the class
+        """
+        with cls._registry_lock:
+            return dict(cls._instances)
+
+    def clear_registry(cls) -> None:
+        """
+        Forgets the instances of the class, later calls create new ones
+        """
+        with cls._registry_lock:
+            cls._instances.clear()
+            cls._key_locks.clear()
+
+
+def clear_registries() -> None:
+    """
+    Forgets the instances of all registry classes, e.g. after changing
+    DATA_DRIVE
+    """
+    for cls in list(Registry._classes):
+        cls.clear_registry()
@@ -0,0 +1,163 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+from astropy.io import fits
+
+from trout.cache import cached_sidecars, save_array
+from trout.files.logfile_combined_file import LogFileCombinedColumns
+from trout.files.reference_log_file import ReferenceLogFile
+from trout.intra.aligned_combined import (
+    aligned_combined_key,
+    read_cutout,
+    scan_aligned_combined,
+)
+from trout.intra.logfile_combined import LogFileCombined
+from trout.intra.manifest import listing
+
+REFERENCE_POSITIONS = "reference"
+LOGFILE_POSITIONS = "logfile"
+
+# `stamps` is the (n_images, 2 * radius, 2 * radius) float32 array of cutouts
+# around the star, NaN outside the image (or for images where the star's
+# position is unknown). `metadata` has one row per stamp with the night,
+# image number, the star's position (x, y) and the position in the image of
+# the stamp's first pixel (x_start, y_start).
+StarStamps = namedtuple("StarStamps", ["stamps", "metadata"])
+
+
+def _logfile_paths(night) -> Dict[int, Path]:
+    """
+    Returns the path of the log file combined of each image of the night
+    """
+    folder = listing(night.path / "Log Files Combined")
+    numbered = folder.numbered(LogFileCombined.file_name_re, 3)
+    return {image: paths[0] for image, paths in numbered.items()}
+
+
+def _logfile_positions(night, star_no: int) -> Dict[int, Tuple[float, float]]:
+    """
+    Returns the position of `star_no` in each image of the night according to
+    its Log Files Combined, stars not found in an image have position (0, 0)
+    in the log file and are left out
+    """
+    positions = {}
+    for image, path in _logfile_paths(night).items():
+        columns = LogFileCombinedColumns.read_cached(path)
+        if 1 <= star_no <= len(columns):
+            x, y = columns.x()[star_no - 1], columns.y()[star_no - 1]
+            if x != 0 or y != 0:
+                positions[image] = (x, y)
+    return positions
+
+
+def _extract(task, radius: int):
+    path, (x, y) = task
+    stamp = np.full((2 * radius, 2 * radius), np.nan, dtype="float32")
+    if np.isnan(x) or np.isnan(y):
+        return stamp, -1, -1
+    with fits.open(path, memmap=True) as hdul:
+        cutout = read_cutout(hdul[0], (x, y), radius)
+    # Offset of the cutout in the stamp, the stamp starting before the image
+    # for stars within `radius` of its lower edges
+    row = cutout.y_start - int(np.floor(y - radius))
+    col = cutout.x_start - int(np.floor(x - radius))
+    rows, cols = cutout.data.shape
+    stamp[row:row + rows, col:col + cols] = cutout.data
+    return stamp, cutout.x_start, cutout.y_start
+
+
+def _extract_stamps(
+    star_no: int, nights: list, radius: int, positions: str, max_workers: int
+) -> StarStamps:
+    if positions == REFERENCE_POSITIONS:
+        reference_xy = ReferenceLogFile.get_ref_revised_71().get_star_xy(star_no)
+        if reference_xy[0] is None:
+            raise ValueError(f"Star {star_no} isn't in the reference file")
+
+    tasks, rows = [], []
+    for night in nights:
+        folder = night.path / "Aligned Combined"
+        if not folder.exists():
+            continue
+        images, paths = scan_aligned_combined(folder)
+        if positions == LOGFILE_POSITIONS:
+            night_positions = _logfile_positions(night, star_no)
+        for image, path in zip(images, paths):
+            if positions == REFERENCE_POSITIONS:
+                xy = reference_xy
+            else:
+                xy = night_positions.get(image, (np.nan, np.nan))
+            tasks.append((path, xy))
+            rows.append([night.night_date, image, *xy])
+
+    stamps = np.full((len(tasks), 2 * radius, 2 * radius), np.nan, dtype="float32")
+    starts = np.full((len(tasks), 2), -1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda task: _extract(task, radius), tasks)
+        for index, (stamp, x_start, y_start) in enumerate(results):
+            stamps[index] = stamp
+            starts[index] = x_start, y_start
+    metadata = pd.DataFrame(rows, columns=["night", "image", "x", "y"])
+    metadata["image"] = metadata["image"].astype(int)
+    metadata["x_start"], metadata["y_start"] = starts[:, 0], starts[:, 1]
+    stamps.flags.writeable = False
+    return StarStamps(stamps, metadata)
+
+
+def star_stamps(
+    star_no: int,
+    nights: Iterable,
+    radius: int = 10,
+    positions: str = REFERENCE_POSITIONS,
+    max_workers: int = 8,
+) -> StarStamps:
+    """
+    Returns the postage stamps of `star_no` in every aligned combined image of
+    `nights` as a `StarStamps` named tuple, in order of night and image.
+
+    param: star_no: star number
+    param: nights: the `Night` objects to include, e.g. `Year(2011).nights`
+    param: radius: the stamps are 2 * `radius` pixels wide and high
+    param: positions: `REFERENCE_POSITIONS` to center the stamps on the star's
+        position in the reference file, or `LOGFILE_POSITIONS` to use its
+        position in each image's log file combined
+    param: max_workers: number of threads extracting stamps in parallel
+
+    Only the pixels of the stamps are read from the images. The result is
+    stored in the cache folder (see `trout.cache`) and reused until images
+    (or log files, for `LOGFILE_POSITIONS`) of the nights are added, removed
+    or rewritten.
+
+    Example:
+
+        result = star_stamps(12, Year(2011).nights)
+        result.stamps.mean(axis=0)  # Average look of star 12 in 2011
+    """
+    if positions not in (REFERENCE_POSITIONS, LOGFILE_POSITIONS):
+        raise ValueError(
+            f"Unknown positions {positions}, use {REFERENCE_POSITIONS} or {LOGFILE_POSITIONS}"
+        )
+    nights = sorted(nights)
+    key = [star_no, radius, positions]
+    for night in nights:
+        key.append(aligned_combined_key(night.path / "Aligned Combined"))
+        if positions == LOGFILE_POSITIONS:
+            logfiles = listing(night.path / "Log Files Combined")
+            key.append(logfiles.files_key(_logfile_paths(night).values()))
+    return cached_sidecars(
+        key,
+        "star_stamps",
+        (".npy", ".pkl"),
+        lambda stamps_path, metadata_path: StarStamps(
+            np.load(stamps_path, mmap_mode="r"), pd.read_pickle(metadata_path)
+        ),
+        lambda: _extract_stamps(star_no, nights, radius, positions, max_workers),
+        (
+            lambda result, tmp_path: save_array(result.stamps, tmp_path),
+            lambda result, tmp_path: result.metadata.to_pickle(tmp_path),
+        ),
+    )
@@ -1,49 +1,278 @@
-from datetime import datetime
+import warnings
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 from functools import total_ordering
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Dict, Iterable, Iterator, Tuple, Union
 
+import pandas as pd
+
+from trout.exceptions import NightLoadError
 from trout.intra import DATA_DRIVE
+from trout.intra.manifest import listing, walk
+from trout.intra.registry import Registry
+
+
+# `data` maps the name of each loaded item to its value and `errors` the name
+# of each item that couldn't be loaded to the exception raised
+LoadedNight = namedtuple("LoadedNight", ["night", "data", "errors"])
+
+
+def _item_name(item: Union[str, Callable]) -> str:
+    return item if isinstance(item, str) else item.__name__
+
+
+def _load_night(night, load: Tuple[Union[str, Callable], ...]):
+    data, errors = {}, {}
+    for item in load:
+        name = _item_name(item)
+        try:
+            if isinstance(item, str):
+                value = getattr(night, item)
+                data[name] = value() if callable(value) else value
+            else:
+                data[name] = item(night)
+        except Exception as e:
+            errors[name] = e
+    return data, errors
 
 
 @total_ordering
-class Year:
+class Year(metaclass=Registry):
     @classmethod
     def make_year_path(self, year: int):
         return Path(DATA_DRIVE) / str(year)
 
-    def __new__(cls, year: int):
+    @classmethod
+    def registry_key(cls, year: int):
         """
-        Ensures each year instance is a singleton.
+        Ensures each year instance is a singleton, see `Registry`
         """
-        if not hasattr(cls, "years"):
-            cls.years = {}
         assert type(year) == int
-        if not cls.years.get(year):
-            cls.years[year] = super(Year, cls).__new__(cls)
-        return cls.years[year]
+        return year
 
     def __init__(self, year: int):
         self._year = year
         self._path = self.make_year_path(year)
         if not self._path.exists():
             raise ValueError(f"{year} data doesn't exist in", DATA_DRIVE)
+        # (folder listing, nights) pair, the nights are found again when the
+        # year folder's listing changes
         self._nights = None
 
     @property
     def nights(self) -> Iterable:
         from .night import Night
-        if self._nights is None:
+        folder = listing(self.path)
+        if self._nights is None or self._nights[0] is not folder:
             nights = []
-            for f in self.path.glob("*"):
+            for f in folder.dirs():
                 name = f.name
                 if Night.matches_name(f.name):
                     night_date = datetime.strptime(name, Night.NAME_FORMAT)
                     year, month, day = night_date.year, night_date.month, night_date.day
                     nights.append((night_date, Night(year, month, day)))
             _, nights_sorted = zip(*sorted(nights, key=lambda x: x[0]))
-            self._nights = nights_sorted
-        return self._nights
+            self._nights = (folder, nights_sorted)
+        return self._nights[1]
+
+    def iter_nights(
+        self,
+        prefetch: int = 2,
+        load: Iterable[Union[str, Callable]] = ("sky_bg",),
+        errors: str = "raise",
+    ) -> Iterator[LoadedNight]:
+        """
+        Iterates over the nights of the year in order, loading the `load`
+        items of the next `prefetch` nights on background threads while the
+        current night is processed. Yields a `LoadedNight` per night.
+
+        param: prefetch: number of nights loaded ahead of the current one, at
+            most `prefetch` + 1 nights of data are held at once. With 0 each
+            night is loaded in this thread when it's reached
+        param: load: items to load, each either the name of a `Night`
+            attribute (e.g. "sky_bg", "alignment_stats", "logfile_combined")
+            or method without required arguments (e.g. "aligned_combined_stack"),
+            or a function taking the night (its name is the item's name)
+        param: errors: "raise" to raise a `NightLoadError` when reaching a night
+            whose items couldn't be loaded (after the nights before it were
+            yielded), or "collect" to yield it with its `errors`
+
+        Example:
+
+            for night, data, _ in Year(2019).iter_nights(load=("sky_bg", "alignment_stats")):
+                process(night, data["sky_bg"], data["alignment_stats"])
+        """
+        if errors not in ("raise", "collect"):
+            raise ValueError(f"Unknown errors {errors}, use raise or collect")
+        if prefetch < 0:
+            raise ValueError(f"Invalid prefetch {prefetch}")
+        load = tuple(load)
+        nights = iter(self.nights)
+        executor = ThreadPoolExecutor(max_workers=prefetch) if prefetch else None
+        pending = deque()
+
+        def submit_next():
+            night = next(nights, None)
+            if night is not None:
+                future = executor.submit(_load_night, night, load) if executor else None
+                pending.append((night, future))
+
+        try:
+            for _ in range(max(prefetch, 1)):
+                submit_next()
+            while pending:
+                night, future = pending.popleft()
+                if future is None:
+                    data, night_errors = _load_night(night, load)
+                else:
+                    data, night_errors = future.result()
+                submit_next()
+                if night_errors and errors == "raise":
+                    raise NightLoadError(night, night_errors) from next(
+                        iter(night_errors.values())
+                    )
+                yield LoadedNight(night, data, night_errors)
+        finally:
+            # Stopping early waits only for the nights being loaded
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def sky_bg(self, max_workers: int = 8, **kwargs) -> pd.DataFrame:
+        """
+        Returns the sky background of all nights in the year as one dataframe
+        indexed by (night, image). See `Year.sky_bg_for_years`
+        """
+        return self.sky_bg_for_years([self.year], max_workers=max_workers, **kwargs)
+
+    @classmethod
+    def map_nights(
+        cls,
+        fn: Callable,
+        years: Iterable[int],
+        max_workers: int = 8,
+        action: str = "process",
+        include: Union[Callable, None] = None,
+    ) -> Tuple[Dict[date, object], Dict[date, Exception]]:
+        """
+        Calls `fn(night)` for all nights in `years` (for which `include(night)`
+        is true if given) on `max_workers` threads.
+
+        Returns the results and the failures, dicts of night date to the value
+        returned and to the exception raised, in night order. Failed nights
+        are also reported with a "Couldn't `action` of <night>" warning.
+        """
+        nights = [night for year in years for night in cls(year).nights]
+        if include is not None:
+            nights = [night for night in nights if include(night)]
+
+        def call(night):
+            try:
+                return fn(night), None
+            except Exception as e:
+                return None, e
+
+        results, failures = {}, {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for night, (result, error) in zip(nights, executor.map(call, nights)):
+                if error is None:
+                    results[night.night_date] = result
+                else:
+                    failures[night.night_date] = error
+                    warnings.warn(f"Couldn't {action} of {night}: {error}")
+        return results, failures
+
+    @classmethod
+    def sky_bg_for_years(
+        cls,
+        years: Iterable[int],
+        max_workers: int = 8,
+        all=False,
+        cluster_angles_round: Union[int, Iterable[int]] = None,
+        angle_status=None,
+        group_by=None,
+        twilight_removed=True,
+        columns=None,
+    ) -> pd.DataFrame:
+        """
+        Returns the sky background of all nights in `years` as one dataframe
+        indexed by (night, image).
+
+        Nights are loaded in parallel by `max_workers` threads and the other
+        parameters filter the combined dataframe the same way
+        `Night.get_sky_bg_refined` filters a single night. `group_by` ("median"
+        or "mean") aggregates each night into one row.
+
+        Nights whose sky background can't be loaded are left out, the failures
+        of `Year.map_nights` are in the returned dataframe's `attrs`.
+        """
+        from .night import refine_sky_bg
+
+        frames, failures = cls.map_nights(
+            lambda night: night.sky_bg, years, max_workers, "load sky background"
+        )
+        if frames:
+            df = pd.concat(frames, names=["night", "image"])
+            df = refine_sky_bg(
+                df,
+                all=all,
+                cluster_angles_round=cluster_angles_round,
+                angle_status=angle_status,
+                group_by=group_by,
+                twilight_removed=twilight_removed,
+                columns=columns,
+            )
+        else:
+            df = pd.DataFrame()
+        df.attrs["failures"] = failures
+        return df
+
+    def color_normalized_cube(self, radius: int = 4, max_workers: int = 8, **kwargs):
+        """
+        Returns the Color Normalized values of all nights in the year as one
+        stars by nights array, see `trout.intra.color_normalized`
+        """
+        from .color_normalized import color_normalized_cube
+
+        return color_normalized_cube(
+            [self.year], radius=radius, max_workers=max_workers, **kwargs
+        )
+
+    def warm_cache(self, max_workers: int = 8, flux_logs=False) -> dict:
+        """
+        Lists the year's folders into the manifest (see `trout.intra.manifest`)
+        and reads the text files of all nights in the year through the cache
+        folder (see `trout.cache`) so that later reads are fast. Files whose
+        cached copy is up to date aren't parsed again.
+
+        param: max_workers: number of threads reading files in parallel
+        param: flux_logs: whether to include the flux log combined files, see
+            `Night.cached_file_readers`
+        return: dict of the path of each file that couldn't be read to the
+            exception raised, these are also reported with a warning
+        """
+        walk(self.path, max_workers=max_workers)
+        readers = [
+            reader
+            for night in self.nights
+            for reader in night.cached_file_readers(flux_logs=flux_logs)
+        ]
+
+        def warm(reader):
+            path, read = reader
+            try:
+                read(path)
+            except Exception as e:
+                return e
+
+        failures = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for (path, _), error in zip(readers, executor.map(warm, readers)):
+                if error is not None:
+                    failures[path] = error
+                    warnings.warn(f"Couldn't cache {path}: {error}")
+        return failures
 
     @property
     def year(self):
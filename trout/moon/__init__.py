@@ -5,6 +5,7 @@ from typing import Union
 
 import ephem
 import numpy as np
+import numpy.typing as npt
 
 dec = decimal.Decimal
 
@@ -23,11 +24,45 @@ class MoonPositions:
     WaningCresce = "Waning Crescent"
 
 
+_PHASE_NAMES = (
+    MoonPositions.NewMoon,
+    MoonPositions.WaxingCrescent,
+    MoonPositions.FirstQuarter,
+    MoonPositions.WaxingGibbous,
+    MoonPositions.FullMoon,
+    MoonPositions.WaningGibbous,
+    MoonPositions.LastQuarter,
+    MoonPositions.WaningCresce,
+)
+
+# Spacing of the times at which ephem is evaluated when computing the moon
+# distance for an array of datetimes. Linearly interpolating the moon's
+# position between grid points keeps the moon distance within 0.001 degree of
+# evaluating ephem at every datetime.
+MOON_GRID_STEP = np.timedelta64(10, "m")
+
+# Epoch of ephem dates (Dublin Julian Date)
+_EPHEM_EPOCH = np.datetime64("1899-12-31T12:00:00")
+
+
+def _is_array(d) -> bool:
+    return np.ndim(d) > 0
+
+
+def _as_datetime64(d) -> npt.NDArray:
+    return np.asarray(d, dtype="datetime64[ns]")
+
+
 def position(d=None):
     """
      Returns a decimal representation for the phase of the moon
     Takes into account waning and waxing. Full moon is about 0.5
+
+    When `d` is an array of dates, returns a float numpy array of positions
     """
+    if _is_array(d):
+        days = (_as_datetime64(d) - np.datetime64("2001-01-01")) / np.timedelta64(1, "D")
+        return (0.20439731 + days * 0.03386319269) % 1
     if d is None:
         d = datetime.datetime.now()
     if isinstance(d, datetime.date):
@@ -40,25 +75,21 @@ def position(d=None):
     return lunations % dec(1)
 
 
-def phase(d: Union[datetime.date, datetime.datetime]):
+def phase(d: Union[datetime.date, datetime.datetime, npt.ArrayLike]):
     """
     Returns the phase (in str) of the moon in the given date
+
+    When `d` is an array of dates, returns a numpy array of phase names
     """
+    if _is_array(d):
+        index = np.floor(position(d) * 8 + 0.5).astype(int) & 7
+        return np.array(_PHASE_NAMES)[index]
     if isinstance(d, datetime.date):
         d = datetime.datetime(d.year, d.month, d.day)
     pos = position(d)
     index = (pos * dec(8)) + dec("0.5")
     index = math.floor(index)
-    return {
-        0: MoonPositions.NewMoon,
-        1: MoonPositions.WaxingCrescent,
-        2: MoonPositions.FirstQuarter,
-        3: MoonPositions.WaxingGibbous,
-        4: MoonPositions.FullMoon,
-        5: MoonPositions.WaningGibbous,
-        6: MoonPositions.LastQuarter,
-        7: MoonPositions.WaningCresce,
-    }[int(index) & 7]
+    return _PHASE_NAMES[int(index) & 7]
 
 
 def get_moon_DE_and_RA(
@@ -81,18 +112,12 @@ def get_moon_DE_and_RA(
     return (dec, ra)
 
 
-def moon_distance(
-    date: datetime.datetime,
-):
+def _angle_from_cluster(moon_DE, moon_RA):
     """
-    Returns the angle distance (in degrees) between the moon and our m23 cluster
-    Note that the date is UTC date
+    Returns the angle distance (in degrees) between the moon with declination
+    `moon_DE` (in degrees) and right ascension `moon_RA` (in hours) and our m23
+    cluster. Works on scalars as well as arrays
     """
-
-    # Note that DE is in degrees, RA is in hours
-    # To convert RA to degrees, multiply by 15
-    moon_DE, moon_RA = get_moon_DE_and_RA(date)
-
     # M23 declination and right ascension
     cluster_RA = 269.5667
     cluster_DE = -19.0186
@@ -108,6 +133,79 @@ def moon_distance(
     angle_cos = np.sin(moon_alpha) * np.sin(cluster_alpha) + np.cos(moon_alpha) * np.cos(
         cluster_alpha
     ) * np.cos(beta_difference)
-    angle = np.arccos(angle_cos)  # Angle in radians between the two objects
+    # Clip guards against round off pushing the cosine out of [-1, 1]
+    angle = np.arccos(np.clip(angle_cos, -1, 1))  # Angle in radians between the two objects
 
     return angle * 180 / np.pi
+
+
+def _moon_unit_vectors(dates: npt.NDArray) -> npt.NDArray:
+    """
+    Returns the (n, 3) array of unit vectors pointing at the moon (as seen from
+    Decorah) at each of the datetime64 `dates`
+    """
+    observer = ephem.Observer()
+    observer.lat = "43.3017"
+    observer.lon = "-91.79"
+    moon = ephem.Moon()
+
+    vectors = np.empty((len(dates), 3))
+    ephem_dates = (dates - _EPHEM_EPOCH) / np.timedelta64(1, "D")
+    for i, ephem_date in enumerate(ephem_dates):
+        observer.date = ephem.Date(ephem_date)
+        moon.compute(observer)
+        ra, dec = float(moon.ra), float(moon.dec)
+        vectors[i] = (np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec))
+    return vectors
+
+
+def _moon_distance_array(dates: npt.ArrayLike) -> npt.NDArray:
+    """
+    Returns the array of moon distances (in degrees) for an array of UTC
+    datetimes. ephem is only evaluated on the `MOON_GRID_STEP` grid points
+    surrounding the given datetimes and the moon's position is linearly
+    interpolated in between. NaT datetimes give NaN distances.
+    """
+    dates = _as_datetime64(dates)
+    shape = dates.shape
+    dates = dates.ravel()
+    distances = np.full(len(dates), np.nan)
+    valid = ~np.isnat(dates)
+    if not valid.any():
+        return distances.reshape(shape)
+
+    grid_start = dates[valid].min()
+    steps = (dates[valid] - grid_start) / MOON_GRID_STEP
+    lower = np.floor(steps).astype(int)
+    # Only the grid points enclosing some date are evaluated
+    nodes = np.unique(np.concatenate([lower, lower + 1]))
+    vectors = _moon_unit_vectors(grid_start + nodes * MOON_GRID_STEP)
+
+    node_index = np.searchsorted(nodes, lower)
+    weight = (steps - lower)[:, np.newaxis]
+    moon = (1 - weight) * vectors[node_index] + weight * vectors[node_index + 1]
+    moon /= np.linalg.norm(moon, axis=1)[:, np.newaxis]
+
+    moon_DE = np.degrees(np.arcsin(moon[:, 2]))
+    moon_RA = np.degrees(np.arctan2(moon[:, 1], moon[:, 0])) / 15
+    distances[valid] = _angle_from_cluster(moon_DE, moon_RA)
+    return distances.reshape(shape)
+
+
+def moon_distance(
+    date: Union[datetime.datetime, npt.ArrayLike],
+):
+    """
+    Returns the angle distance (in degrees) between the moon and our m23 cluster
+    Note that the date is UTC date
+
+    When `date` is an array of datetimes, returns a numpy array of distances
+    computed in one call, see `MOON_GRID_STEP` for the accuracy
+    """
+    if _is_array(date):
+        return _moon_distance_array(date)
+
+    # Note that DE is in degrees, RA is in hours
+    # To convert RA to degrees, multiply by 15
+    moon_DE, moon_RA = get_moon_DE_and_RA(date)
+    return _angle_from_cluster(moon_DE, moon_RA)
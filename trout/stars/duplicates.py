@@ -0,0 +1,99 @@
+from collections import namedtuple
+from functools import cache
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from trout.files.reference_log_file import ReferenceLogFile
+
+REF_REVISED_71 = "ref_revised_71"
+REF_WITH_NEW_STARS = "ref_with_new_stars"
+
+_REFERENCE_FILES = {
+    REF_REVISED_71: ReferenceLogFile.get_ref_revised_71,
+    REF_WITH_NEW_STARS: ReferenceLogFile.get_ref_with_new_stars,
+}
+
+# `brightest` is the lowest star number of the group, `members` are all star
+# numbers in the group (including `brightest`) in increasing order
+DuplicateGroup = namedtuple("DuplicateGroup", ["brightest", "members"])
+
+
+def _get_reference_file(reference: str) -> ReferenceLogFile:
+    if reference not in _REFERENCE_FILES:
+        raise ValueError(
+            f"Unknown reference file {reference}, use one of {list(_REFERENCE_FILES)}"
+        )
+    return _REFERENCE_FILES[reference]()
+
+
+@cache
+def neighbor_graph(
+    radius: float = 1, reference: str = REF_REVISED_71
+) -> Tuple[npt.NDArray, npt.NDArray, npt.NDArray]:
+    """
+    Returns the edges of the graph connecting every pair of stars in the
+    `reference` file whose centers are within `radius` (inclusive) pixels of
+    each other, as the tuple of arrays (star, neighbor, distance) with
+    `star < neighbor`.
+
+    param: radius: distance in pixels under which two stars are connected
+    param: reference: either `REF_REVISED_71` or `REF_WITH_NEW_STARS`
+
+    Note that the result is cached per (radius, reference) and the returned
+    arrays are read only.
+    """
+    first, second, distances = (
+        _get_reference_file(reference).spatial_index().pairs_within(radius)
+    )
+    edges = (first + 1, second + 1, distances)
+    for arr in edges:
+        arr.flags.writeable = False
+    return edges
+
+
+@cache
+def duplicate_groups(
+    radius: float = 1, reference: str = REF_REVISED_71
+) -> Tuple[DuplicateGroup, ...]:
+    """
+    Returns the groups of stars in the `reference` file that are connected
+    through neighbors within `radius` pixels, i.e. the connected components of
+    `neighbor_graph` with more than one star, ordered by their brightest star.
+
+    This is the field-wide equivalent of calling `Star.brightest_duplicate`
+    for every star: each group's `brightest` member is the star the other
+    members are duplicates of.
+    """
+    first, second, _ = neighbor_graph(radius, reference)
+    if len(first) == 0:
+        return ()
+    n_stars = len(_get_reference_file(reference))
+
+    # Label propagation with pointer jumping: every star ends up labeled with
+    # the lowest star number of its connected component
+    labels = np.arange(n_stars + 1)
+    while True:
+        lowest = np.minimum(labels[first], labels[second])
+        updated = labels.copy()
+        np.minimum.at(updated, first, lowest)
+        np.minimum.at(updated, second, lowest)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+
+    stars = np.arange(n_stars + 1)
+    in_group = np.zeros(n_stars + 1, dtype=bool)
+    in_group[first] = True
+    in_group[second] = True
+    stars, labels = stars[in_group], labels[in_group]
+
+    order = np.lexsort((stars, labels))
+    stars, labels = stars[order], labels[order]
+    boundaries = np.flatnonzero(np.diff(labels)) + 1
+    return tuple(
+        DuplicateGroup(int(members[0]), tuple(int(m) for m in members))
+        for members in np.split(stars, boundaries)
+    )
@@ -14,7 +14,7 @@ from trout.exceptions import (InvalidQueryError, InvalidStarNumberError,
 from trout.files.reference_log_file import ReferenceLogFile
 from trout.stars.utils import get_star_data, is_valid_star, star_table_name
 
-from .utils import STAR_END, bad_nights_filtered_data
+from .utils import bad_nights_filtered_data
 
 # Types
 StarNoType = int
@@ -22,6 +22,14 @@ DistanceType = float
 CloseNeighborInformationType = Tuple[StarNoType, DistanceType]
 
 
+def _by_distance(neighbor: CloseNeighborInformationType) -> DistanceType:
+    return neighbor[1]
+
+
+def _include_all(neighbor: CloseNeighborInformationType) -> bool:
+    return True
+
+
 class Star:
     """
     A star object, useful for viewing data for the star, advanced filtering of
@@ -46,6 +54,10 @@ class Star:
         )
 
         self._selected_data = []
+        # Magnitudes of selected data, `_magnitudes_of` is the selected data
+        # they were computed from
+        self._magnitudes = None
+        self._magnitudes_of = None
 
         # Internight band for the star
         from trout.internight import get_band
@@ -234,19 +246,14 @@ class Star:
         param: (optional) title: The title of the plot.
         return: None
         """
-        flux_column, date_column = (
-            STAR_TABLE_HEADER["flux"],
-            STAR_TABLE_HEADER["date"],
-        )
-        # Filter to remove data where flux <= 0
-        data = list(filter(lambda x: x[flux_column] > 0, self.selected_data))
+        mags = self.get_selected_magnitude_column()
+        # Data where flux <= 0 doesn't have a magnitude
+        has_magnitude = ~np.isnan(mags)
 
         # Nothing to plot if there is no data.
-        if len(data) != 0:
-            # Create np array of data
-            data = np.array(data)
-            flux, date = data[:, flux_column], data[:, date_column]
-            mags = list(map(flux_to_magnitude_4px, flux))
+        if has_magnitude.any():
+            date = self.get_selected_dates_column()[has_magnitude]
+            mags = mags[has_magnitude]
 
             # Plot axis: (x, y)
             # Plot option: 'ro' means red circle for each data point
@@ -346,6 +353,18 @@ class Star:
             return np.array(np.array(data)[:, 1])
         return np.array([])
 
+    def get_selected_magnitude_column(self) -> Iterable[float]:
+        """
+        Returns an numpy array of 4px magnitudes of selected data, NaN where
+        the flux is zero or negative. The magnitudes are cached until the
+        selected data changes
+        """
+        if self._magnitudes_of is not self._selected_data:
+            flux = self.get_selected_data_column().astype("float")
+            self._magnitudes = flux_to_magnitude_4px(flux)
+            self._magnitudes_of = self._selected_data
+        return self._magnitudes
+
     def get_selected_dates_column(self) -> Iterable[date]:
         """
         Returns an numpy array of date from selected data if there's some
@@ -398,10 +417,8 @@ class Star:
     def closest_neighbors(
         self,
         limit=5,
-        sort_fn: Callable[[StarNoType, DistanceType], Union[int, float]] = lambda x: x[
-            1
-        ],
-        filter_fn: Callable[[StarNoType, DistanceType], bool] = lambda x: True,
+        sort_fn: Callable[[StarNoType, DistanceType], Union[int, float]] = _by_distance,
+        filter_fn: Callable[[StarNoType, DistanceType], bool] = _include_all,
     ) -> List[CloseNeighborInformationType]:
         """
         Returns the list of `number` closest neighbors for
@@ -418,22 +435,20 @@ class Star:
                 distance between their centers
         """
         f = ReferenceLogFile.get_ref_with_new_stars()
+        index = f.spatial_index()
 
-        star_xy = f.get_star_xy(self.number)
-        x, y = star_xy[0], star_xy[1]
-        neighbors = []
-        last_star = len(f.data())
-
-        if self.number > last_star:
+        if self.number > len(index):
             raise StarNotPresentInReferenceException
 
-        for neighbor in range(1, last_star + 1):
-            neighbor_xy = f.get_star_xy(neighbor)
-            n_x, n_y = neighbor_xy[0], neighbor_xy[1]
-            distance = (((n_x - x) ** 2) + ((n_y - y) ** 2)) ** (1 / 2)
-            # Ignore itself
-            if neighbor != self.number:
-                neighbors.append((neighbor, distance))
+        star_xy = f.get_star_xy(self.number)
+        if sort_fn is _by_distance and filter_fn is _include_all:
+            # One extra neighbor since the star itself is its closest neighbor
+            indices, distances = index.query_nearest(star_xy, limit + 1)
+            return self._as_neighbors(indices, distances)[:limit]
+
+        neighbors = self._as_neighbors(
+            np.arange(len(index)), index.distances(star_xy)
+        )
         return sorted(filter(filter_fn, neighbors), key=sort_fn)[:limit]
 
     def neighbors_within_distance(self, distance) -> List[CloseNeighborInformationType]:
@@ -441,9 +456,25 @@ class Star:
         returns: Ordered list of neighbors and the
                 distance between their centers
         """
-        return self.closest_neighbors(
-            limit=STAR_END, filter_fn=lambda x: x[1] <= distance
-        )
+        f = ReferenceLogFile.get_ref_with_new_stars()
+        index = f.spatial_index()
+
+        if self.number > len(index):
+            raise StarNotPresentInReferenceException
+
+        indices, distances = index.query_radius(f.get_star_xy(self.number), distance)
+        return self._as_neighbors(indices, distances)
+
+    def _as_neighbors(self, indices, distances) -> List[CloseNeighborInformationType]:
+        """
+        Converts zero based reference file indices and their distances to the
+        list of (star number, distance) excluding the star itself
+        """
+        return [
+            (int(i) + 1, float(d))
+            for i, d in zip(indices, distances)
+            if i + 1 != self.number
+        ]
 
     def brightest_duplicate(self, threshold=1, not_in=None) -> Union[int, None]:
         """
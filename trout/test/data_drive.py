@@ -0,0 +1,191 @@
+"""
+Helpers to build a small fake DATA_DRIVE in a temporary folder for tests
+"""
+import tempfile
+import unittest
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from astropy.io import fits
+
+from trout.intra.night import Night
+from trout.intra.registry import clear_registries
+
+SKY_BG_EXTRA_COLUMNS = 34
+
+
+def write_sky_bg(night_path: Path, night_date: date, n_images=20, seed=0):
+    rng = np.random.default_rng(seed)
+    folder = night_path / "Sky background"
+    folder.mkdir(parents=True, exist_ok=True)
+    start = datetime(night_date.year, night_date.month, night_date.day) + timedelta(
+        hours=28
+    )
+    extra = [f"Sky_{i}" for i in range(SKY_BG_EXTRA_COLUMNS)]
+    lines = [
+        " ".join(
+            ["Image_number", "Date", "Cluster_Angle", "Cluster_Angle_Round", "Moon_Distance"]
+            + extra
+        )
+    ]
+    angles = rng.uniform(0, 90, n_images)
+    for i in range(n_images):
+        moment = start + timedelta(minutes=6 * i)
+        values = rng.uniform(100, 200, SKY_BG_EXTRA_COLUMNS)
+        lines.append(
+            " ".join(
+                [
+                    str(i + 1),
+                    moment.strftime("%Y-%m-%dT%H:%M:%S"),
+                    f"{angles[i]:.3f}",
+                    f"{round(angles[i], -1):.0f}",
+                    "0",
+                ]
+                + [f"{v:.2f}" for v in values]
+            )
+        )
+    path = folder / f"{night_date:%m-%d-%y}_m23_7.0-sky_bg.txt"
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def make_data_drive(root: Path, nights):
+    """
+    Creates night folders for each date in `nights` under `root` and returns
+    their paths
+    """
+    paths = []
+    for night_date in nights:
+        path = root / str(night_date.year) / night_date.strftime(Night.NAME_FORMAT)
+        path.mkdir(parents=True, exist_ok=True)
+        paths.append(path)
+    return paths
+
+
+def use_data_drive(root: Path, cache_dir: Path) -> ExitStack:
+    """
+    Returns a context manager under which trout reads data from `root` and
+    writes cached files to `cache_dir`. Year, Night and file instances
+    created before or under it are forgotten when it's entered and closed.
+    """
+    stack = ExitStack()
+    stack.enter_context(patch("trout.intra.year.DATA_DRIVE", str(root)))
+    stack.enter_context(patch("trout.cache.CACHE_DIR", str(cache_dir)))
+    clear_registries()
+    stack.callback(clear_registries)
+    return stack
+
+
+class DataDriveTestCase(unittest.TestCase):
+    """
+    Test case reading data from the fake DATA_DRIVE `self.root` and caching
+    files in `self.cache`, both in the temporary folder `self.tmp`. Subclasses
+    build the drive in `setUp` after calling `super().setUp()`
+    """
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.root, self.cache = self.tmp / "drive", self.tmp / "cache"
+        stack = use_data_drive(self.root, self.cache)
+        stack.__enter__()
+        self.addCleanup(stack.close)
+
+
+LOGFILE_COMBINED_RADII = (3, 4, 5)
+
+
+def write_logfile_combined(path: Path, n_stars=100, radii=LOGFILE_COMBINED_RADII, seed=0):
+    rng = np.random.default_rng(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    titles = ["X", "Y", "XFWHM", "YFWHM", "Avg FWHM", "Sky ADU"] + [
+        f"Star ADU {r}" for r in radii
+    ]
+    header = ["Log file combined", "Produced by m23"] + [""] * 6
+    values = np.column_stack(
+        [rng.uniform(0, 1024, (n_stars, 2)), rng.uniform(1, 5, (n_stars, 3))]
+        + [rng.uniform(100, 300, n_stars)]
+        + [rng.uniform(0, 1e6, n_stars) for _ in radii]
+    )
+    values[rng.choice(n_stars, n_stars // 10)] = 0  # Stars not found in the image
+    rows = ["  ".join(f"{v:.2f}" for v in row) for row in values]
+    path.write_text("\n".join(header + ["  ".join(titles)] + rows) + "\n")
+    return values
+
+
+COLOR_NORMALIZED_TITLES = [
+    "Star #",
+    "Normalized Median Flux",
+    "Norm Factor",
+    "Measured Mean R-I",
+    "Used Mean R-I",
+    "Attendance",
+    "Reference Log Adu",
+]
+
+
+def write_color_normalized(path: Path, n_stars=100, seed=0):
+    rng = np.random.default_rng(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = ["Color normalized data", ""]
+    n_values = len(COLOR_NORMALIZED_TITLES) - 1
+    values = np.column_stack(
+        [np.arange(1, n_stars + 1), rng.uniform(0, 1e6, (n_stars, n_values))]
+    )
+    rows = [
+        "  ".join([str(int(row[0]))] + [f"{v:.4f}" for v in row[1:]]) for row in values
+    ]
+    path.write_text("\n".join(header + ["  ".join(COLOR_NORMALIZED_TITLES)] + rows) + "\n")
+    return values
+
+
+def write_flux_log(folder: Path, night_date: date, star: int, flux, images=None):
+    """
+    Writes a flux log combined file of `star` with the `flux` of each image,
+    numbered `images` (1, 2... by default)
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    if images is None:
+        images = range(1, len(flux) + 1)
+    header = [f"Star Number {star}", "X Location 0", "Y Location 0", "Radius 4", ""]
+    rows = ["Image_number Star_ADU"] + [f"{i} {v:.2f}" for i, v in zip(images, flux)]
+    path = folder / f"{night_date:%m-%d-%y}_m23_7.0-{star:04}_flux.txt"
+    path.write_text("\n".join(header + rows) + "\n")
+    return path
+
+
+def write_aligned_combined(night_path: Path, number: int, data):
+    """
+    Writes `data` as the aligned combined image `number` of the night
+    """
+    folder = night_path / "Aligned Combined"
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"m23_7.0-{number:04}.fit"
+    fits.PrimaryHDU(data).writeto(path, overwrite=True)
+    return path
+
+
+def write_frame(night_path: Path, folder: str, number: int, data, header=None):
+    """
+    Writes `data` as the frame `number` in the night's `folder` (e.g.
+    "Aligned") with the `header` values
+    """
+    path = night_path / folder / f"m23_7.0-{number:03}.fit"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fits.PrimaryHDU(data, header=fits.Header(header or {})).writeto(path, overwrite=True)
+    return path
+
+
+def write_alignment_stats(night_path: Path, night_date: date, rows):
+    """
+    Writes the aligned stats file of the night with an image number, rotation
+    and shift column from the (image, rotation, shift) `rows`
+    """
+    path = night_path / f"m23_aligned_stats_{night_date:%m-%d-%y}.txt"
+    lines = ["Image_number Rotation Shift"] + [f"{i} {r} {s}" for i, r, s in rows]
+    path.write_text("\n".join(lines) + "\n")
+    return path
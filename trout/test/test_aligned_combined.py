@@ -0,0 +1,99 @@
+import os
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+import matplotlib
+import numpy as np
+
+from trout.intra.aligned_combined import AlignedCombined
+from trout.intra.night import Night
+from trout.test.data_drive import DataDriveTestCase, make_data_drive, write_aligned_combined
+
+matplotlib.use("Agg")
+
+
+class TestAlignedCombined(DataDriveTestCase):
+    night_date = date(2011, 7, 14)
+
+    def setUp(self):
+        super().setUp()
+        (self.night_path,) = make_data_drive(self.root, [self.night_date])
+        rng = np.random.default_rng(0)
+        self.images = {}
+        for number in (1, 2, 4):
+            self.images[number] = rng.uniform(0, 1000, (64, 48)).astype("float32")
+            write_aligned_combined(self.night_path, number, self.images[number])
+
+    def night(self):
+        d = self.night_date
+        return Night(d.year, d.month, d.day)
+
+    def image(self, number):
+        return AlignedCombined(self.night_date, number)
+
+    def test_cutout(self):
+        cutout = self.image(2).cutout((20.5, 30.2), 5)
+        self.assertEqual((cutout.x_start, cutout.y_start), (15, 25))
+        np.testing.assert_array_equal(cutout.data, self.images[2][25:35, 15:25])
+
+        # Clipped at the image edges
+        cutout = self.image(2).cutout((2, 62), 5)
+        self.assertEqual((cutout.x_start, cutout.y_start), (0, 57))
+        np.testing.assert_array_equal(cutout.data, self.images[2][57:, :7])
+
+    def test_data(self):
+        np.testing.assert_array_equal(self.image(1).data, self.images[1])
+
+    @unittest.skipUnless(os.path.isdir("/proc/self/fd"), "Needs /proc/self/fd")
+    def test_files_closed(self):
+        for number in range(5, 45):
+            write_aligned_combined(self.night_path, number, self.images[1])
+        open_files = len(os.listdir("/proc/self/fd"))
+        for number in range(5, 45):
+            image = self.image(number)
+            image.cutout((20, 30), 5)
+            image.data
+        self.assertLessEqual(len(os.listdir("/proc/self/fd")), open_files)
+
+    def test_plot_zoom_reads_cutout(self):
+        with patch("trout.intra.aligned_combined.plt.show"):
+            self.image(4).plot(zoom_at_center=(20, 30), radius=5)
+        ax = matplotlib.pyplot.gca()
+        self.assertEqual(ax.get_xlim(), (15, 25))
+        self.assertEqual(ax.get_ylim(), (25, 35))
+        matplotlib.pyplot.close("all")
+
+    def test_stack(self):
+        stack = self.night().aligned_combined_stack()
+        np.testing.assert_array_equal(stack.images, [1, 2, 4])
+        self.assertIsInstance(stack.data, np.memmap)
+        np.testing.assert_array_equal(stack.data[2], self.images[4])
+
+        with patch("trout.intra.aligned_combined.fits.open") as fits_open:
+            self.assertEqual(self.night().aligned_combined_stack().data.shape, (3, 64, 48))
+        fits_open.assert_not_called()
+
+        write_aligned_combined(self.night_path, 3, self.images[1])
+        stack = self.night().aligned_combined_stack()
+        np.testing.assert_array_equal(stack.images, [1, 2, 3, 4])
+        np.testing.assert_array_equal(stack.data[2], self.images[1])
+
+    def test_stack_image_rewritten_in_place(self):
+        self.night().aligned_combined_stack()
+        folder = self.night_path / "Aligned Combined"
+        mtime_ns = folder.stat().st_mtime_ns
+        write_aligned_combined(self.night_path, 2, self.images[4])
+        os.utime(folder, ns=(mtime_ns, mtime_ns))
+        # Listed again since the folder was modified too recently to reuse
+        # its listing
+        stack = self.night().aligned_combined_stack()
+        np.testing.assert_array_equal(stack.data[1], self.images[4])
+
+    def test_cached_stack_keyed_without_stating_images(self):
+        self.night().aligned_combined_stack()
+        folder = self.night_path / "Aligned Combined"
+        with patch("os.stat", wraps=os.stat) as stat:
+            self.night().aligned_combined_stack()
+        self.assertNotIn(folder, [Path(call.args[0]).parent for call in stat.call_args_list])
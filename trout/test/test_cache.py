@@ -0,0 +1,176 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from click.testing import CliRunner
+
+from trout import cache
+from trout.__main__ import cli
+from trout.cache.memory import payload_size
+from trout.intra.logfile_combined import LogFileCombined
+from trout.intra.night import Night
+from trout.test.data_drive import (
+    DataDriveTestCase,
+    make_data_drive,
+    write_color_normalized,
+    write_logfile_combined,
+    write_sky_bg,
+)
+
+
+class TestSidecarCache(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.folder = Path(tmp.name)
+        patcher = patch("trout.cache.CACHE_DIR", str(self.folder / "cache"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(cache.clear_memory)
+        self.sources = []
+        for i in range(4):
+            source = self.folder / f"source_{i}.txt"
+            source.write_text(str(i))
+            self.sources.append(source)
+
+    def read(self, path):
+        self.reads += 1
+        return {"values": np.full(1000, int(path.read_text()), dtype="float")}
+
+    def test_arrays_reused(self):
+        self.reads = 0
+        first = cache.cached_arrays(self.sources[0], "test", self.read)
+        self.assertIs(cache.cached_arrays(self.sources[0], "test", self.read), first)
+        cache.clear_memory()
+        second = cache.cached_arrays(self.sources[0], "test", self.read)
+        self.assertEqual(self.reads, 1)
+        np.testing.assert_array_equal(first["values"], second["values"])
+
+    def test_format_version(self):
+        self.reads = 0
+        path = cache.sidecar_path(self.sources[0], "test", ".npz")
+        cache.cached_arrays(self.sources[0], "test", self.read)
+        cache.clear_memory()
+        with patch.dict(cache.SIDECAR_VERSIONS, {"test": 1}):
+            self.assertNotEqual(cache.sidecar_path(self.sources[0], "test", ".npz"), path)
+            cache.cached_arrays(self.sources[0], "test", self.read)
+        # Sidecars stored with another format version are read again
+        self.assertEqual(self.reads, 2)
+
+    def test_cached_sidecars(self):
+        builds = []
+
+        def build():
+            builds.append(1)
+            return np.arange(5.0), "five"
+
+        def load(values_path, name_path):
+            return np.load(values_path, mmap_mode="r"), name_path.read_text()
+
+        args = (
+            ("key", 1),
+            "test",
+            (".npy", ".txt"),
+            load,
+            build,
+            (
+                lambda data, tmp_path: cache.save_array(data[0], tmp_path),
+                lambda data, tmp_path: tmp_path.write_text(data[1]),
+            ),
+        )
+        values, name = cache.cached_sidecars(*args, reload=True)
+        self.assertIsInstance(values, np.memmap)
+        self.assertEqual(name, "five")
+        values, _ = cache.cached_sidecars(*args)
+        np.testing.assert_array_equal(values, np.arange(5.0))
+        self.assertEqual(len(builds), 1)
+
+        # A partly evicted pair is built again
+        cache.keyed_sidecar_path(("key", 1), "test", ".txt").unlink()
+        cache.cached_sidecars(*args)
+        self.assertEqual(len(builds), 2)
+        # Data that isn't kept isn't stored
+        cache.cached_sidecars(("key", 2), *args[1:], keep=lambda data: False)
+        self.assertFalse(cache.keyed_sidecar_path(("key", 2), "test", ".npy").exists())
+
+    def test_memory_budget(self):
+        self.reads = 0
+        cache.clear_memory()
+        with patch.object(cache.memory_cache, "budget", 20000):
+            for source in self.sources[:3]:
+                cache.cached_arrays(source, "test", self.read)
+            memory = cache.stats().memory
+            self.assertEqual((memory.payloads, memory.size), (2, 16000))
+            self.assertEqual(memory.budget, 20000)
+
+            # The most recently used payloads are kept
+            cache.cached_arrays(self.sources[1], "test", self.read)
+            cache.cached_arrays(self.sources[3], "test", self.read)
+            cache.cached_arrays(self.sources[1], "test", self.read)
+        self.assertEqual(self.reads, 4)
+        self.assertGreater(cache.stats().disk_size, 0)
+
+    def test_payload_size(self):
+        frame = pd.DataFrame({"a": np.arange(10.0)})
+        self.assertGreaterEqual(payload_size(frame), 80)
+        self.assertEqual(payload_size({"b": np.zeros(5), "c": (np.zeros(3),)}), 64)
+        path = self.folder / "mapped.npy"
+        np.save(path, np.zeros(100))
+        self.assertEqual(payload_size(np.load(path, mmap_mode="r")), 0)
+
+    def test_least_recently_used_evicted(self):
+        self.reads = 0
+        sidecars = []
+        for i, source in enumerate(self.sources[:3]):
+            cache.cached_arrays(source, "test", self.read)
+            sidecar = cache.sidecar_path(source, "test", ".npz")
+            os.utime(sidecar, ns=(i * 10**9, i * 10**9))
+            sidecars.append(sidecar)
+        # Reading the oldest sidecar marks it as recently used
+        cache.clear_memory()
+        cache.cached_arrays(self.sources[0], "test", self.read)
+        size = sidecars[0].stat().st_size
+
+        with patch("trout.cache.CACHE_SIZE_LIMIT", int(2.5 * size)):
+            cache.cached_arrays(self.sources[3], "test", self.read)
+        self.assertEqual([s.exists() for s in sidecars], [True, False, False])
+        self.assertTrue(cache.sidecar_path(self.sources[3], "test", ".npz").exists())
+        self.assertEqual(self.reads, 4)
+
+
+class TestWarmCache(DataDriveTestCase):
+    night_date = date(2011, 7, 14)
+
+    def setUp(self):
+        super().setUp()
+        (night_path,) = make_data_drive(self.root, [self.night_date])
+        write_sky_bg(night_path, self.night_date)
+        write_color_normalized(
+            night_path / "Color Normalized" / "Four Pixel Radius" / "color_normalized.txt"
+        )
+        for number in (1, 2):
+            write_logfile_combined(
+                night_path / "Log Files Combined" / f"07-14-11_m23_7.0-{number:03}.txt",
+                seed=number,
+            )
+
+    def test_warm(self):
+        result = CliRunner().invoke(cli, ["cache", "warm", "2011"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        kinds = {p.parent.name for p in self.cache.glob("sidecars/*/*")}
+        self.assertEqual(kinds, {"sky_bg", "color_normalized", "logfile_combined"})
+        self.assertEqual(len(list(self.cache.glob("sidecars/logfile_combined/*"))), 2)
+
+        d = self.night_date
+        with patch("trout.files.logfile_combined_file.read_numeric_rows") as read:
+            data = LogFileCombined(d, 2).data
+            color_normalized = Night(d.year, d.month, d.day).get_color_normalized(4)
+        read.assert_not_called()
+        self.assertEqual(data.index.name, "Star_no")
+        self.assertEqual(len(data), 100)
+        self.assertEqual(color_normalized.index[0], 1)
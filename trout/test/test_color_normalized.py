@@ -0,0 +1,112 @@
+import re
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+
+from trout.intra.color_normalized import (
+    check_color_normalized,
+    color_normalized_cube,
+    database_fluxes,
+)
+from trout.test.data_drive import DataDriveTestCase, make_data_drive, write_color_normalized
+
+
+def fake_query(rows, tables):
+    """
+    Returns a stand-in for `query` answering the listing of `tables` and the
+    star table queries with the `rows` of their stars
+    """
+    queries = []
+
+    def query(sql):
+        queries.append(sql)
+        if "information_schema" in sql:
+            return [(table,) for table in tables]
+        stars = {int(star) for star in re.findall(r"SELECT (\d+) AS star", sql)}
+        return [row for row in rows if row[0] in stars]
+
+    return query, queries
+
+
+class TestColorNormalized(DataDriveTestCase):
+    night_dates = [date(2011, 7, 14), date(2011, 7, 16), date(2011, 7, 20)]
+
+    def setUp(self):
+        super().setUp()
+        paths = make_data_drive(self.root, self.night_dates)
+        self.values = {}
+        # The last night has no Color Normalized folder
+        for n, (night_date, path) in enumerate(zip(self.night_dates[:2], paths)):
+            self.values[night_date] = write_color_normalized(
+                path / "Color Normalized" / "Four Pixel Radius" / "color_normalized.txt",
+                n_stars=5 + n,
+                seed=n,
+            )
+
+    def test_cube(self):
+        cube = color_normalized_cube([2011])
+        np.testing.assert_array_equal(cube.stars, [1, 2, 3, 4, 5, 6])
+        self.assertEqual(cube.nights, tuple(self.night_dates[:2]))
+        first, second = self.night_dates[:2]
+        np.testing.assert_allclose(cube.values[:5, 0], self.values[first][:, 1], atol=1e-3)
+        self.assertTrue(np.isnan(cube.values[5, 0]))
+        np.testing.assert_allclose(cube.values[:, 1], self.values[second][:, 1], atol=1e-3)
+        self.assertEqual(cube.failures, {})
+
+    def test_check(self):
+        cube = color_normalized_cube([2011])
+        first, second = cube.nights
+        rows = [
+            (star, night, float(cube.values[star - 1, index]))
+            for star in cube.stars
+            for index, night in enumerate(cube.nights)
+            if not np.isnan(cube.values[star - 1, index])
+        ]
+        rows = [r for r in rows if (r[0], r[1]) != (2, first)]  # Not uploaded
+        rows = [(s, d, f + 100 if (s, d) == (4, second) else f) for s, d, f in rows]
+        rows.append((6, first, 10.0))  # Not in the files
+        rows.append((1, date(2011, 7, 15), 10.0))  # Another night in the range
+        query, queries = fake_query(rows, [f"star_{star}_4px" for star in range(1, 7)])
+        with patch("trout.intra.color_normalized.query", query):
+            mismatches = check_color_normalized(cube)
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(queries[1].count("UNION ALL"), 5)
+        self.assertIn("FROM star_6_4px WHERE", queries[1])
+        self.assertEqual(
+            list(mismatches[["star", "night", "mismatch"]].itertuples(index=False, name=None)),
+            [
+                (2, first, "missing in database"),
+                (4, second, "different"),
+                (6, first, "missing in files"),
+            ],
+        )
+
+        query, queries = fake_query([], ["star_1_4px_exp"])
+        with patch("trout.intra.color_normalized.query", query):
+            check_color_normalized(cube, is_primary=False)
+        self.assertIn("FROM star_1_4px_exp WHERE", queries[1])
+
+    def test_database_fluxes_batches(self):
+        night = date(2011, 7, 14)
+        rows = [(star, night, Decimal(star) / 4) for star in range(1, 8)]
+        # Star 3 has no table
+        tables = [f"star_{star}_4px" for star in range(1, 8) if star != 3]
+        query, queries = fake_query(rows, tables)
+        with patch("trout.intra.color_normalized.query", query), patch(
+            "trout.intra.color_normalized.DATABASE_BATCH_SIZE", 2
+        ):
+            fluxes = database_fluxes(range(1, 8), [night])
+        self.assertEqual(len(queries), 4)
+        self.assertFalse(any("star_3_4px" in sql for sql in queries))
+        self.assertTrue(all("flux::float" in sql for sql in queries[1:]))
+        self.assertEqual(fluxes[night].dtype, float)
+        np.testing.assert_array_equal(fluxes[night], [0.25, 0.5, np.nan, 1, 1.25, 1.5, 1.75])
+
+    def test_check_other_radius(self):
+        with self.assertWarns(UserWarning):
+            cube = color_normalized_cube([2011], radius=5)
+        self.assertEqual(len(cube.failures), 2)
+        with self.assertRaises(ValueError):
+            check_color_normalized(cube)
@@ -0,0 +1,96 @@
+import tracemalloc
+from datetime import date
+
+import numpy as np
+from astropy.io import fits
+from astropy.stats import sigma_clip
+
+from trout.intra.combine import combine_images, combine_night, tile_rows
+from trout.intra.night import Night
+from trout.test.data_drive import (
+    DataDriveTestCase,
+    make_data_drive,
+    write_aligned_combined,
+    write_frame,
+)
+
+
+class TestCombine(DataDriveTestCase):
+    night_date = date(2011, 7, 14)
+
+    def setUp(self):
+        super().setUp()
+        (night_path,) = make_data_drive(self.root, [self.night_date])
+        rng = np.random.default_rng(0)
+        self.frames = rng.normal(100, 5, (9, 20, 14)).astype("float32")
+        self.frames[3, 4, 5] = 1e5  # A cosmic ray
+        self.paths = [
+            write_frame(night_path, "Aligned", i + 1, frame, {"OBJECT": "M23"})
+            for i, frame in enumerate(self.frames)
+        ]
+        for number in (1, 2):
+            write_aligned_combined(night_path, number, self.frames[number])
+
+    def test_methods(self):
+        # A budget of a few rows per tile
+        budget = 3 * 9 * 14 * 8 * 3
+        expected = {
+            "mean": self.frames.astype(np.float64).mean(axis=0),
+            "median": np.median(self.frames, axis=0),
+            "sigma_clip": sigma_clip(self.frames, sigma=3, maxiters=5, axis=0).mean(axis=0),
+        }
+        for method, values in expected.items():
+            with self.subTest(method=method):
+                combined = combine_images(self.paths, method=method, memory_budget=budget)
+                self.assertEqual(combined.dtype, np.float32)
+                np.testing.assert_allclose(combined, values, rtol=1e-5)
+        self.assertLess(expected["sigma_clip"][4, 5], 110)
+
+    def test_tile_rows(self):
+        self.assertEqual(tile_rows(9, (20, 14), "median", 9 * 14 * 8 * 5 * 4, 2), 2)
+        self.assertEqual(tile_rows(9, (20, 14), "median", 1, 1), 1)
+        self.assertEqual(tile_rows(9, (20, 14), "median", 10**9, 1), 20)
+
+    def test_peak_memory_within_budget(self):
+        rng = np.random.default_rng(1)
+        paths = []
+        for i in range(10):
+            path = self.tmp / f"large-{i}.fit"
+            fits.PrimaryHDU(rng.normal(100, 5, (400, 300)).astype("float32")).writeto(path)
+            paths.append(path)
+        budget = 4 * 1024**2
+        for method in ("mean", "median", "sigma_clip"):
+            with self.subTest(method=method):
+                tracemalloc.start()
+                try:
+                    combined = combine_images(paths, method=method, memory_budget=budget)
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+                # The combined image is returned, it isn't part of the budget
+                self.assertLessEqual(peak - combined.nbytes, budget * 1.1)
+
+    def test_workers_and_output(self):
+        output = self.tmp / "deep.fit"
+        combined = combine_images(
+            self.paths, output=output, memory_budget=9 * 14 * 8 * 4, workers=2
+        )
+        np.testing.assert_allclose(combined, np.median(self.frames, axis=0), rtol=1e-6)
+        with fits.open(output) as hdul:
+            np.testing.assert_array_equal(hdul[0].data, combined)
+            self.assertEqual(hdul[0].header["NCOMBINE"], 9)
+            self.assertEqual(hdul[0].header["COMBMETH"], "median")
+            self.assertEqual(hdul[0].header["OBJECT"], "M23")
+
+    def test_combine_night(self):
+        night = Night(self.night_date.year, self.night_date.month, self.night_date.day)
+        combined = combine_night(night, numbers=range(1, 4), method="mean")
+        np.testing.assert_allclose(combined, self.frames[:3].mean(axis=0), rtol=1e-5)
+        combined = combine_night(night, source="aligned_combined", method="mean")
+        np.testing.assert_allclose(combined, self.frames[1:3].mean(axis=0), rtol=1e-5)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            combine_images(self.paths, method="mode")
+        with self.assertRaises(ValueError):
+            combine_images([])
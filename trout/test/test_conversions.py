@@ -0,0 +1,42 @@
+import math
+import unittest
+
+import numpy as np
+
+from trout.conversions import (flux_error_to_magnitude_error_4px,
+                               flux_to_magnitude_4px, mag_4px_to_flux,
+                               mag_error_to_flux_error_4px)
+
+
+class TestConversions(unittest.TestCase):
+    def test_scalar(self):
+        mag = flux_to_magnitude_4px(1e5)
+        self.assertIsInstance(mag, float)
+        self.assertAlmostEqual(mag, 24.176 - 2.6148 * math.log10(1e5))
+        self.assertAlmostEqual(mag_4px_to_flux(mag), 1e5, places=6)
+
+    def test_array_round_trip(self):
+        flux = np.array([1.0, 1e3, 2.5e5, 1e7])
+        mags = flux_to_magnitude_4px(flux)
+        self.assertEqual(mags.shape, flux.shape)
+        np.testing.assert_allclose(mag_4px_to_flux(mags), flux)
+
+    def test_non_positive_flux_is_nan(self):
+        self.assertTrue(math.isnan(flux_to_magnitude_4px(0)))
+        mags = flux_to_magnitude_4px([-5, 0, 100])
+        self.assertTrue(np.all(np.isnan(mags[:2])))
+        self.assertFalse(np.isnan(mags[2]))
+
+    def test_error_propagation(self):
+        flux, flux_error = np.array([1e4, 1e6]), np.array([100, 1e3])
+        mag_error = flux_error_to_magnitude_error_4px(flux, flux_error)
+        # Compare against a finite difference
+        expected = flux_to_magnitude_4px(flux - flux_error / 2) - flux_to_magnitude_4px(
+            flux + flux_error / 2
+        )
+        np.testing.assert_allclose(mag_error, expected, rtol=1e-3)
+        np.testing.assert_allclose(
+            mag_error_to_flux_error_4px(flux_to_magnitude_4px(flux), mag_error),
+            flux_error,
+        )
+        self.assertTrue(math.isnan(flux_error_to_magnitude_error_4px(0, 1)))
@@ -0,0 +1,39 @@
+import unittest
+
+import numpy as np
+
+from trout.files.reference_log_file import ReferenceLogFile
+from trout.stars.duplicates import (REF_REVISED_71, REF_WITH_NEW_STARS,
+                                    duplicate_groups, neighbor_graph)
+
+
+class TestDuplicateGroups(unittest.TestCase):
+    def test_groups_are_connected_components(self):
+        for reference, radius in ((REF_REVISED_71, 1), (REF_WITH_NEW_STARS, 3)):
+            with self.subTest(reference=reference, radius=radius):
+                first, second, distances = neighbor_graph(radius, reference)
+                self.assertTrue(np.all(first < second))
+                self.assertTrue(np.all(distances <= radius))
+
+                groups = duplicate_groups(radius, reference)
+                group_of = {}
+                for group in groups:
+                    self.assertEqual(group.brightest, min(group.members))
+                    for member in group.members:
+                        self.assertNotIn(member, group_of)
+                        group_of[member] = group.brightest
+                for a, b in zip(first, second):
+                    self.assertEqual(group_of[a], group_of[b])
+
+    def test_reference_files_are_distinct(self):
+        self.assertIsNot(
+            ReferenceLogFile.get_ref_revised_71(),
+            ReferenceLogFile.get_ref_with_new_stars(),
+        )
+
+    def test_cached(self):
+        self.assertIs(duplicate_groups(2), duplicate_groups(2))
+
+    def test_unknown_reference(self):
+        with self.assertRaises(ValueError):
+            neighbor_graph(1, "ref_unknown")
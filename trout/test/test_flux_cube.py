@@ -0,0 +1,81 @@
+import os
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from trout.intra.flux_cube import read_flux_log
+from trout.intra.night import Night
+from trout.test.data_drive import (
+    DataDriveTestCase,
+    make_data_drive,
+    write_flux_log,
+    write_sky_bg,
+)
+
+
+class TestFluxCube(DataDriveTestCase):
+    night_date = date(2011, 7, 14)
+
+    def setUp(self):
+        super().setUp()
+        (self.night_path,) = make_data_drive(self.root, [self.night_date])
+        write_sky_bg(self.night_path, self.night_date, n_images=5)
+        self.folder = self.night_path / "Flux Logs Combined" / "Four Pixel Radius"
+        write_flux_log(self.folder, self.night_date, 1, [10, 11, 12, 13, 14])
+        write_flux_log(self.folder, self.night_date, 3, [30, 32], images=[1, 3])
+
+    def night(self):
+        d = self.night_date
+        return Night(d.year, d.month, d.day)
+
+    def test_cube(self):
+        cube = self.night().flux_cube(4)
+        np.testing.assert_array_equal(cube.stars, [1, 3])
+        np.testing.assert_array_equal(cube.images, [1, 2, 3, 4, 5])
+        np.testing.assert_array_equal(
+            cube.flux, [[10, 11, 12, 13, 14], [30, np.nan, 32, np.nan, np.nan]]
+        )
+        sky_bg = self.night().sky_bg
+        np.testing.assert_array_equal(cube.times, sky_bg["Date"].to_numpy())
+
+    def test_cached_until_folder_changes(self):
+        self.night().flux_cube(4)
+        with patch("trout.intra.flux_cube.read_flux_log") as read:
+            cube = self.night().flux_cube(4)
+        read.assert_not_called()
+        self.assertIsInstance(cube.flux, np.memmap)
+        self.assertEqual(cube.flux.shape, (2, 5))
+
+        write_flux_log(self.folder, self.night_date, 2, [20, 21, 22])
+        cube = self.night().flux_cube(4)
+        np.testing.assert_array_equal(cube.stars, [1, 2, 3])
+        self.assertEqual(len(list(self.cache.glob("sidecars/flux_cube/*.npy"))), 2)
+
+    def test_flux_log_rewritten_in_place(self):
+        self.night().flux_cube(4)
+        mtime_ns = self.folder.stat().st_mtime_ns
+        write_flux_log(self.folder, self.night_date, 1, [1, 2, 3, 4, 5.5])
+        os.utime(self.folder, ns=(mtime_ns, mtime_ns))
+        # The folder was modified too recently for its listing to be reused,
+        # it's listed again with the rewritten flux log's time and size
+        cube = self.night().flux_cube(4)
+        np.testing.assert_array_equal(cube.flux[0], [1, 2, 3, 4, 5.5])
+
+    def test_cached_cube_keyed_without_stating_flux_logs(self):
+        self.night().flux_cube(4)
+        with patch("os.stat", wraps=os.stat) as stat:
+            self.night().flux_cube(4)
+        stated = [Path(call.args[0]) for call in stat.call_args_list]
+        self.assertNotIn(self.folder, [path.parent for path in stated])
+
+    def test_missing_radius(self):
+        with self.assertRaises(ValueError):
+            self.night().flux_cube(5)
+
+    def test_read_flux_log(self):
+        path = write_flux_log(self.folder, self.night_date, 4, [5, 6], images=[7, 9])
+        images, flux = read_flux_log(path)
+        np.testing.assert_array_equal(images, [7, 9])
+        np.testing.assert_array_equal(flux, [5, 6])
@@ -0,0 +1,63 @@
+from datetime import date
+
+import numpy as np
+
+from trout.intra.night import Night
+from trout.test.data_drive import DataDriveTestCase, make_data_drive, write_frame
+
+
+class TestFrames(DataDriveTestCase):
+    night_date = date(2011, 7, 14)
+
+    def setUp(self):
+        super().setUp()
+        (night_path,) = make_data_drive(self.root, [self.night_date])
+        rng = np.random.default_rng(0)
+        self.frames = {}
+        for number in (3, 1, 2, 5, 4):
+            self.frames[number] = rng.uniform(0, 1000, (16, 12)).astype("float32")
+            write_frame(
+                night_path, "Aligned", number, self.frames[number], {"EXPTIME": number}
+            )
+        write_frame(night_path, "Raw Calibrated Images", 1, self.frames[1])
+
+    def night(self):
+        d = self.night_date
+        return Night(d.year, d.month, d.day)
+
+    def test_iterates_in_order(self):
+        frames = self.night().aligned_frames
+        self.assertEqual(len(frames), 5)
+        numbers = []
+        for frame in frames:
+            numbers.append(frame.number)
+            np.testing.assert_array_equal(frame.data, self.frames[frame.number])
+            self.assertEqual(frame.header["EXPTIME"], frame.number)
+        self.assertEqual(numbers, [1, 2, 3, 4, 5])
+        self.assertEqual(len(self.night().raw_calibrated_frames), 1)
+
+    def test_chunks(self):
+        chunks = list(self.night().aligned_frames.chunks(2))
+        self.assertEqual([list(c.numbers) for c in chunks], [[1, 2], [3, 4], [5]])
+        self.assertEqual(chunks[0].data.shape, (2, 16, 12))
+
+        medians = list(self.night().aligned_frames.stack_chunks(3, method="median"))
+        np.testing.assert_allclose(
+            medians[0].data, np.median([self.frames[i] for i in (1, 2, 3)], axis=0)
+        )
+        np.testing.assert_allclose(
+            medians[1].data, np.median([self.frames[i] for i in (4, 5)], axis=0)
+        )
+
+    def test_mean(self):
+        np.testing.assert_allclose(
+            self.night().aligned_frames.mean(chunk_size=2),
+            np.mean(list(self.frames.values()), axis=0, dtype=np.float64),
+            rtol=1e-6,
+        )
+
+    def test_headers(self):
+        headers = self.night().aligned_frames.headers()
+        self.assertEqual(list(headers.index), [1, 2, 3, 4, 5])
+        self.assertEqual(list(headers["EXPTIME"]), [1, 2, 3, 4, 5])
+        self.assertEqual(headers.loc[2, "path"].name, "m23_7.0-002.fit")
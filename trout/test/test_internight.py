@@ -1,7 +1,12 @@
 import random
 import unittest
+from unittest.mock import patch
 
-from trout.internight import _SPECIAL_STARS, InternightBands, get_band
+import numpy as np
+
+from trout.internight import (_SPECIAL_STARS, BAND_NAMES, InternightBands,
+                              _get_band_for_color, bands, get_band,
+                              star_band_codes)
 from trout.stars.utils import STAR_END, STAR_START
 
 
@@ -18,3 +23,38 @@ class TestColor(unittest.TestCase):
             s = random.choice(range(STAR_START, STAR_END + 1))
             with self.subTest(msg=f"Testing band for star: {i}"):
                 get_band(s)
+
+
+class TestVectorizedBands(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        colors = rng.uniform(-1, 8, STAR_END + 1)
+        # Sprinkle missing and zero colors as well as exact band edges
+        colors[rng.choice(len(colors), 200)] = np.nan
+        colors[rng.choice(len(colors), 50)] = 0
+        colors[1:7] = [0.135, 0.455, 1.063, 7, 0.1351, 7.0001]
+        self.colors = colors
+        self._clear_caches()
+        patcher = patch("trout.internight.get_colors", return_value=colors)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._clear_caches)
+
+    def _clear_caches(self):
+        for fn in (star_band_codes, bands, get_band):
+            fn.cache_clear()
+
+    def test_matches_scalar_band(self):
+        codes = star_band_codes()
+        for star in range(STAR_START, STAR_END + 1):
+            c = None if np.isnan(self.colors[star]) else self.colors[star]
+            with self.subTest(star=star):
+                self.assertEqual(
+                    BAND_NAMES[codes[star]], _get_band_for_color(star, c)
+                )
+
+    def test_bands_partition_stars(self):
+        all_bands = bands()
+        members = [s for band in all_bands.values() for s in band]
+        self.assertEqual(sorted(members), list(range(STAR_START, STAR_END + 1)))
+        self.assertEqual(all_bands[InternightBands.SPECIAL_STARS], _SPECIAL_STARS)
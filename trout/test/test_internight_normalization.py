@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+from trout.internight import InternightBands
+from trout.internight.normalization import normalize
+
+
+class TestInternightNormalization(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.n_stars, self.n_nights = 60, 25
+        self.signal = rng.uniform(1e4, 1e6, self.n_stars)
+        self.bands = {
+            InternightBands.COLOR_BAND_1: range(1, 31),
+            InternightBands.BRIGHTNESS_BAND: range(31, 61),
+        }
+        # Each band has its own nightly transparency
+        transparency = rng.uniform(0.5, 1.0, (2, self.n_nights))
+        self.flux = self.signal[:, np.newaxis] * np.repeat(transparency, 30, axis=0)
+
+    def test_recovers_constant_signal(self):
+        result = normalize(self.flux, bands=self.bands)
+        self.assertEqual(result.factors.shape, (2, self.n_nights))
+        # Normalized flux of every star is constant over the nights
+        np.testing.assert_allclose(
+            result.normalized, result.normalized[:, :1].repeat(self.n_nights, axis=1)
+        )
+
+    def test_absent_stars_and_reference_stars(self):
+        flux = self.flux.copy()
+        flux[3, 5] = 0
+        flux[40, :] = 0
+        result = normalize(flux, bands=self.bands, reference_stars=range(1, 11))
+        self.assertEqual(result.normalized[3, 5], 0)
+        self.assertTrue(np.all(result.normalized[40] == 0))
+        # Brightness band has no reference stars
+        self.assertTrue(np.all(np.isnan(result.factors[1])))
+        self.assertTrue(np.all(np.isfinite(result.factors[0])))
+
+    def test_stars_outside_bands(self):
+        result = normalize(self.flux, stars=range(10, 70), bands=self.bands)
+        self.assertTrue(np.all(result.band_of_star[-9:] == -1))
+        self.assertTrue(np.all(np.isnan(result.normalized[-9:])))
+
+    def test_invalid_shapes(self):
+        with self.assertRaises(ValueError):
+            normalize(self.flux[0], bands=self.bands)
+        with self.assertRaises(ValueError):
+            normalize(self.flux, stars=range(1, 5), bands=self.bands)
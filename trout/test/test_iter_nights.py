@@ -0,0 +1,84 @@
+import threading
+from datetime import date, timedelta
+
+from trout.exceptions import NightLoadError
+from trout.intra.year import Year
+from trout.test.data_drive import DataDriveTestCase, make_data_drive, write_sky_bg
+
+
+class TestIterNights(DataDriveTestCase):
+    night_dates = [date(2011, 6, 1) + timedelta(days=2 * i) for i in range(8)]
+    broken = date(2011, 6, 9)
+
+    def setUp(self):
+        super().setUp()
+        for night_date, path in zip(self.night_dates, make_data_drive(self.root, self.night_dates)):
+            if night_date != self.broken:
+                write_sky_bg(path, night_date, n_images=5)
+
+    def test_order_and_data(self):
+        def n_images(night):
+            return len(night.sky_bg)
+
+        loaded = list(
+            Year(2011).iter_nights(load=("sky_bg", n_images), errors="collect")
+        )
+        self.assertEqual([n.night.night_date for n in loaded], self.night_dates)
+        for night, data, errors in loaded:
+            if night.night_date == self.broken:
+                self.assertEqual(set(errors), {"sky_bg", "n_images"})
+                self.assertEqual(data, {})
+            else:
+                self.assertEqual(errors, {})
+                self.assertEqual(data["n_images"], 5)
+                self.assertEqual(len(data["sky_bg"]), 5)
+
+    def test_prefetch_is_bounded(self):
+        lock = threading.Lock()
+        started = []
+        in_flight = []
+
+        def track(night):
+            with lock:
+                started.append(night.night_date)
+            return night.night_date
+
+        for night, data, _ in Year(2011).iter_nights(prefetch=2, load=(track,)):
+            with lock:
+                # The current night and at most 2 ahead of it were loaded
+                in_flight.append(len(started) - self.night_dates.index(night.night_date))
+            if night.night_date >= self.broken - timedelta(days=2):
+                break
+        self.assertLessEqual(max(in_flight), 3)
+
+    def test_no_prefetch(self):
+        loaded = []
+
+        def track(night):
+            loaded.append((night.night_date, threading.get_ident()))
+            return night.night_date
+
+        for night, data, _ in Year(2011).iter_nights(prefetch=0, load=(track,)):
+            # Nothing is loaded ahead of the current night
+            self.assertEqual(loaded[-1][0], night.night_date)
+            self.assertEqual(data["track"], night.night_date)
+            if night.night_date >= self.broken:
+                break
+        self.assertEqual({ident for _, ident in loaded}, {threading.get_ident()})
+
+    def test_negative_prefetch(self):
+        with self.assertRaises(ValueError):
+            next(Year(2011).iter_nights(prefetch=-1))
+
+    def test_raises_at_failed_night(self):
+        seen = []
+        with self.assertRaises(NightLoadError) as raised:
+            for night, _, _ in Year(2011).iter_nights(prefetch=3):
+                seen.append(night.night_date)
+        self.assertEqual(seen, [d for d in self.night_dates if d < self.broken])
+        self.assertEqual(raised.exception.night.night_date, self.broken)
+        self.assertIn("sky_bg", raised.exception.errors)
+
+    def test_unknown_errors_mode(self):
+        with self.assertRaises(ValueError):
+            next(Year(2011).iter_nights(errors="ignore"))
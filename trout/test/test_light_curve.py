@@ -0,0 +1,92 @@
+import os
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from trout.intra.light_curve import intra_light_curve
+from trout.intra.night import Night
+from trout.test.data_drive import (
+    DataDriveTestCase,
+    make_data_drive,
+    write_logfile_combined,
+    write_sky_bg,
+)
+
+
+class TestIntraLightCurve(DataDriveTestCase):
+    night_dates = [date(2011, 7, 14), date(2011, 7, 16), date(2012, 6, 2)]
+
+    def setUp(self):
+        super().setUp()
+        self.values = {}
+        self.paths = make_data_drive(self.root, self.night_dates)
+        for n, (night_date, path) in enumerate(zip(self.night_dates, self.paths)):
+            write_sky_bg(path, night_date, n_images=4)
+            for number in (1, 2, 4):
+                self.values[night_date, number] = write_logfile_combined(
+                    path / "Log Files Combined" / f"{night_date:%m-%d-%y}_m23_7.0-{number:03}.txt",
+                    n_stars=10 + n,
+                    seed=10 * n + number,
+                )
+
+    def test_light_curve(self):
+        df = intra_light_curve(3, [2011, 2012], 4)
+        self.assertEqual(len(df), 9)
+        self.assertEqual(list(df["Image"]), [1, 2, 4] * 3)
+        self.assertEqual(
+            list(df.columns), ["Night", "Image", "ADU", "Sky ADU", "Avg FWHM", "X", "Y"]
+        )
+        for night_date, image, adu, sky, fwhm, x, y in df.itertuples(index=False):
+            row = self.values[night_date, image][2]
+            np.testing.assert_allclose([x, y, fwhm, sky, adu], row[[0, 1, 4, 5, 7]], atol=0.01)
+        last = self.night_dates[-1]
+        sky_bg = Night(last.year, last.month, last.day).sky_bg
+        np.testing.assert_array_equal(
+            df.index[-3:], sky_bg["Date"].reindex([1, 2, 4]).to_numpy()
+        )
+        self.assertEqual(df.attrs["failures"], {})
+
+    def test_other_stars_read_from_cubes(self):
+        intra_light_curve(1, [2011], 4)
+        with patch("trout.intra.light_curve.LogFileCombinedColumns.read") as read:
+            df = intra_light_curve(11, [2011], 5)
+        read.assert_not_called()
+        # Star 11 is only in the files of the second night
+        first, second = self.night_dates[:2]
+        self.assertTrue(df[df["Night"] == first]["ADU"].isna().all())
+        np.testing.assert_allclose(
+            df[df["Night"] == second]["ADU"],
+            [self.values[second, i][10][8] for i in (1, 2, 4)],
+            atol=0.01,
+        )
+
+    def test_logfile_rewritten_in_place(self):
+        intra_light_curve(3, [2011], 4)
+        night_date = self.night_dates[0]
+        folder = self.paths[0] / "Log Files Combined"
+        mtime_ns = folder.stat().st_mtime_ns
+        values = write_logfile_combined(
+            folder / f"{night_date:%m-%d-%y}_m23_7.0-002.txt", n_stars=10, seed=99
+        )
+        os.utime(folder, ns=(mtime_ns, mtime_ns))
+        # Listed again since the folder was modified too recently to reuse
+        # its listing
+        df = intra_light_curve(3, [2011], 4)
+        adu = df[(df["Night"] == night_date) & (df["Image"] == 2)]["ADU"]
+        np.testing.assert_allclose(adu, [values[2][7]], atol=0.01)
+
+    def test_cached_cubes_keyed_without_stating_logfiles(self):
+        intra_light_curve(3, [2011], 4)
+        folders = [path / "Log Files Combined" for path in self.paths]
+        with patch("os.stat", wraps=os.stat) as stat:
+            intra_light_curve(3, [2011], 4)
+        stated = [Path(call.args[0]).parent for call in stat.call_args_list]
+        self.assertFalse(set(folders) & set(stated))
+
+    def test_unknown_radius(self):
+        with self.assertWarns(UserWarning):
+            df = intra_light_curve(1, [2012], 9)
+        self.assertEqual(len(df), 0)
+        self.assertEqual(list(df.attrs["failures"]), [self.night_dates[2]])
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from trout.files.logfile_combined_file import LogFileCombinedFile
+from trout.test.data_drive import write_logfile_combined
+
+
+class TestLogFileCombinedFile(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "07-14-11_m23_7.0-012.txt"
+        self.values = write_logfile_combined(self.path, n_stars=50, radii=(3, 4, 5))
+        self.file = LogFileCombinedFile(self.path)
+
+    def test_accessors(self):
+        np.testing.assert_allclose(self.file.get_adu(4), self.values[:, 7], atol=0.005)
+        np.testing.assert_allclose(self.file.get_sky_adu_column(), self.values[:, 5], atol=0.005)
+        np.testing.assert_allclose(self.file.get_x_position_column(), self.values[:, 0], atol=0.005)
+        np.testing.assert_allclose(self.file.get_y_position_column(), self.values[:, 1], atol=0.005)
+        self.assertEqual(len(self.file), 50)
+        self.assertEqual(self.file.img_number(), 12)
+        with self.assertRaises(ValueError):
+            self.file.get_adu(9)
+
+    def test_file_stated_once(self):
+        cache_dir = patch("trout.cache.CACHE_DIR", str(self.path.parent / "cache"))
+        cache_dir.start()
+        self.addCleanup(cache_dir.stop)
+        for use_cache in (False, True):
+            with self.subTest(use_cache=use_cache):
+                file = LogFileCombinedFile(self.path, use_cache=use_cache)
+                with patch("os.stat", wraps=os.stat) as stat:
+                    for star in range(1, 51):
+                        file.get_adu(4)[star - 1]
+                        file.get_x_position_column()
+                        file.get_star_data(star)
+                stated = [c for c in stat.call_args_list if Path(c.args[0]) == self.path]
+                self.assertEqual(len(stated), 1)
+
+    def test_star_data(self):
+        star = self.file.get_star_data(10)
+        self.assertAlmostEqual(star.x, self.values[9, 0], places=2)
+        self.assertEqual(list(star.radii_adu), [3, 4, 5])
+        self.assertAlmostEqual(star.radii_adu[5], self.values[9, 8], places=2)
+
+    def test_columns_accessors(self):
+        columns = self.file.columns()
+        np.testing.assert_allclose(columns.avg_fwhm(), self.values[:, 4], atol=0.005)
+        np.testing.assert_allclose(columns.sky_adu(), self.values[:, 5], atol=0.005)
+        np.testing.assert_allclose(columns.x(), self.values[:, 0], atol=0.005)
+
+    def test_frame_shares_values(self):
+        frame = self.file.columns().frame()
+        self.assertEqual(frame.index[0], 1)
+        self.assertEqual(frame.index.name, "Star_no")
+        self.assertTrue(np.shares_memory(frame.to_numpy(), self.file.data()))
+        expected = pd.read_csv(self.path, skiprows=8, delimiter=r"\s{2,}", engine="python")
+        np.testing.assert_array_equal(frame.to_numpy(), expected.to_numpy())
+        self.assertEqual(list(frame.columns), list(expected.columns))
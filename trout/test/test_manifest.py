@@ -0,0 +1,103 @@
+import os
+from datetime import date
+from unittest.mock import patch
+
+from trout.intra import manifest
+from trout.intra.logfile_combined import LogFileCombined
+from trout.intra.night import Night
+from trout.test.data_drive import (
+    DataDriveTestCase,
+    make_data_drive,
+    write_aligned_combined,
+    write_flux_log,
+    write_logfile_combined,
+)
+
+
+def settle(*folders):
+    """Sets the folders' modification time to the past like on a real drive"""
+    for folder in folders:
+        os.utime(folder, ns=(10**18, 10**18))
+
+
+class TestManifest(DataDriveTestCase):
+    night_date = date(2011, 7, 14)
+
+    def setUp(self):
+        super().setUp()
+        (self.night_path,) = make_data_drive(self.root, [self.night_date])
+        self.logfiles = self.night_path / "Log Files Combined"
+        for number in (1, 2, 10):
+            write_logfile_combined(self.logfiles / f"07-14-11_m23_7.0-{number:03}.txt")
+        write_aligned_combined(self.night_path, 3, [[1.0]])
+        write_flux_log(
+            self.night_path / "Flux Logs Combined" / "Four Pixel Radius",
+            self.night_date,
+            12,
+            [1, 2],
+        )
+        manifest.clear()
+        self.addCleanup(manifest.clear)
+
+    def test_listing_reused_until_folder_changes(self):
+        settle(self.logfiles)
+        first = manifest.listing(self.logfiles)
+        self.assertEqual(len(first), 3)
+        self.assertIs(manifest.listing(self.logfiles), first)
+
+        # Stored in the cache folder for later sessions
+        manifest.clear()
+        with patch("trout.intra.manifest._scan") as scan:
+            self.assertEqual(len(manifest.listing(self.logfiles)), 3)
+        scan.assert_not_called()
+
+        write_logfile_combined(self.logfiles / "07-14-11_m23_7.0-004.txt")
+        numbered = manifest.listing(self.logfiles).numbered(LogFileCombined.file_name_re, 3)
+        self.assertEqual(sorted(numbered), [1, 2, 4, 10])
+
+    def test_recently_modified_folder_listed_again(self):
+        manifest.listing(self.logfiles)
+        with patch("trout.intra.manifest._scan", wraps=manifest._scan) as scan:
+            manifest.listing(self.logfiles)
+        scan.assert_called_once()
+
+    def test_files_key(self):
+        settle(self.logfiles)
+        folder = manifest.listing(self.logfiles)
+        path = self.logfiles / "07-14-11_m23_7.0-002.txt"
+        stat = path.stat()
+        key = folder.files_key([path, self.logfiles / "missing.txt"])
+        self.assertEqual(
+            key,
+            (
+                os.path.abspath(self.logfiles),
+                (path.name, stat.st_mtime_ns, stat.st_size),
+                ("missing.txt", None, None),
+            ),
+        )
+        # Listed again from the cache folder
+        manifest.clear()
+        self.assertEqual(manifest.listing(self.logfiles).files_key([path]), key[:2])
+
+    def test_missing_folder(self):
+        self.assertEqual(manifest.listing(self.night_path / "Charts").glob("*"), [])
+
+    def test_walk_and_night_files(self):
+        self.assertEqual(manifest.walk(self.root), 7)
+        files = manifest.night_files(self.night_path).set_index("kind")
+        self.assertEqual(
+            sorted(files.loc["Log Files Combined", "image"]), [1, 2, 10]
+        )
+        self.assertEqual(files.loc["Aligned Combined", "image"], 3)
+        flux_log = files.loc["Flux Logs Combined"]
+        self.assertEqual((flux_log["star"], flux_log["radius"]), (12, 4))
+
+    def test_lookups(self):
+        d = self.night_date
+        night = Night(d.year, d.month, d.day)
+        self.assertEqual([f.image_number() for f in night.logfile_combined], [1, 2, 10])
+        self.assertEqual(LogFileCombined(d, 10).path.name, "07-14-11_m23_7.0-010.txt")
+        with self.assertRaises(ValueError):
+            LogFileCombined(d, 5)
+        self.assertEqual(night.get_star_fluxlog_for_radius(12, 4).image_number(), 12)
+        self.assertEqual([f.image_number() for f in night.aligned_combined], [3])
@@ -0,0 +1,33 @@
+import datetime
+import unittest
+
+import numpy as np
+
+from trout.moon import moon_distance, phase, position
+
+
+class TestVectorizedMoon(unittest.TestCase):
+    def setUp(self):
+        # A night's worth of image timestamps, a few minutes apart
+        start = datetime.datetime(2019, 6, 20, 3, 0, 0)
+        self.datetimes = [start + datetime.timedelta(seconds=97 * i) for i in range(250)]
+        self.dates = [datetime.date(2020, 1, 1) + datetime.timedelta(days=i) for i in range(60)]
+
+    def test_moon_distance_matches_scalar(self):
+        distances = moon_distance(np.array(self.datetimes, dtype="datetime64[ns]"))
+        expected = np.array([moon_distance(d) for d in self.datetimes])
+        np.testing.assert_allclose(distances, expected, atol=1e-3)
+
+    def test_moon_distance_nat(self):
+        dates = np.array(["2019-06-20T03:00", "NaT"], dtype="datetime64[ns]")
+        distances = moon_distance(dates)
+        self.assertFalse(np.isnan(distances[0]))
+        self.assertTrue(np.isnan(distances[1]))
+
+    def test_position_and_phase_match_scalar(self):
+        positions = position(self.dates)
+        phases = phase(self.dates)
+        for d, pos, name in zip(self.dates, positions, phases):
+            with self.subTest(date=d):
+                self.assertAlmostEqual(float(position(d)), pos)
+                self.assertEqual(phase(d), name)
@@ -0,0 +1,44 @@
+from datetime import date
+
+import numpy as np
+
+from trout.intra.night import Night
+from trout.test.data_drive import DataDriveTestCase, make_data_drive, write_sky_bg
+
+
+class TestSkyBgCache(DataDriveTestCase):
+    night_date = date(2011, 7, 14)
+
+    def setUp(self):
+        super().setUp()
+        (self.night_path,) = make_data_drive(self.root, [self.night_date])
+        self.sky_bg_path = write_sky_bg(self.night_path, self.night_date)
+
+    def night(self):
+        d = self.night_date
+        return Night(d.year, d.month, d.day)
+
+    def test_derived_columns(self):
+        s = self.night().sky_bg
+        self.assertEqual(
+            list(s.columns[:5]),
+            ["Image_number", "Angle_status", "DateOnly", "Sunrise", "Sunset"],
+        )
+        angle = s["Cluster_Angle"]
+        expected = [""] + [
+            "INC" if angle[i - 1] < angle[i] else "DEC" for i in angle.index[1:]
+        ]
+        self.assertEqual(list(s["Angle_status"]), expected)
+        self.assertTrue(np.all(s["Moon_Distance"] > 0))
+        self.assertTrue(np.all(s["DateOnly"] == date(2011, 7, 15)))
+
+    def test_sidecar_reused_until_source_changes(self):
+        first = self.night().sky_bg
+        sidecars = list(self.cache.glob("sidecars/sky_bg/*.pkl"))
+        self.assertEqual(len(sidecars), 1)
+        # A new Night instance reads the sidecar instead of the text file
+        self.assertTrue(self.night().sky_bg.equals(first))
+
+        write_sky_bg(self.night_path, self.night_date, n_images=30, seed=1)
+        self.assertEqual(len(self.night().sky_bg), 30)
+        self.assertEqual(len(list(self.cache.glob("sidecars/sky_bg/*.pkl"))), 2)
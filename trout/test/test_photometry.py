@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from trout.intra.photometry import Apertures, aperture_photometry
+
+
+def brute_force(image, x, y, radius, sky_annulus):
+    rows, cols = np.indices(image.shape)
+    distance = np.hypot(rows - y, cols - x)
+    inner, outer = sky_annulus
+    sky = np.median(image[(distance > inner) & (distance <= outer)])
+    aperture = distance <= radius
+    return image[aperture].sum() - sky * aperture.sum(), sky
+
+
+class TestAperturePhotometry(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.images = rng.uniform(90, 110, (5, 60, 80)).astype("float32")
+        self.x = np.array([20.3, 50.0, 70.6, 2.2])
+        self.y = np.array([30.1, 15.7, 44.4, 3.9])
+        rows, cols = np.indices((60, 80))
+        for x, y in zip(self.x, self.y):
+            self.images += 5000 * np.exp(-((rows - y) ** 2 + (cols - x) ** 2) / 4)
+
+    def test_matches_brute_force(self):
+        result = aperture_photometry(
+            self.images, [3, 4.5], self.x, self.y, sky_annulus=(6, 9), batch_size=2
+        )
+        self.assertEqual(result.adu.shape, (5, 2, 4))
+        self.assertEqual(result.sky_adu.shape, (5, 4))
+        for i, image in enumerate(self.images):
+            for r, radius in enumerate([3, 4.5]):
+                for star, (x, y) in enumerate(zip(self.x, self.y)):
+                    adu, sky = brute_force(image, x, y, radius, (6, 9))
+                    self.assertAlmostEqual(result.adu[i, r, star], adu, delta=abs(adu) * 1e-5)
+                    self.assertAlmostEqual(result.sky_adu[i, star], sky, places=3)
+
+    def test_star_near_edge(self):
+        # Star 4 is near the corner, only pixels inside the image are counted
+        apertures = Apertures(self.x, self.y, [3], (60, 80), sky_annulus=(6, 9))
+        rows, cols = np.indices((60, 80))
+        expected_area = (np.hypot(rows - 3.9, cols - 2.2) <= 3).sum()
+        self.assertEqual(apertures.area[0, 3], expected_area)
+        self.assertEqual(apertures.area[0, 0], 29)
+
+    def test_single_image_and_threads(self):
+        single = aperture_photometry(self.images[2], 4, self.x, self.y)
+        batched = aperture_photometry(self.images, 4, self.x, self.y, max_workers=3, batch_size=1)
+        self.assertEqual(single.adu.shape, (1, 4))
+        np.testing.assert_allclose(single.adu, batched.adu[2])
+        self.assertEqual(single.radii, (4,))
+
+    def test_shape_mismatch(self):
+        apertures = Apertures(self.x, self.y, [3], (60, 80))
+        with self.assertRaises(ValueError):
+            apertures.measure(self.images[:, :50])
+
+    def test_no_radii(self):
+        with self.assertRaises(ValueError):
+            Apertures(self.x, self.y, [], (60, 80))
+
+    def test_star_not_found(self):
+        x, y = self.x.copy(), self.y.copy()
+        x[1], y[2] = np.nan, np.nan
+        result = aperture_photometry(self.images, [3, 4], x, y)
+        expected = aperture_photometry(self.images, [3, 4], self.x, self.y)
+        self.assertTrue(np.isnan(result.adu[:, :, 1:3]).all())
+        self.assertTrue(np.isnan(result.sky_adu[:, 1:3]).all())
+        np.testing.assert_array_equal(result.area[:, 1:3], 0)
+        np.testing.assert_allclose(result.adu[:, :, [0, 3]], expected.adu[:, :, [0, 3]])
@@ -0,0 +1,105 @@
+import os
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+
+from trout.intra.night import Night
+from trout.intra.quality import image_quality, image_quality_for_years
+from trout.test.data_drive import (
+    DataDriveTestCase,
+    make_data_drive,
+    write_alignment_stats,
+    write_logfile_combined,
+    write_sky_bg,
+)
+
+
+class TestImageQuality(DataDriveTestCase):
+    night_dates = [date(2011, 7, 14), date(2011, 7, 16), date(2011, 7, 18)]
+
+    def setUp(self):
+        super().setUp()
+        self.paths = make_data_drive(self.root, self.night_dates)
+        self.values = {}
+        # The first night is complete, the second has no aligned stats nor sky
+        # background and the third no Log Files Combined
+        for n, (night_date, path) in enumerate(zip(self.night_dates[:2], self.paths)):
+            for number in (1, 2, 3):
+                self.values[night_date, number] = write_logfile_combined(
+                    path / "Log Files Combined" / f"{night_date:%m-%d-%y}_m23_7.0-{number:03}.txt",
+                    n_stars=30,
+                    seed=10 * n + number,
+                )
+        write_sky_bg(self.paths[0], self.night_dates[0], n_images=3)
+        write_alignment_stats(self.paths[0], self.night_dates[0], [(1, 0.1, 2), (3, 0.3, 4)])
+
+    def night(self, night_date):
+        return Night(night_date.year, night_date.month, night_date.day)
+
+    def test_night(self):
+        night = self.night(self.night_dates[0])
+        df = image_quality(night)
+        self.assertEqual(
+            list(df.columns),
+            [
+                "Date",
+                "Moon_Distance",
+                "Cluster_Angle",
+                "Stars",
+                "Median FWHM",
+                "Median Sky ADU",
+                "Alignment Rotation",
+                "Alignment Shift",
+            ],
+        )
+        self.assertEqual(list(df.index), [1, 2, 3])
+        for image in (1, 2, 3):
+            values = self.values[night.night_date, image]
+            detected = values[:, 7] > 0
+            row = df.loc[image]
+            self.assertEqual(row["Stars"], detected.sum())
+            self.assertAlmostEqual(row["Median FWHM"], np.median(values[detected, 4]), 2)
+            self.assertAlmostEqual(row["Median Sky ADU"], np.median(values[detected, 5]), 2)
+        np.testing.assert_array_equal(df["Date"], night.sky_bg["Date"].to_numpy())
+        np.testing.assert_array_equal(df["Alignment Shift"], [2, np.nan, 4])
+
+    def test_cached(self):
+        night = self.night(self.night_dates[0])
+        image_quality(night)
+        with patch("trout.intra.quality._compute_image_quality") as compute:
+            image_quality(night)
+        compute.assert_not_called()
+
+    def test_logfile_rewritten_in_place(self):
+        night = self.night(self.night_dates[0])
+        image_quality(night)
+        folder = self.paths[0] / "Log Files Combined"
+        mtime_ns = folder.stat().st_mtime_ns
+        values = write_logfile_combined(
+            folder / f"{night.night_date:%m-%d-%y}_m23_7.0-002.txt", n_stars=30, seed=99
+        )
+        os.utime(folder, ns=(mtime_ns, mtime_ns))
+        detected = values[:, 7] > 0
+        row = image_quality(night).loc[2]
+        self.assertEqual(row["Stars"], detected.sum())
+        self.assertAlmostEqual(row["Median FWHM"], np.median(values[detected, 4]), 2)
+
+    def test_cached_table_keyed_without_stating_files(self):
+        night = self.night(self.night_dates[0])
+        image_quality(night)
+        with patch("os.stat", wraps=os.stat) as stat:
+            image_quality(night)
+        stated = {os.path.dirname(call.args[0]) for call in stat.call_args_list}
+        for folder in (self.paths[0] / "Log Files Combined", self.paths[0] / "Sky background"):
+            self.assertNotIn(str(folder), stated)
+
+    def test_years(self):
+        with self.assertWarns(UserWarning):
+            df = image_quality_for_years([2011])
+        self.assertEqual(list(df.index.get_level_values("night").unique()), self.night_dates[:2])
+        self.assertEqual(list(df.attrs["failures"]), [self.night_dates[2]])
+        second = df.loc[self.night_dates[1]]
+        self.assertTrue(second["Date"].isna().all())
+        self.assertTrue(second["Alignment Shift"].isna().all())
+        self.assertTrue((second["Stars"] > 0).all())
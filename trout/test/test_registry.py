@@ -0,0 +1,119 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from trout.intra.logfile_combined import LogFileCombined
+from trout.intra.night import Night
+from trout.intra.registry import Registry
+from trout.intra.year import Year
+from trout.test.data_drive import (
+    DataDriveTestCase,
+    make_data_drive,
+    write_logfile_combined,
+    write_sky_bg,
+)
+
+
+class Slow(metaclass=Registry):
+    inits = 0
+    fail = False
+
+    @classmethod
+    def registry_key(cls, key):
+        return key
+
+    def __init__(self, key):
+        time.sleep(0.01)
+        type(self).inits += 1
+        if type(self).fail:
+            raise ValueError(key)
+        self.key = key
+
+
+class TestRegistry(unittest.TestCase):
+    def setUp(self):
+        Slow.clear_registry()
+        Slow.inits, Slow.fail = 0, False
+
+    def test_initialized_once(self):
+        barrier = threading.Barrier(16)
+
+        def create(key):
+            barrier.wait()
+            return Slow(key % 2)
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            instances = list(executor.map(create, range(16)))
+        self.assertEqual(Slow.inits, 2)
+        self.assertEqual(len({id(i) for i in instances}), 2)
+        self.assertEqual(set(Slow.registered()), {0, 1})
+        self.assertEqual(Slow._key_locks, {})
+
+    def test_failed_init_not_registered(self):
+        Slow.fail = True
+        with self.assertRaises(ValueError):
+            Slow("a")
+        self.assertEqual(Slow.registered(), {})
+        self.assertEqual(Slow._key_locks, {})
+        Slow.fail = False
+        self.assertEqual(Slow("a").key, "a")
+        self.assertEqual(Slow.inits, 2)
+
+    def test_concurrent_failed_inits_drop_locks(self):
+        Slow.fail = True
+        barrier = threading.Barrier(8)
+
+        def create(_):
+            barrier.wait()
+            try:
+                return Slow("a")
+            except ValueError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            instances = list(executor.map(create, range(8)))
+        self.assertEqual(instances, [None] * 8)
+        self.assertEqual(Slow.inits, 8)
+        self.assertEqual(Slow._key_locks, {})
+
+
+class TestConcurrentSeason(DataDriveTestCase):
+    night_dates = [date(2011, 6, 1) + timedelta(days=3 * i) for i in range(12)]
+
+    def setUp(self):
+        super().setUp()
+        for night_date, path in zip(self.night_dates, make_data_drive(self.root, self.night_dates)):
+            write_sky_bg(path, night_date, n_images=10)
+            for number in (1, 2, 3):
+                write_logfile_combined(
+                    path / "Log Files Combined" / f"{night_date:%m-%d-%y}_m23_7.0-{number:03}.txt",
+                    n_stars=20,
+                    seed=number,
+                )
+
+    def test_load_season_concurrently(self):
+        barrier = threading.Barrier(8)
+
+        def load(task):
+            night_date, number = task
+            barrier.wait()
+            night = Night(night_date.year, night_date.month, night_date.day)
+            logfile = LogFileCombined(night_date, number)
+            return night, len(night.sky_bg), logfile, len(logfile.data), Year(2011)
+
+        tasks = [(d, n) for d in self.night_dates for n in (1, 2, 3)] * 2
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(load, tasks))
+
+        nights = Night.registered()
+        self.assertEqual(len(nights), 12)
+        self.assertEqual(len(LogFileCombined.registered()), 36)
+        for (night_date, number), (night, rows, logfile, stars, year) in zip(tasks, results):
+            self.assertIs(night, nights[Night.make_night_name(*night_date.timetuple()[:3])])
+            self.assertIs(logfile, LogFileCombined(night_date, number))
+            self.assertIs(logfile.night, night)
+            self.assertIs(year, Year(2011))
+            self.assertEqual((rows, stars), (10, 20))
+        self.assertEqual(list(Year(2011).nights), sorted(nights.values()))
@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from trout.files.reference_log_file import ReferenceLogFile
+from trout.files.spatial_index import StarSpatialIndex
+
+
+class TestStarSpatialIndex(unittest.TestCase):
+    def setUp(self):
+        self.ref = ReferenceLogFile.get_ref_revised_71()
+        self.index = self.ref.spatial_index()
+        self.xy = self.index.xy
+
+    def brute_force(self, point):
+        distances = np.sqrt(((self.xy - np.asarray(point)) ** 2).sum(axis=1))
+        order = np.lexsort((np.arange(len(distances)), distances))
+        return order, distances[order]
+
+    def test_nearest_matches_brute_force(self):
+        for star in (1, 2, 500, 1200, len(self.ref)):
+            with self.subTest(star=star):
+                point = self.ref.get_star_xy(star)
+                indices, distances = self.index.query_nearest(point, 6)
+                expected, expected_distances = self.brute_force(point)
+                self.assertEqual(list(indices), list(expected[:6]))
+                np.testing.assert_allclose(distances, expected_distances[:6])
+
+    def test_radius_matches_brute_force(self):
+        for star, radius in ((1, 8), (30, 20), (900, 1), (2000, 50)):
+            with self.subTest(star=star, radius=radius):
+                point = self.ref.get_star_xy(star)
+                indices, _ = self.index.query_radius(point, radius)
+                expected, expected_distances = self.brute_force(point)
+                expected = expected[expected_distances <= radius]
+                self.assertEqual(list(indices), list(expected))
+
+    def test_point_outside_field(self):
+        indices, _ = self.index.query_radius((-500, -500), 10)
+        self.assertEqual(len(indices), 0)
+        indices, _ = self.index.query_nearest((-500, -500), 3)
+        self.assertEqual(len(indices), 3)
+        for point in ((-3000, 5000), (20000, -100)):
+            with self.subTest(point=point):
+                indices, _ = self.index.query_nearest(point, 10)
+                self.assertEqual(list(indices), list(self.brute_force(point)[0][:10]))
+
+    def test_nearest_farther_than_field_extent(self):
+        # The field is 100 pixels wide, the nearest stars are much farther
+        index = StarSpatialIndex(np.array([0, 10, 100]), np.array([0, 0, 0]))
+        indices, distances = index.query_nearest((-1000, 0), 3)
+        self.assertEqual(list(indices), [0, 1, 2])
+        np.testing.assert_allclose(distances, [1000, 1010, 1100])
+
+    def test_pairs_within(self):
+        radius = 6
+        first, second, distances = self.index.pairs_within(radius)
+        diff = self.xy[:, None, :] - self.xy[None, :, :]
+        all_distances = np.sqrt((diff**2).sum(axis=2))
+        expected = set(zip(*np.nonzero(np.triu(all_distances <= radius, k=1))))
+        self.assertEqual(set(zip(first, second)), expected)
+        np.testing.assert_allclose(distances, all_distances[first, second])
@@ -0,0 +1,112 @@
+import os
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+
+from trout.intra.night import Night
+from trout.intra.stamps import LOGFILE_POSITIONS, star_stamps
+from trout.test.data_drive import (
+    DataDriveTestCase,
+    make_data_drive,
+    write_aligned_combined,
+    write_logfile_combined,
+)
+
+
+class TestStarStamps(DataDriveTestCase):
+    night_dates = [date(2011, 7, 14), date(2011, 7, 15)]
+
+    def setUp(self):
+        super().setUp()
+        rng = np.random.default_rng(0)
+        self.images = []
+        self.paths = make_data_drive(self.root, self.night_dates)
+        for night_path in self.paths:
+            for number in (1, 2):
+                image = rng.uniform(0, 1000, (480, 760)).astype("float32")
+                write_aligned_combined(night_path, number, image)
+                self.images.append(image)
+                values = write_logfile_combined(
+                    night_path / "Log Files Combined" / f"07-14-11_m23_7.0-{number:03}.txt",
+                    n_stars=5,
+                    seed=number,
+                )
+                values[:, :2] = [[100, 200], [2, 478], [0, 0], [300, 20], [1, 1]]
+                self.write_logfile_positions(night_path, number, values[:, :2])
+
+    def write_logfile_positions(self, night_path, number, positions):
+        path = night_path / "Log Files Combined" / f"07-14-11_m23_7.0-{number:03}.txt"
+        lines = path.read_text().splitlines()
+        for index, (x, y) in enumerate(positions):
+            values = lines[9 + index].split("  ")
+            values[:2] = [f"{x:.2f}", f"{y:.2f}"]
+            lines[9 + index] = "  ".join(values)
+        path.write_text("\n".join(lines) + "\n")
+
+    def nights(self):
+        return [Night(d.year, d.month, d.day) for d in self.night_dates]
+
+    def test_reference_positions(self):
+        # Star 1 is at (746.58, 459.64) in the reference file
+        result = star_stamps(1, self.nights(), radius=10)
+        self.assertEqual(result.stamps.shape, (4, 20, 20))
+        for stamp, image in zip(result.stamps, self.images):
+            np.testing.assert_array_equal(stamp, image[449:469, 736:756])
+        nights = [d for d in self.night_dates for _ in (1, 2)]
+        self.assertEqual(list(result.metadata["night"]), nights)
+        self.assertEqual(list(result.metadata["image"]), [1, 2, 1, 2])
+        self.assertEqual(list(result.metadata["x_start"]), [736] * 4)
+
+        with patch("trout.intra.stamps._extract") as extract:
+            cached = star_stamps(1, self.nights(), radius=10)
+        extract.assert_not_called()
+        np.testing.assert_array_equal(cached.stamps, result.stamps)
+        self.assertTrue(cached.metadata.equals(result.metadata))
+
+    def test_logfile_positions(self):
+        result = star_stamps(2, self.nights(), radius=4, positions=LOGFILE_POSITIONS)
+        # Star 2 at (2, 478) is near the corner, the stamp is padded with NaN
+        stamp = result.stamps[0]
+        np.testing.assert_array_equal(stamp[:6, 2:], self.images[0][474:, :6])
+        self.assertTrue(np.isnan(stamp[:, :2]).all())
+        self.assertTrue(np.isnan(stamp[6:]).all())
+        self.assertEqual(list(result.metadata["x"]), [2] * 4)
+
+        # Star 3 isn't found in the images
+        result = star_stamps(3, self.nights(), radius=4, positions=LOGFILE_POSITIONS)
+        self.assertTrue(np.isnan(result.stamps).all())
+
+    def test_fractional_position_near_lower_edges(self):
+        positions = [[100, 200], [2, 478], [0, 0], [300, 20], [2.5, 3.5]]
+        self.write_logfile_positions(self.paths[0], 1, positions)
+        result = star_stamps(5, self.nights(), radius=4, positions=LOGFILE_POSITIONS)
+        # The stamp spans x -2...6 and y -1...7 like a stamp away from the edges
+        stamp = result.stamps[0]
+        np.testing.assert_array_equal(stamp[1:, 2:], self.images[0][:7, :6])
+        self.assertTrue(np.isnan(stamp[0]).all())
+        self.assertTrue(np.isnan(stamp[:, :2]).all())
+
+    def test_image_rewritten_in_place(self):
+        star_stamps(1, self.nights(), radius=10)
+        folder = self.paths[0] / "Aligned Combined"
+        mtime_ns = folder.stat().st_mtime_ns
+        image = np.full((480, 760), 7, dtype="float32")
+        write_aligned_combined(self.paths[0], 2, image)
+        os.utime(folder, ns=(mtime_ns, mtime_ns))
+        result = star_stamps(1, self.nights(), radius=10)
+        np.testing.assert_array_equal(result.stamps[1], image[449:469, 736:756])
+
+    def test_logfile_rewritten_in_place(self):
+        star_stamps(1, self.nights(), radius=4, positions=LOGFILE_POSITIONS)
+        folder = self.paths[0] / "Log Files Combined"
+        mtime_ns = folder.stat().st_mtime_ns
+        self.write_logfile_positions(self.paths[0], 1, [[300, 200]])
+        os.utime(folder, ns=(mtime_ns, mtime_ns))
+        result = star_stamps(1, self.nights(), radius=4, positions=LOGFILE_POSITIONS)
+        self.assertEqual(result.metadata["x"][0], 300)
+        np.testing.assert_array_equal(result.stamps[0], self.images[0][196:204, 296:304])
+
+    def test_invalid_positions(self):
+        with self.assertRaises(ValueError):
+            star_stamps(1, self.nights(), positions="nowhere")
@@ -0,0 +1,38 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from trout.files.text_table import read_titled_table
+from trout.test.data_drive import write_color_normalized, write_logfile_combined
+
+
+class TestReadTitledTable(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.folder = Path(tmp.name)
+
+    def test_logfile_combined_matches_python_engine(self):
+        path = self.folder / "07-14-11_m23_7.0-001.txt"
+        write_logfile_combined(path, n_stars=300)
+        expected = pd.read_csv(path, skiprows=8, delimiter=r"\s{2,}", engine="python")
+        pd.testing.assert_frame_equal(read_titled_table(path, titles_row=8), expected)
+
+    def test_color_normalized_matches_python_engine(self):
+        path = self.folder / "color_normalized.txt"
+        write_color_normalized(path, n_stars=300)
+        expected = pd.read_csv(
+            path, skiprows=2, delimiter=r"\s{2,}", engine="python", index_col=0
+        )
+        pd.testing.assert_frame_equal(
+            read_titled_table(path, titles_row=2, index_col=0), expected
+        )
+
+    def test_falls_back_for_values_with_spaces(self):
+        path = self.folder / "table.txt"
+        path.write_text("Title\nName  Value\nstar one  1.5\nstar two  2.5\n")
+        df = read_titled_table(path, titles_row=1)
+        self.assertEqual(list(df["Name"]), ["star one", "star two"])
+        self.assertEqual(list(df["Value"]), [1.5, 2.5])
@@ -0,0 +1,49 @@
+import random
+import unittest
+from datetime import date, datetime, timedelta
+
+import ephem
+
+from trout.bg.twilight import (_build_twilight_table, _ephem_next_twilight,
+                               _lookup)
+
+
+def _string_based_twilight(date_of_observation, rising):
+    """Previous implementation going through date strings"""
+    observer = ephem.Observer()
+    observer.lat = "43.3017"
+    observer.lon = "-91.79"
+    observer.elevation = 268
+    observer.date = date_of_observation.strftime("%Y-%m-%d %H:%M:%S")
+    observer.horizon = "-18"
+    if rising:
+        event = observer.next_rising(ephem.Sun(), use_center=True)
+    else:
+        event = observer.next_setting(ephem.Sun(), use_center=True)
+    return datetime.strptime(str(event), "%Y/%m/%d %H:%M:%S")
+
+
+class TestTwilightTable(unittest.TestCase):
+    start = date(2019, 3, 1)
+    end = date(2019, 5, 1)
+
+    @classmethod
+    def setUpClass(cls):
+        cls.risings, cls.settings = _build_twilight_table(cls.start, cls.end)
+
+    def test_lookup_matches_ephem(self):
+        random.seed(0)
+        moments = [date(2019, 3, 10), datetime(2019, 4, 2, 10)] + [
+            datetime(2019, 3, 1) + timedelta(seconds=random.randrange(55 * 86400))
+            for _ in range(40)
+        ]
+        for moment in moments:
+            for rising, events in ((True, self.risings), (False, self.settings)):
+                with self.subTest(moment=moment, rising=rising):
+                    expected = _string_based_twilight(moment, rising)
+                    self.assertEqual(_lookup(events, self.start, moment), expected)
+                    self.assertEqual(_ephem_next_twilight(moment, rising), expected)
+
+    def test_out_of_range(self):
+        self.assertIsNone(_lookup(self.risings, self.start, date(2018, 1, 1)))
+        self.assertIsNone(_lookup(self.risings, self.start, date(2019, 4, 30)))
@@ -0,0 +1,56 @@
+import warnings
+from datetime import date
+
+from trout.intra.year import Year
+from trout.test.data_drive import DataDriveTestCase, make_data_drive, write_sky_bg
+
+
+class TestYearSkyBg(DataDriveTestCase):
+    nights = [date(2012, 6, 1), date(2012, 6, 3), date(2012, 6, 4)]
+
+    def setUp(self):
+        super().setUp()
+        paths = make_data_drive(self.root, self.nights)
+        # The last night doesn't have sky background data
+        for i, (path, night_date) in enumerate(zip(paths[:2], self.nights)):
+            write_sky_bg(path, night_date, n_images=10 + i, seed=i)
+
+    def test_concatenated_with_failures(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            df = Year(2012).sky_bg(all=True, twilight_removed=False)
+        self.assertEqual(df.index.names, ["night", "image"])
+        self.assertEqual(len(df.loc[date(2012, 6, 1)]), 10)
+        self.assertEqual(len(df.loc[date(2012, 6, 3)]), 11)
+        self.assertEqual(list(df.attrs["failures"]), [date(2012, 6, 4)])
+        self.assertEqual(len(caught), 1)
+
+    def test_filters_match_night(self):
+        from trout.intra.night import Night
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            df = Year(2012).sky_bg(angle_status="INC")
+        night = Night(2012, 6, 1).get_sky_bg_refined(angle_status="INC")
+        self.assertTrue(df.loc[date(2012, 6, 1)].equals(night))
+
+    def test_group_by_night(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            df = Year.sky_bg_for_years([2012], group_by="median", twilight_removed=False)
+        self.assertEqual(list(df.index), [date(2012, 6, 1), date(2012, 6, 3)])
+
+    def test_map_nights(self):
+        with self.assertWarnsRegex(UserWarning, "Couldn't count images of"):
+            results, failures = Year.map_nights(
+                lambda night: len(night.sky_bg), [2012], action="count images"
+            )
+        self.assertEqual(results, {date(2012, 6, 1): 10, date(2012, 6, 3): 11})
+        self.assertEqual(list(failures), [date(2012, 6, 4)])
+        results, failures = Year.map_nights(
+            lambda night: night.night_date.day,
+            [2012],
+            include=lambda night: night.night_date.day > 1,
+        )
+        self.assertEqual(results, {date(2012, 6, 3): 3, date(2012, 6, 4): 4})
+        self.assertEqual(failures, {})
@@ -28,17 +28,26 @@ def show_box_around(
     vmax=None,
     label_center=True,
     grid=True,
+    offset=(0, 0),
 ):  # noqa
     """
     Show a box around an image data of provided size
+
+    param: offset: (x, y) position in the full image of `img_data[0, 0]`, for
+        when `img_data` is a cutout (see `AlignedCombined.cutout`). `center`
+        and the axes are in full image coordinates.
     """
     # Here we're assuming that x is column and y is row
     center_x, center_y = center
+    offset_x, offset_y = offset
     start_row = int(center_y - radius)
     end_row = int(center_y + radius)
     start_col = int(center_x - radius)
     end_col = int(center_x + radius)
-    data = img_data[start_row:end_row, start_col:end_col]
+    data = img_data[
+        max(start_row - offset_y, 0):max(end_row - offset_y, 0),
+        max(start_col - offset_x, 0):max(end_col - offset_x, 0),
+    ]
 
     if not vmin or not vmax:
         interval = MinMaxInterval()
@@ -46,7 +55,14 @@ def show_box_around(
     # Create an ImageNormalize object using a SqrtStretch object
     norm = ImageNormalize(vmin=vmin, vmax=vmax, stretch=SqrtStretch())
 
-    ax.imshow(img_data, cmap="gray", origin="lower", norm=norm)
+    rows, cols = np.shape(img_data)
+    extent = (
+        offset_x - 0.5,
+        offset_x + cols - 0.5,
+        offset_y - 0.5,
+        offset_y + rows - 0.5,
+    )
+    ax.imshow(img_data, cmap="gray", origin="lower", norm=norm, extent=extent)
     ax.set_xlim(start_col, end_col)
     ax.set_ylim(start_row, end_row)
     ax.set_xlabel("x")
@@ -151,11 +167,12 @@ def internight_bands(stars=range(STAR_START, STAR_END + 1)):
     # dict returned by get_bands is cached
     bands_copy = {}
 
+    stars = np.asarray(stars)
     for k in bands:
-        bands_copy[k] = filter(lambda x: x in stars, bands[k])
+        bands_copy[k] = np.asarray(bands[k])[np.isin(bands[k], stars)]
 
     x = bands.keys()
-    y = [len(list(bands_copy[i])) for i in x]
+    y = [len(bands_copy[i]) for i in x]
 
     # Crate bar plot
     plt.bar(x, y, color="maroon", width=0.4)